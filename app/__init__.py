@@ -1,24 +1,136 @@
 from flask import Flask
 import os
-import joblib
-# Change this to app.train_dt or app.train_rf depending on desired model
-from app.train_rf import get_or_train_model
+import threading
+import time
+from app.train_rf import load_training_data, MODEL_PATH
+from app.compiled_model import compiled_model_path
+from app.registry import make_registry_from_env
+from app.ingest import USER_DB_PATH, make_writer_from_env
+from app.startup import describe_memory, log_first_request
+from weather_app.metrics import metrics
+from weather_app.cache import MemoryCache, SQLiteCache
+from weather_app.coalesce import SingleFlight
 from dotenv import load_dotenv
 
 # Load environment variables from .env if present
 load_dotenv()
 
-model = None  # Will be imported by routes
+model = None  # The default model at startup; requests use app.extensions['models'].get()
 
-def create_app():
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+def start_background(app):
+    """Start the app's background threads in this process.
+
+    Under gunicorn --preload the app is built once in the master and forked;
+    threads don't survive a fork, so gunicorn.conf.py calls this in each
+    worker instead of create_app.
+    """
+    for component in app.extensions['background']:
+        component.start()
+
+
+def time_requests(app):
+    """Record every request's latency by endpoint (ccs_request_seconds)."""
+    from flask import g, request
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def observe(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            metrics.observe('ccs_request_seconds', time.perf_counter() - started, endpoint=request.endpoint or 'unknown')
+        return response
+
+
+def create_app(background=None):
+    started = time.perf_counter()
     app = Flask(__name__)
+    app.extensions['background'] = []
+    if os.getenv("CCS_PROFILE_STARTUP", "0") == "1":
+        log_first_request(app)
+    if metrics.enabled:
+        time_requests(app)
 
-    # Load model at startup
+    # Models load on first use; the default (CCS_MODEL) and any shadow model load now
     global model
-    model = get_or_train_model()
+    registry = make_registry_from_env()
+    model = registry.get()
+    app.extensions['models'] = registry
+    app.extensions['background'].append(registry)
+    print(f"Model ready in {(time.perf_counter() - started) * 1000:.0f} ms ({describe_memory()})")
+
+    # Retrained random forest versions are published to model/versions and picked up without a restart
+    if os.getenv("RETRAIN_ENABLED", "0") == "1":
+        from app.retrain import RetrainScheduler
+
+        app.extensions['retrain'] = RetrainScheduler(
+            load_training_data,
+            compiled_model_path(MODEL_PATH),
+            interval=float(os.getenv("RETRAIN_INTERVAL", "21600")),
+            min_new_rows=int(os.getenv("RETRAIN_MIN_NEW_ROWS", "50")),
+            tolerance=float(os.getenv("RETRAIN_TOLERANCE", "0.05")),
+            n_jobs=int(os.getenv("RETRAIN_JOBS", "1"))
+        )
+        app.extensions['background'].append(app.extensions['retrain'])
+
+    # Concurrent requests for the same inputs share one computation, optionally across workers
+    if os.getenv("COALESCE_ACROSS_WORKERS", "0") == "1":
+        app.extensions['coalescer'] = SingleFlight(
+            lock_dir=os.getenv("COALESCE_LOCK_DIR", os.path.join(DATA_DIR, 'locks')),
+            store=SQLiteCache(os.getenv("COALESCE_STORE_PATH", os.path.join(DATA_DIR, 'coalesce_cache.sqlite')))
+        )
+    else:
+        app.extensions['coalescer'] = SingleFlight()
+
+    # Scored snapshots (timezone-neutral) and encoded /all_data responses (per tz offset)
+    app.extensions['neutral_cache'] = MemoryCache(int(os.getenv("NEUTRAL_CACHE_SIZE", "256")))
+    app.extensions['response_cache'] = MemoryCache(int(os.getenv("RESPONSE_CACHE_SIZE", "1024")))
+    app.extensions['response_flight'] = SingleFlight()
+    app.config['RESPONSE_GZIP_LEVEL'] = int(os.getenv("RESPONSE_GZIP_LEVEL", "9"))
+
+    # User CCS submissions: schema created once here, rows written behind in batches
+    app.extensions['ingest'] = make_writer_from_env(os.getenv("USER_DB_PATH", USER_DB_PATH))
+    app.extensions['background'].append(app.extensions['ingest'])
+
+    # Every forecast snapshot fetched is archived; the latest one stands in while upstream is down
+    if os.getenv("ARCHIVE_ENABLED", "0") == "1":
+        from app.archive import ARCHIVE_PATH, make_archive_from_env
+        from weather_app import weather_api
+
+        app.extensions['archive'] = make_archive_from_env(os.getenv("ARCHIVE_PATH", ARCHIVE_PATH))
+        weather_api.snapshot_archive = app.extensions['archive']
+        app.extensions['background'].append(app.extensions['archive'])
 
     # Register routes
-    from app.routes import main as main_blueprint
+    from app.routes import CLIMBING_DESTINATIONS, main as main_blueprint
     app.register_blueprint(main_blueprint)
 
+    # Built once here so every request (and every forked worker) shares the same spatial index
+    CLIMBING_DESTINATIONS.build_index()
+
+    # plotly is only imported when the first figure is built; do that off the request path
+    from weather_app.plot_utils import layout_template
+    app.extensions['background'].append(threading.Thread(target=layout_template, name='warm-plots', daemon=True))
+
+    # Keep every destination's /all_data payload warm in the background
+    if os.getenv("PREFETCH_ENABLED", "0") == "1":
+        from app.pipeline import build_all_data
+        from app.prefetch import make_scheduler_from_env
+        from app.routes import API_KEY, CLIMBING_DESTINATIONS
+
+        def build_payload(destination, lat, lon, tz_offset):
+            return build_all_data(registry.get(), API_KEY, destination, lat, lon, tz_offset)
+
+        app.extensions['prefetch'] = make_scheduler_from_env(CLIMBING_DESTINATIONS, build_payload)
+        app.extensions['background'].append(app.extensions['prefetch'])
+
+    if background is None:
+        background = os.getenv("CCS_START_BACKGROUND", "1") == "1"
+    if background:
+        start_background(app)
+    print(f"App ready in {(time.perf_counter() - started) * 1000:.0f} ms ({describe_memory()})")
     return app
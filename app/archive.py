@@ -0,0 +1,230 @@
+"""Append-only archive of every forecast snapshot fetched from upstream.
+
+    python -m app.archive [--destination NAME] [--days 30]
+
+Snapshots are keyed by location cell (the weather cache's rounded
+coordinates), UTC day and issue time in one WITHOUT ROWID table. Each
+location's day is therefore one contiguous key range, and "every forecast
+issued for crag X over the last 30 days" is a single range scan. The
+forecast columns are stored as one zlib-compressed blob per snapshot.
+Current conditions and the daily tier go in a second, compressed JSON blob.
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+import numpy as np
+from weather_app.cache import cache_key
+from weather_app.columnar import COLUMNS, DTYPES, ColumnarForecast
+from weather_app.metrics import metrics
+from weather_app.weather_api import current_conditions
+from app.ingest import DATA_DIR, WriteBehindQueue, connect
+
+ARCHIVE_PATH = os.path.join(DATA_DIR, 'forecast_archive.sqlite')
+
+SECONDS_PER_DAY = 86400
+
+ARCHIVE_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS forecast_snapshots (
+        location TEXT NOT NULL,
+        day INTEGER NOT NULL,
+        issued_at INTEGER NOT NULL,
+        rows INTEGER NOT NULL,
+        first_dt INTEGER,
+        last_dt INTEGER,
+        digest TEXT NOT NULL,
+        forecast BLOB NOT NULL,
+        extra BLOB NOT NULL,
+        PRIMARY KEY (location, day, issued_at)
+    ) WITHOUT ROWID
+'''
+
+# Skips a snapshot another worker (or an earlier fetch) already stored for that location and day
+ARCHIVE_INSERT = '''
+    INSERT OR IGNORE INTO forecast_snapshots
+        (location, day, issued_at, rows, first_dt, last_dt, digest, forecast, extra)
+    SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?
+    WHERE NOT EXISTS (SELECT 1 FROM forecast_snapshots WHERE location = ? AND day = ? AND digest = ?)
+'''
+
+
+def encode_forecast(forecast, level=6):
+    return zlib.compress(b''.join(
+        np.ascontiguousarray(getattr(forecast, name), dtype=dtype).tobytes() for name, dtype in zip(COLUMNS, DTYPES)
+    ), level)
+
+
+def decode_forecast(blob, rows):
+    buffer = zlib.decompress(blob)
+    columns, offset = {}, 0
+    for name, dtype in zip(COLUMNS, DTYPES):
+        columns[name] = np.frombuffer(buffer, dtype=dtype, count=rows, offset=offset).copy()
+        offset += rows * np.dtype(dtype).itemsize
+    return ColumnarForecast(**columns)
+
+
+def decode_snapshot(issued_at, rows, forecast, extra):
+    extra = json.loads(zlib.decompress(extra))
+    return {
+        'issued_at': issued_at,
+        'rows': rows,
+        'forecast': decode_forecast(forecast, rows),
+        'current': extra['current'],
+        'daily': extra['daily']
+    }
+
+
+def snapshot_digest(current, forecast):
+    h = hashlib.sha1(json.dumps(current, sort_keys=True).encode())
+    for name in COLUMNS:
+        h.update(np.ascontiguousarray(getattr(forecast, name)).tobytes())
+    return h.hexdigest()
+
+
+def response_digest(data_2_5, data_3_0):
+    return hashlib.sha1(json.dumps([data_2_5, data_3_0], sort_keys=True).encode()).hexdigest()
+
+
+class ForecastArchive:
+    """Records snapshots in the background and answers range queries per location.
+
+    ``record_response`` is called from the weather cache's loader each time
+    a forecast is fetched from upstream, so a cached response is archived
+    once, as issued at its fetch time. Recording only hashes and enqueues;
+    compression and inserts happen on a WriteBehindQueue thread. A snapshot
+    identical to the last one recorded for its location is skipped.
+    """
+
+    def __init__(self, db_path=ARCHIVE_PATH, max_batch=100, max_delay=2.0):
+        self.db_path = db_path
+        self._conn = None  # owned by the writer thread
+        self._local = threading.local()
+        self._last = {}
+        self._lock = threading.Lock()
+        self.queue = WriteBehindQueue(self._write, max_batch, max_delay, name='forecast-archive')
+
+    def start(self):
+        self.queue.start()
+        return self
+
+    def record_response(self, lat, lon, data_2_5, data_3_0, fetched_at):
+        """Archive the forecast made from one upstream fetch, digested by the raw responses."""
+        forecast = ColumnarForecast.from_api(data_2_5, data_3_0, fetched_at)
+        self.record(lat, lon, current_conditions(data_3_0), forecast, data_3_0.get("daily", []),
+                    issued_at=fetched_at, digest=response_digest(data_2_5, data_3_0))
+
+    def record(self, lat, lon, current, forecast, daily, issued_at=None, digest=None):
+        location = cache_key('location', lat, lon)
+        digest = digest or snapshot_digest(current, forecast)
+        with self._lock:
+            if self._last.get(location) == digest:
+                return
+            self._last[location] = digest
+        issued_at = int(time.time() if issued_at is None else issued_at)
+        self.queue.put((location, issued_at, digest, current, forecast, daily))
+
+    def _write(self, snapshots):
+        if self._conn is None:
+            self._conn = connect(self.db_path)
+        rows = []
+        for location, issued_at, digest, current, forecast, daily in snapshots:
+            day = issued_at // SECONDS_PER_DAY
+            extra = zlib.compress(json.dumps({'current': current, 'daily': daily}, separators=(',', ':')).encode())
+            first, last = (int(forecast.dt[0]), int(forecast.dt[-1])) if len(forecast) else (None, None)
+            rows.append((location, day, issued_at, len(forecast), first, last, digest, encode_forecast(forecast),
+                         extra, location, day, digest))
+        metrics.inc('ccs_sqlite_rows_total', len(rows), table='forecast_snapshots')
+        with metrics.timer('ccs_sqlite_write_seconds', table='forecast_snapshots'), self._conn:
+            self._conn.executemany(ARCHIVE_INSERT, rows)
+
+    def _read_connection(self):
+        # A connection inherited through fork is never reused
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._local.conn = connect(self.db_path)
+            self._local.pid = os.getpid()
+        return conn
+
+    def snapshots(self, lat, lon, start, end, decode=True):
+        """Snapshots for one location issued in [start, end), oldest first.
+
+        Each is ``{issued_at, rows, forecast, current, daily}``; with
+        ``decode=False`` only ``{issued_at, rows, first, last, bytes}`` is read,
+        first and last being the forecast's first and last ``dt``.
+        """
+        location = cache_key('location', lat, lon)
+        columns = ('issued_at, rows, forecast, extra' if decode
+                   else 'issued_at, rows, first_dt, last_dt, length(forecast) + length(extra)')
+        cursor = self._read_connection().execute(f'''
+            SELECT {columns} FROM forecast_snapshots
+            WHERE location = ? AND day >= ? AND day <= ? AND issued_at >= ? AND issued_at < ?
+            ORDER BY day, issued_at
+        ''', (location, start // SECONDS_PER_DAY, end // SECONDS_PER_DAY, start, end))
+        if not decode:
+            return [{'issued_at': issued_at, 'rows': rows, 'first': first, 'last': last, 'bytes': size}
+                    for issued_at, rows, first, last, size in cursor]
+        return [decode_snapshot(*row) for row in cursor]
+
+    def latest(self, lat, lon, max_age, now=None):
+        """The most recent snapshot for a location if it is at most ``max_age`` seconds old, else None."""
+        now = time.time() if now is None else now
+        location = cache_key('location', lat, lon)
+        row = self._read_connection().execute('''
+            SELECT issued_at, rows, forecast, extra FROM forecast_snapshots
+            WHERE location = ? AND day >= ?
+            ORDER BY day DESC, issued_at DESC LIMIT 1
+        ''', (location, int(now - max_age) // SECONDS_PER_DAY)).fetchone()
+        if row is None or row[0] < now - max_age:
+            return None
+        return decode_snapshot(*row)
+
+
+def init_archive(db_path=ARCHIVE_PATH):
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    conn = connect(db_path)
+    with conn:
+        conn.execute(ARCHIVE_SCHEMA)
+    conn.close()
+
+
+def make_archive_from_env(db_path=ARCHIVE_PATH):
+    init_archive(db_path)
+    return ForecastArchive(
+        db_path,
+        max_batch=int(os.getenv("ARCHIVE_BATCH_SIZE", "100")),
+        max_delay=float(os.getenv("ARCHIVE_FLUSH_INTERVAL", "2.0"))
+    )
+
+
+def main():
+    from app.routes import CLIMBING_DESTINATIONS
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--destination', help='one crag (default: every crag)')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--path', default=os.getenv("ARCHIVE_PATH", ARCHIVE_PATH))
+    args = parser.parse_args()
+    if not os.path.exists(args.path):
+        raise SystemExit(f"No archive at {args.path}")
+
+    archive = ForecastArchive(args.path)
+    end = int(time.time())
+    start = end - args.days * SECONDS_PER_DAY
+    names = [args.destination] if args.destination else list(CLIMBING_DESTINATIONS)
+    print(f"{'destination':<40}{'snapshots':>10}{'days':>6}{'KB':>10}{'query ms':>10}")
+    for name in names:
+        lat, lon = CLIMBING_DESTINATIONS[name]
+        started = time.perf_counter()
+        snapshots = archive.snapshots(lat, lon, start, end, decode=False)
+        elapsed = (time.perf_counter() - started) * 1000
+        if snapshots:
+            days = len({s['issued_at'] // SECONDS_PER_DAY for s in snapshots})
+            size = sum(s['bytes'] for s in snapshots) / 1024
+            print(f"{name:<40}{len(snapshots):>10}{days:>6}{size:>10.0f}{elapsed:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+import json
+import os
+import shutil
+import numpy as np
+
+# A directory with one .npy per node array, so every worker can memory-map the same pages
+COMPILED_SUFFIX = '.compiled'
+NODE_ARRAYS = ('feature', 'threshold', 'children_left', 'children_right', 'value', 'roots')
+
+
+class CompiledTreeModel:
+    """Flattened tree ensemble that scores rows with plain NumPy.
+
+    Every tree of the ensemble lives in the same node arrays; leaves point at
+    themselves so traversal runs a fixed number of steps without branching.
+    Predictions are bit-for-bit equal to the sklearn estimator they came from.
+    """
+
+    def __init__(self, feature, threshold, children_left, children_right, value, roots, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.children_left = children_left
+        self.children_right = children_right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_trees = len(roots)
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n_rows, n_features = X.shape
+
+        # One slot per (tree, row); sklearn compares float32 inputs against float64 thresholds
+        nodes = np.repeat(self.roots, n_rows)
+        row_offsets = np.tile(np.arange(n_rows, dtype=np.intp) * n_features, self.n_trees)
+        flat_x = X.ravel()
+        go_left = np.empty(nodes.shape, dtype=bool)
+
+        for _ in range(self.max_depth):
+            np.less_equal(flat_x[row_offsets + self.feature[nodes]], self.threshold[nodes], out=go_left)
+            nodes = np.where(go_left, self.children_left[nodes], self.children_right[nodes])
+
+        leaf_values = self.value[nodes].reshape(self.n_trees, n_rows)
+
+        # Accumulate tree by tree, in order, exactly like RandomForestRegressor.predict
+        out = np.zeros(n_rows, dtype=np.float64)
+        for tree_values in leaf_values:
+            out += tree_values
+        out /= self.n_trees
+        return out
+
+
+def compile_model(estimator):
+    """Flatten a fitted DecisionTreeRegressor or RandomForestRegressor."""
+    trees = getattr(estimator, 'estimators_', [estimator])
+
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for tree in trees:
+        t = tree.tree_
+        node_ids = np.arange(t.node_count, dtype=np.intp)
+        is_leaf = t.children_left < 0
+
+        features.append(np.where(is_leaf, 0, t.feature).astype(np.intp))
+        thresholds.append(t.threshold.astype(np.float64))
+        lefts.append(np.where(is_leaf, node_ids, t.children_left) + offset)
+        rights.append(np.where(is_leaf, node_ids, t.children_right) + offset)
+        values.append(t.value[:, 0, 0].astype(np.float64))
+        roots.append(offset)
+
+        offset += t.node_count
+        max_depth = max(max_depth, t.max_depth)
+
+    return CompiledTreeModel(
+        feature=np.concatenate(features),
+        threshold=np.concatenate(thresholds),
+        children_left=np.concatenate(lefts).astype(np.intp),
+        children_right=np.concatenate(rights).astype(np.intp),
+        value=np.concatenate(values),
+        roots=np.array(roots, dtype=np.intp),
+        max_depth=max_depth
+    )
+
+
+def compiled_model_path(model_path):
+    return os.path.splitext(model_path)[0] + COMPILED_SUFFIX
+
+
+def save_compiled_model(compiled, path):
+    """Write the node arrays as .npy files; replaces any previous export in one rename."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for name in NODE_ARRAYS:
+        np.save(os.path.join(tmp, f'{name}.npy'), np.ascontiguousarray(getattr(compiled, name)))
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump({'max_depth': compiled.max_depth, 'n_trees': compiled.n_trees}, f)
+
+    old = f'{path}.{os.getpid()}.old'
+    if os.path.isdir(path):
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def load_compiled_model(path, mmap=True):
+    """Load an export; with ``mmap`` the node arrays are mapped read-only rather than copied.
+
+    Mapped pages live in the OS page cache, so every worker on the box shares
+    one physical copy of the model. Older single-file .npz exports still load.
+    """
+    if not os.path.exists(path):
+        return None
+    if os.path.isfile(path):
+        with np.load(path) as data:
+            return CompiledTreeModel(
+                feature=data['feature'].astype(np.intp),
+                threshold=data['threshold'],
+                children_left=data['children_left'].astype(np.intp),
+                children_right=data['children_right'].astype(np.intp),
+                value=data['value'],
+                roots=data['roots'].astype(np.intp),
+                max_depth=int(data['max_depth'])
+            )
+
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    arrays = {
+        name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r' if mmap else None).view(np.ndarray)
+        for name in NODE_ARRAYS
+    }
+    return CompiledTreeModel(max_depth=meta['max_depth'], **arrays)
+
+
+def get_or_compile_model(get_or_train_model, model_path):
+    """Load the compiled form of a model, exporting it from the pickle when stale or missing."""
+    path = compiled_model_path(model_path)
+    if os.path.exists(path) and (
+        not os.path.exists(model_path) or os.path.getmtime(path) >= os.path.getmtime(model_path)
+    ):
+        return load_compiled_model(path)
+
+    compiled = compile_model(get_or_train_model())
+    save_compiled_model(compiled, path)
+    return compiled
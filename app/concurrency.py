@@ -0,0 +1,56 @@
+import importlib
+import os
+import sys
+
+_pool = None
+
+
+def cooperative():
+    """True when gevent has monkey-patched this process (GUNICORN_WORKER_CLASS=gevent).
+
+    Upstream HTTP calls then yield to other requests instead of blocking
+    the worker, so one worker can hold hundreds of requests in flight.
+    """
+    monkey = sys.modules.get('gevent.monkey')
+    return monkey is not None and monkey.is_module_patched('socket')
+
+
+def run_cpu(fn, *args, **kwargs):
+    """Call ``fn`` off the event loop when cooperative; a plain call otherwise.
+
+    Scoring, plotting and compression don't yield, so under gevent they
+    would stall every other request in the worker. They run on a small pool
+    of real threads (CCS_CPU_THREADS) while the request's greenlet waits.
+    """
+    if not cooperative():
+        return fn(*args, **kwargs)
+
+    global _pool
+    if _pool is None:
+        from gevent.threadpool import ThreadPool
+
+        _pool = ThreadPool(int(os.getenv("CCS_CPU_THREADS", str(os.cpu_count() or 1))))
+    return _pool.spawn(fn, *args, **kwargs).get()
+
+
+def original(module, name):
+    """``module.name`` as it was before gevent monkey-patching; the object itself when unpatched."""
+    monkey = sys.modules.get('gevent.monkey')
+    if monkey is None:
+        return getattr(importlib.import_module(module), name)
+    return monkey.get_original(module, name)
+
+
+def native_lock():
+    """A lock shared safely between greenlets and real threads such as run_cpu's pool.
+
+    Patched ``threading.Lock`` objects belong to the gevent hub, so a pool
+    thread blocking on one can hang. Only hold this one around short,
+    non-yielding sections: a greenlet waiting on it blocks the whole hub.
+    """
+    return original('_thread', 'allocate_lock')()
+
+
+def start_native_thread(target, *args):
+    """Run ``target`` on a real OS thread even when threading is monkey-patched."""
+    return original('_thread', 'start_new_thread')(target, args)
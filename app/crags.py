@@ -0,0 +1,96 @@
+import csv
+import os
+from collections.abc import Mapping
+import numpy as np
+
+CRAGS_PATH = os.path.join(os.path.dirname(__file__), 'data', 'crags.csv')
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def unit_vectors(lat, lon):
+    """Points on the unit sphere; straight-line distance between them orders like great-circle distance."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+
+class CragCatalog(Mapping):
+    """Crag name -> (lat, lon), with nearest-N and bounding-box queries.
+
+    Coordinates live in NumPy arrays. A KD-tree over unit vectors answers
+    nearest queries, and an index sorted by latitude answers bounding
+    boxes; both take well under a millisecond at 100k crags. The catalog is
+    read-only once built, so one instance is shared by every request (and,
+    under gunicorn --preload, by every worker).
+    """
+
+    def __init__(self, names, lat, lon):
+        self.names = list(names)
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self._positions = {name: i for i, name in enumerate(self.names)}
+        if len(self._positions) != len(self.names):
+            raise ValueError("Crag names must be unique")
+        self._tree = None
+        self._by_lat = np.argsort(self.lat, kind='stable')
+        self._sorted_lat = self.lat[self._by_lat]
+
+    @classmethod
+    def from_csv(cls, path=CRAGS_PATH):
+        """Load a ``name,lat,lon`` file."""
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        return cls([row['name'] for row in rows], [row['lat'] for row in rows], [row['lon'] for row in rows])
+
+    def __getitem__(self, name):
+        i = self._positions[name]
+        return float(self.lat[i]), float(self.lon[i])
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def build_index(self):
+        """Build the KD-tree now rather than on the first nearest query."""
+        if self._tree is None:
+            from scipy.spatial import cKDTree
+
+            self._tree = cKDTree(unit_vectors(self.lat, self.lon))
+        return self
+
+    def _crags(self, positions, distances=None):
+        crags = []
+        for k, i in enumerate(positions):
+            crag = {'name': self.names[i], 'lat': float(self.lat[i]), 'lon': float(self.lon[i])}
+            if distances is not None:
+                crag['distance_km'] = round(float(distances[k]), 2)
+            crags.append(crag)
+        return crags
+
+    def nearest(self, lat, lon, n=10, max_km=None):
+        """Up to ``n`` crags closest to (lat, lon) by great-circle distance, nearest first."""
+        n = min(n, len(self))
+        if n <= 0:
+            return []
+        upper = np.inf if max_km is None else 2 * np.sin(min(max_km / EARTH_RADIUS_KM, np.pi) / 2)
+        chords, positions = self.build_index()._tree.query(unit_vectors(lat, lon)[0], k=n, distance_upper_bound=upper)
+        chords, positions = np.atleast_1d(chords), np.atleast_1d(positions)
+        found = np.isfinite(chords)
+        km = 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chords[found] / 2, 1.0))
+        return self._crags(positions[found], km)
+
+    def bbox(self, south, west, north, east, limit=None):
+        """Crags inside a box, sorted by latitude; ``west > east`` crosses the antimeridian."""
+        start = np.searchsorted(self._sorted_lat, south, side='left')
+        stop = np.searchsorted(self._sorted_lat, north, side='right')
+        band = self._by_lat[start:stop]
+        lon = self.lon[band]
+        inside = (lon >= west) & (lon <= east) if west <= east else (lon >= west) | (lon <= east)
+        positions = band[inside]
+        return self._crags(positions[:limit] if limit is not None else positions)
+
+
+def load_catalog_from_env():
+    return CragCatalog.from_csv(os.getenv("CRAGS_PATH", CRAGS_PATH))
@@ -0,0 +1,304 @@
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from weather_app.metrics import metrics
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+USER_DB_PATH = os.path.join(DATA_DIR, 'user_ccs_data.sqlite')
+
+USER_SCORES_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS user_scores (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp INTEGER,
+        temperature REAL,
+        humidity REAL,
+        ccs INTEGER
+    )
+'''
+
+# Columns added to user_scores after the first release, applied with ALTER TABLE
+USER_SCORES_MIGRATIONS = (
+    ('destination', 'TEXT'),
+    ('lat', 'REAL'),
+    ('lon', 'REAL')
+)
+
+# Pre-aggregated submissions per destination and UTC hour/day, kept up to date on every flush
+ROLLUPS = {'hour': ('user_scores_hourly', 3600), 'day': ('user_scores_daily', 86400)}
+
+ROLLUP_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        destination TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        n INTEGER NOT NULL,
+        ccs_sum REAL NOT NULL,
+        ccs_min REAL NOT NULL,
+        ccs_max REAL NOT NULL,
+        temperature_sum REAL NOT NULL,
+        humidity_sum REAL NOT NULL,
+        PRIMARY KEY (destination, bucket)
+    ) WITHOUT ROWID
+'''
+
+ROLLUP_UPSERT = '''
+    INSERT INTO {table} (destination, bucket, n, ccs_sum, ccs_min, ccs_max, temperature_sum, humidity_sum)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (destination, bucket) DO UPDATE SET
+        n = n + excluded.n,
+        ccs_sum = ccs_sum + excluded.ccs_sum,
+        ccs_min = min(ccs_min, excluded.ccs_min),
+        ccs_max = max(ccs_max, excluded.ccs_max),
+        temperature_sum = temperature_sum + excluded.temperature_sum,
+        humidity_sum = humidity_sum + excluded.humidity_sum
+'''
+
+ROLLUP_BACKFILL = '''
+    INSERT INTO {table} (destination, bucket, n, ccs_sum, ccs_min, ccs_max, temperature_sum, humidity_sum)
+    SELECT destination, timestamp / {seconds} * {seconds}, COUNT(*), SUM(ccs), MIN(ccs), MAX(ccs),
+           SUM(temperature), SUM(humidity)
+    FROM user_scores
+    WHERE destination IS NOT NULL
+    GROUP BY destination, timestamp / {seconds}
+'''
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=10)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+def init_db(db_path=USER_DB_PATH):
+    """Create and migrate the schema once at startup instead of on every submission.
+
+    Workers started without preload all run this at once, so the checks and
+    the changes they lead to happen under one write lock (BEGIN IMMEDIATE):
+    later workers wait, then find the migration and backfill already done.
+    """
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = connect(db_path)
+    conn.isolation_level = None  # the transaction below is explicit
+    with conn:
+        conn.execute('BEGIN IMMEDIATE')
+        conn.execute(USER_SCORES_SCHEMA)
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(user_scores)')}
+        for name, sql_type in USER_SCORES_MIGRATIONS:
+            if name not in columns:
+                conn.execute(f'ALTER TABLE user_scores ADD COLUMN {name} {sql_type}')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_user_scores_destination_ts ON user_scores (destination, timestamp)')
+
+        for table, seconds in ROLLUPS.values():
+            conn.execute(ROLLUP_SCHEMA.format(table=table))
+            # Rebuild from the raw rows when a rollup is new (or was dropped)
+            if conn.execute(f'SELECT 1 FROM {table} LIMIT 1').fetchone() is None:
+                conn.execute(ROLLUP_BACKFILL.format(table=table, seconds=seconds))
+    conn.close()
+
+
+def rollup_rows(rows, seconds):
+    """Aggregate (timestamp, temperature, humidity, ccs, destination, ...) rows into rollup upsert rows."""
+    buckets = {}
+    for timestamp, temperature, humidity, ccs, destination, *_ in rows:
+        if destination is None:
+            continue
+        key = (destination, timestamp // seconds * seconds)
+        agg = buckets.get(key)
+        if agg is None:
+            buckets[key] = [1, ccs, ccs, ccs, temperature, humidity]
+        else:
+            agg[0] += 1
+            agg[1] += ccs
+            agg[2] = min(agg[2], ccs)
+            agg[3] = max(agg[3], ccs)
+            agg[4] += temperature
+            agg[5] += humidity
+    return [(destination, bucket, *agg) for (destination, bucket), agg in buckets.items()]
+
+
+def parse_submission(data, destinations=None):
+    """(timestamp, temperature, humidity, ccs, destination, lat, lon) from a submission dict.
+
+    Destination and coordinates are optional (None); raises ValueError if
+    malformed, or if the destination isn't one of ``destinations`` when given.
+    Request handlers pass the crag catalog, since destinations key the rollup tables.
+    """
+    try:
+        lat, lon = data.get('lat'), data.get('lon')
+        row = (
+            int(data['timestamp']),
+            float(data['temperature']),
+            float(data['humidity']),
+            int(data['ccs']),
+            data.get('destination') or None,
+            None if lat is None else float(lat),
+            None if lon is None else float(lon)
+        )
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid submission: {e}") from e
+    destination = row[4]
+    if destinations is not None and destination is not None and (
+            not isinstance(destination, str) or destination not in destinations):
+        raise ValueError(f"Invalid submission: unknown destination {destination!r}")
+    return row
+
+
+class WriteBehindQueue:
+    """Buffers items and hands them to ``write_batch`` from one background thread.
+
+    A batch is flushed when ``max_batch`` items are waiting or ``max_delay``
+    seconds after its first item arrived, whichever comes first. Items put
+    before ``start`` wait for it. Whatever is still queued is flushed at
+    interpreter exit.
+    """
+
+    def __init__(self, write_batch, max_batch=200, max_delay=0.5, name='write-behind'):
+        self.write_batch = write_batch
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.written = 0
+        self.errors = 0
+        self.name = name
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        return self
+
+    def put(self, item):
+        self._queue.put(item)
+
+    def put_many(self, items):
+        for item in items:
+            self._queue.put(item)
+
+    def flush(self):
+        """Block until everything queued so far has been written."""
+        self._queue.join()
+
+    def close(self):
+        if self._closed or self._thread is None:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is None:
+                self._queue.task_done()
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.task_done()
+                    stop = True
+                    break
+                batch.append(item)
+
+            try:
+                self.write_batch(batch)
+                self.written += len(batch)
+            except Exception as e:
+                self.errors += len(batch)
+                print(f"Write-behind batch of {len(batch)} failed: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+class UserScoreWriter:
+    """Bulk-inserts user CCS submissions over one persistent connection per worker.
+
+    Each flush inserts the raw rows and folds them into the hourly and daily
+    rollups in the same transaction, so reads never scan user_scores.
+    """
+
+    def __init__(self, db_path=USER_DB_PATH, max_batch=200, max_delay=0.5):
+        self.db_path = db_path
+        self._conn = None  # opened lazily on the writer thread, which owns it
+        self._local = threading.local()
+        self.queue = WriteBehindQueue(self._write, max_batch, max_delay, name='user-scores')
+
+    def start(self):
+        self.queue.start()
+        return self
+
+    def submit(self, rows):
+        self.queue.put_many(rows)
+
+    def _write(self, rows):
+        if self._conn is None:
+            self._conn = connect(self.db_path)
+        metrics.inc('ccs_sqlite_rows_total', len(rows), table='user_scores')
+        with metrics.timer('ccs_sqlite_write_seconds', table='user_scores'), self._conn:
+            self._conn.executemany('''
+                INSERT INTO user_scores (timestamp, temperature, humidity, ccs, destination, lat, lon)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            for table, seconds in ROLLUPS.values():
+                self._conn.executemany(ROLLUP_UPSERT.format(table=table), rollup_rows(rows, seconds))
+
+    def _read_connection(self):
+        # A connection inherited through fork is never reused
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._local.conn = connect(self.db_path)
+            self._local.pid = os.getpid()
+        return conn
+
+    def community_ccs(self, destination, start, end, resolution='day'):
+        """Aggregated submissions for one destination with bucket start in [start, end)."""
+        table, seconds = ROLLUPS[resolution]
+        rows = self._read_connection().execute(f'''
+            SELECT bucket, n, ccs_sum, ccs_min, ccs_max, temperature_sum, humidity_sum
+            FROM {table}
+            WHERE destination = ? AND bucket >= ? AND bucket < ?
+            ORDER BY bucket
+        ''', (destination, start // seconds * seconds, end)).fetchall()
+
+        buckets = [
+            {
+                'start': bucket,
+                'count': n,
+                'mean_ccs': round(ccs_sum / n, 2),
+                'min_ccs': ccs_min,
+                'max_ccs': ccs_max,
+                'mean_temp': round(temperature_sum / n, 1),
+                'mean_humidity': round(humidity_sum / n, 1)
+            }
+            for bucket, n, ccs_sum, ccs_min, ccs_max, temperature_sum, humidity_sum in rows
+        ]
+        count = sum(row[1] for row in rows)
+        return {
+            'destination': destination,
+            'resolution': resolution,
+            'start': start,
+            'end': end,
+            'count': count,
+            'mean_ccs': round(sum(row[2] for row in rows) / count, 2) if count else None,
+            'buckets': buckets
+        }
+
+
+def make_writer_from_env(db_path=USER_DB_PATH):
+    init_db(db_path)
+    return UserScoreWriter(
+        db_path,
+        max_batch=int(os.getenv("INGEST_BATCH_SIZE", "200")),
+        max_delay=float(os.getenv("INGEST_FLUSH_INTERVAL", "0.5"))
+    )
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from weather_app.cache import cache_key
+from app.concurrency import run_cpu
+from weather_app.columnar import COLUMNS
+from weather_app.metrics import metrics
+from weather_app.weather_api import fetch_columnar_weather_data
+from weather_app.plot_utils import HOURLY_GRAPHS, hourly_figure
+from weather_app.utils import (
+    calculate_climbing_conditions_score,
+    calculate_climbing_conditions_scores,
+    score_adapted
+)
+from weather_app.forecast import generate_daily_forecast
+from weather_app.windows import find_climbing_windows
+from weather_app.ranking import rank_destinations
+
+# Separate from the HTTP client's pool, whose threads the per-location fetches themselves use
+_fanout = ThreadPoolExecutor(max_workers=int(os.getenv("FANOUT_WORKERS", "8")), thread_name_prefix="fanout")
+
+
+def snapshot_version(model, current, forecast):
+    """Identifies one weather snapshot as scored by one model."""
+    h = hashlib.sha1(json.dumps(current, sort_keys=True).encode())
+    h.update(str(getattr(model, 'version', id(model))).encode())
+    for name in COLUMNS:
+        h.update(getattr(forecast, name).tobytes())
+    return h.hexdigest()[:20]
+
+
+def neutral_state(model, api_key, destination, lat, lon, cache=None):
+    """Fetch and score one destination in UTC; reused from ``cache`` while the snapshot is unchanged."""
+    current_data, adapted, _ = fetch_columnar_weather_data(api_key, lat, lon)
+
+    if not current_data or not adapted:
+        return None
+
+    version = snapshot_version(model, current_data, adapted)
+    key = f"neutral:{destination}:{version}"
+    entry = cache.get(key) if cache is not None else None
+    metrics.inc('ccs_cache_requests_total', cache='neutral', result='miss' if entry is None else 'hit')
+    if entry is not None:
+        return entry[0]
+
+    with metrics.stage("score"):
+        state = run_cpu(score_state, model, destination, version, current_data, adapted)
+    if cache is not None:
+        cache.set(key, state)
+    return state
+
+
+def score_state(model, destination, version, current_data, adapted):
+    temp = current_data['temp']
+    humidity = current_data['humidity']
+    dew_point = current_data['dew_point']
+    wind_speed = current_data['wind_speed']
+    wind_gust = current_data['wind_gust']
+    wind_direction = current_data['wind_direction']
+    score = round(calculate_climbing_conditions_score(model, dew_point, humidity, temp), 1)
+
+    # Score every forecast hour once and share the result with the forecast and all three plots
+    scores = score_adapted(model, adapted)
+
+    return {
+        'version': version,
+        'model': model,
+        'destination': destination,
+        'adapted': adapted,
+        'scores': scores,
+        'conditions': {
+            'climbing_conditions_score': score,
+            'current': {
+                'temp': temp,
+                'humidity': humidity,
+                'dew_point': dew_point,
+                'wind_speed': wind_speed,
+                'wind_gust': wind_gust,
+                'wind_direction': wind_direction
+            }
+        }
+    }
+
+
+def localize_state(state, tz_offset):
+    """Shift a neutral state to the client's local time and add the per-day forecast."""
+    tz_offset_sec = -tz_offset * 60  # 🟢 Subtract offset to shift to local time
+
+    # Shift forecast timestamps without mutating the cached columns
+    adapted = state['adapted'].shifted(tz_offset_sec)
+    with metrics.stage("daily_forecast"):
+        forecast = generate_daily_forecast(adapted, state['model'], state['scores'])
+
+    conditions = dict(state['conditions'], forecast=forecast)
+    return dict(state, adapted=adapted, conditions=conditions)
+
+
+def prepare_all_data(model, api_key, destination, lat, lon, tz_offset=0, cache=None):
+    """Fetch, score and shift one destination; returns the state every stage builds from, or None."""
+    state = neutral_state(model, api_key, destination, lat, lon, cache)
+    return localize_state(state, tz_offset) if state is not None else None
+
+
+def build_graph(state, name):
+    with metrics.stage(f"plot_{name}"):
+        return hourly_figure(name, state['model'], state['adapted'], state['destination'], state['scores'])
+
+
+def render_all_data(state):
+    return {
+        'conditions': state['conditions'],
+        'graphs': {name: build_graph(state, name) for name in HOURLY_GRAPHS}
+    }
+
+
+def build_all_data(model, api_key, destination, lat, lon, tz_offset=0, cache=None):
+    """Build the /all_data payload for one destination, or None if weather is unavailable."""
+    state = prepare_all_data(model, api_key, destination, lat, lon, tz_offset, cache)
+    return render_all_data(state) if state is not None else None
+
+
+def stream_all_data(model, api_key, destination, lat, lon, tz_offset=0, payload=None, cache=None):
+    """Yield the /all_data stages in order: conditions first, then one item per graph.
+
+    With a precomputed ``payload`` the stages are replayed from it.
+    """
+    if payload is not None:
+        yield {'stage': 'conditions', 'conditions': payload['conditions']}
+        for name, figure in payload['graphs'].items():
+            yield {'stage': 'graph', 'name': name, 'figure': figure}
+        return
+
+    state = prepare_all_data(model, api_key, destination, lat, lon, tz_offset, cache)
+    if state is None:
+        yield {'stage': 'error', 'error': 'Failed to fetch weather data'}
+        return
+    yield from stream_state(state)
+
+
+def stream_state(state):
+    """Yield the stages of one localized state, building each graph only when it is reached."""
+    yield {'stage': 'conditions', 'conditions': state['conditions']}
+    for name in HOURLY_GRAPHS:
+        yield {'stage': 'graph', 'name': name, 'figure': run_cpu(build_graph, state, name)}
+
+
+def fetch_forecasts(api_key, destinations):
+    """Columnar forecasts for many destinations, fetched once per distinct location."""
+    locations = {}
+    for name, (lat, lon) in destinations.items():
+        locations.setdefault(cache_key('location', lat, lon), (lat, lon, []))[2].append(name)
+
+    futures = {
+        key: _fanout.submit(fetch_columnar_weather_data, api_key, lat, lon)
+        for key, (lat, lon, _) in locations.items()
+    }
+
+    forecasts = {}
+    for key, (_, _, names) in locations.items():
+        _, forecast, _ = futures[key].result()
+        for name in names:
+            forecasts[name] = forecast
+    return forecasts
+
+
+def score_many(model, forecasts):
+    """Score every row of every forecast with one model call; returns name -> scores."""
+    names = [name for name, forecast in forecasts.items() if forecast is not None and len(forecast)]
+    if not names:
+        return {}
+
+    scores = calculate_climbing_conditions_scores(
+        model,
+        np.concatenate([forecasts[n].dew_point for n in names]),
+        np.concatenate([forecasts[n].humidity for n in names]),
+        np.concatenate([forecasts[n].temp for n in names])
+    )
+    splits = np.cumsum([len(forecasts[n]) for n in names])[:-1]
+    return dict(zip(names, np.split(scores, splits)))
+
+
+def build_windows(model, api_key, destinations, **criteria):
+    """Best climbing windows for each destination, scored in a single batch."""
+    forecasts = fetch_forecasts(api_key, destinations)
+    scores = score_many(model, forecasts)
+    return {
+        name: find_climbing_windows(forecasts[name], scores[name], **criteria) if name in scores else None
+        for name in destinations
+    }
+
+
+def build_ranking(model, api_key, destinations, **criteria):
+    """Rank destinations over a time window; every destination-hour is scored in one model call."""
+    forecasts = fetch_forecasts(api_key, destinations)
+    return run_cpu(lambda: rank_destinations(forecasts, score_many(model, forecasts), **criteria))
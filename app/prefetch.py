@@ -0,0 +1,184 @@
+import os
+import threading
+import time
+from weather_app.cache import MemoryCache, SQLiteCache
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def payload_key(destination, tz_offset):
+    return f"all_data:{destination}:{int(tz_offset)}"
+
+
+class RateLimiter:
+    """Token bucket allowing ``rate`` upstream calls per minute."""
+
+    def __init__(self, rate):
+        self.capacity = max(1.0, float(rate))
+        self.tokens = self.capacity
+        self.fill_rate = self.capacity / 60.0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n=1):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+                self.updated = now
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                wait = (n - self.tokens) / self.fill_rate
+            time.sleep(wait)
+
+
+def try_acquire_leader(lock_path):
+    """Take an exclusive, non-blocking lock file; returns the open handle or None.
+
+    Without flock (Windows, where there are no gunicorn workers to elect
+    between) the caller always leads.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(lock_path)), exist_ok=True)
+    handle = open(lock_path, 'a+')
+    try:
+        import fcntl
+    except ImportError:
+        return handle
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+class PrefetchScheduler:
+    """Keeps the precomputed /all_data payload of every destination warm.
+
+    Destinations are spread evenly over ``interval`` seconds so upstream load
+    is flat, and every refresh waits on a shared rate limit. Only the worker
+    holding the lock file refreshes; the others read what it writes to the
+    shared store and take over if the leader goes away.
+    """
+
+    def __init__(self, destinations, build_payload, store, interval=600, rate_limit=60,
+                 tz_offsets=(0,), lock_path=None, calls_per_refresh=2):
+        self.destinations = destinations
+        self.build_payload = build_payload
+        self.store = store
+        self.interval = interval
+        self.tz_offsets = tuple(tz_offsets)
+        self.lock_path = lock_path or os.path.join(DATA_DIR, 'prefetch.lock')
+        self.limiter = RateLimiter(rate_limit)
+        self.calls_per_refresh = calls_per_refresh
+        self.is_leader = False
+        self._lock_handle = None
+        self._status = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='prefetch', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self._lock_handle:
+            self._lock_handle.close()
+            self._lock_handle = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._lock_handle is None:
+                self._lock_handle = try_acquire_leader(self.lock_path)
+                self.is_leader = self._lock_handle is not None
+            if not self.is_leader:
+                self._stop.wait(min(self.interval, 60))
+                continue
+            self.run_cycle()
+
+    def run_cycle(self):
+        names = list(self.destinations)
+        spacing = self.interval / max(len(names), 1)
+        cycle_start = time.monotonic()
+        for i, name in enumerate(names):
+            delay = cycle_start + i * spacing - time.monotonic()
+            if delay > 0 and self._stop.wait(delay):
+                return
+            self.limiter.acquire(self.calls_per_refresh)
+            self.refresh(name)
+
+    def refresh(self, destination):
+        lat, lon = self.destinations[destination]
+        started = time.time()
+        try:
+            for tz_offset in self.tz_offsets:
+                payload = self.build_payload(destination, lat, lon, tz_offset)
+                if payload is None:
+                    raise RuntimeError('Failed to fetch weather data')
+                self.store.set(payload_key(destination, tz_offset), payload)
+            self._status[destination] = {'refreshed_at': started, 'error': None}
+        except Exception as e:
+            previous = self._status.get(destination, {})
+            self._status[destination] = {'refreshed_at': previous.get('refreshed_at'), 'error': str(e)}
+
+    def stored_at(self, destination, tz_offset, max_age):
+        """When the stored payload was built, if it is no older than ``max_age`` seconds; nothing is decoded."""
+        stored_at = self.store.stored_at(payload_key(destination, tz_offset))
+        if stored_at is None or time.time() - stored_at > max_age:
+            return None
+        return stored_at
+
+    def get_entry(self, destination, tz_offset, max_age):
+        """(payload, stored_at) if a payload no older than ``max_age`` seconds is stored."""
+        entry = self.store.get(payload_key(destination, tz_offset))
+        if entry is None or time.time() - entry[1] > max_age:
+            return None
+        return entry
+
+    def get(self, destination, tz_offset, max_age):
+        entry = self.get_entry(destination, tz_offset, max_age)
+        return entry[0] if entry is not None else None
+
+    def status(self):
+        now = time.time()
+        destinations = {}
+        for name in self.destinations:
+            stored_at = self.store.stored_at(payload_key(name, self.tz_offsets[0]))
+            state = self._status.get(name, {})
+            destinations[name] = {
+                'age_seconds': round(now - stored_at, 1) if stored_at is not None else None,
+                'error': state.get('error')
+            }
+        ages = [d['age_seconds'] for d in destinations.values() if d['age_seconds'] is not None]
+        return {
+            'leader': self.is_leader,
+            'interval_seconds': self.interval,
+            'warm': len(ages),
+            'total': len(destinations),
+            'max_age_seconds': max(ages) if ages else None,
+            'destinations': destinations
+        }
+
+
+def make_scheduler_from_env(destinations, build_payload):
+    # SQLite lets every gunicorn worker read what the leader precomputes
+    if os.getenv("PREFETCH_STORE", "sqlite") == "memory":
+        store = MemoryCache(max_entries=4096)
+    else:
+        store = SQLiteCache(os.getenv("PREFETCH_STORE_PATH", os.path.join(DATA_DIR, 'prefetch_cache.sqlite')))
+
+    offsets = [int(v) for v in os.getenv("PREFETCH_TZ_OFFSETS", "240,300,360,420,480").split(',') if v.strip()]
+    return PrefetchScheduler(
+        destinations,
+        build_payload,
+        store,
+        interval=int(os.getenv("PREFETCH_INTERVAL", "600")),
+        rate_limit=int(os.getenv("PREFETCH_RATE_LIMIT", "60")),
+        tz_offsets=offsets or [0],
+        lock_path=os.getenv("PREFETCH_LOCK_PATH")
+    )
@@ -0,0 +1,71 @@
+"""Import-time breakdown per module and time to first request, measured in a fresh interpreter.
+
+    python -m app.profile_startup [--top 20]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+def parse_importtime(stderr):
+    """(module, self_us, cumulative_us, depth) rows from ``python -X importtime`` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us), (len(name) - len(name.lstrip())) // 2))
+    return rows
+
+
+PROFILE_SCRIPT = '''
+import json, time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+app = create_app(background=False)
+t2 = time.perf_counter()
+app.test_client().get('/')
+t3 = time.perf_counter()
+print(json.dumps({'import app': t1 - t0, 'create_app': t2 - t1, 'first request': t3 - t2, 'total': t3 - t0}))
+'''
+
+
+def profile_startup():
+    """Boot the app in a fresh interpreter; returns (phase seconds, import rows)."""
+    env = dict(os.environ, CCS_PROFILE_STARTUP='1')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROFILE_SCRIPT],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env, capture_output=True, text=True, check=True
+    )
+    phases = json.loads(result.stdout.strip().splitlines()[-1])
+    return phases, parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    phases, rows = profile_startup()
+    for name, seconds in phases.items():
+        print(f"{name:<16}{seconds * 1000:>10.0f} ms")
+
+    packages = {}
+    for name, self_us, _, _ in rows:
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + self_us
+    print(f"\n{'package (self time)':<40}{'ms':>10}")
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<40}{self_us / 1000:>10.1f}")
+
+    print(f"\n{'module (cumulative)':<40}{'ms':>10}")
+    for name, _, cumulative_us, _ in sorted(rows, key=lambda row: -row[2])[:args.top]:
+        print(f"{name:<40}{cumulative_us / 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+import importlib
+import os
+import threading
+import time
+from collections import deque
+import numpy as np
+from app.concurrency import native_lock, start_native_thread
+from app.compiled_model import compiled_model_path, get_or_compile_model, load_compiled_model
+from app.retrain import ModelHolder, POINTER_PATH
+from app.score_surface import get_or_build_surface
+
+# Training module for every model name; each exposes get_or_train_model and MODEL_PATH
+MODEL_MODULES = {
+    'rf': 'app.train_rf',
+    'dt': 'app.train_dt'
+}
+
+# Only the random forest is retrained (app/retrain.py), so only it follows the version pointer
+RETRAINED_MODEL = 'rf'
+
+LATENCY_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, float('inf'))
+DIFF_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, float('inf'))
+
+
+def serving_model(model, source):
+    """Optionally answer scores from a precomputed (temp, humidity) table."""
+    if os.getenv("CCS_SCORE_SURFACE", "0") == "1":
+        try:
+            return get_or_build_surface(
+                model,
+                source,
+                step=float(os.getenv("CCS_SURFACE_STEP", "0.5")),
+                interpolate=os.getenv("CCS_SURFACE_INTERPOLATE", "0") == "1",
+                max_error=float(os.getenv("CCS_SURFACE_MAX_ERROR", "0.05"))
+            )
+        except ValueError as e:
+            print(f"Score surface disabled: {e}")
+    return model
+
+
+def load_named_model(name):
+    """Build the serving model for a registered name; the compiled form skips sklearn's per-call overhead."""
+    module = importlib.import_module(MODEL_MODULES[name])
+    if os.getenv("CCS_COMPILED_MODEL", "1") == "1":
+        model = get_or_compile_model(module.get_or_train_model, module.MODEL_PATH)
+        source = compiled_model_path(module.MODEL_PATH)
+    else:
+        model = module.get_or_train_model()
+        source = module.MODEL_PATH
+    return serving_model(model, source)
+
+
+class Histogram:
+    """Counts per bucket (upper bounds) plus count, sum and max; not thread-safe on its own."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = np.zeros(len(buckets), dtype=np.int64)
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, values):
+        values = np.atleast_1d(np.asarray(values, dtype=float))
+        self.counts += np.bincount(np.searchsorted(self.buckets, values), minlength=len(self.buckets))
+        self.n += len(values)
+        self.total += float(values.sum())
+        self.max = max(self.max, float(values.max())) if len(values) else self.max
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile."""
+        if not self.n:
+            return None
+        return self.buckets[int(np.searchsorted(np.cumsum(self.counts), q * self.n))]
+
+    def summary(self):
+        def bound(b):
+            return None if b is None else ('+Inf' if b == float('inf') else b)  # JSON has no infinity
+
+        return {
+            'count': self.n,
+            'mean': round(self.total / self.n, 4) if self.n else None,
+            'max': round(self.max, 4),
+            'p50': bound(self.quantile(0.5)),
+            'p99': bound(self.quantile(0.99)),
+            'buckets': [[bound(b), int(c)] for b, c in zip(self.buckets, self.counts)]
+        }
+
+
+class ModelStats:
+    """Per-model predict latency and per-(primary, shadow) score differences."""
+
+    def __init__(self):
+        self._lock = native_lock()  # recorded from run_cpu's pool threads as well as requests
+        self.latency = {}
+        self.rows = {}
+        self.diffs = {}
+        self.signed = {}
+
+    def record_latency(self, name, seconds, rows):
+        with self._lock:
+            self.latency.setdefault(name, Histogram(LATENCY_BUCKETS_MS)).add(seconds * 1000)
+            self.rows[name] = self.rows.get(name, 0) + rows
+
+    def record_diff(self, primary, shadow, diff):
+        key = f"{shadow}-{primary}"
+        with self._lock:
+            self.diffs.setdefault(key, Histogram(DIFF_BUCKETS)).add(np.abs(diff))
+            self.signed[key] = self.signed.get(key, 0.0) + float(np.sum(diff))
+
+    def summary(self):
+        with self._lock:
+            return {
+                'latency_ms': {
+                    name: dict(hist.summary(), rows=self.rows[name]) for name, hist in self.latency.items()
+                },
+                'score_diff': {
+                    key: dict(hist.summary(), mean_signed=round(self.signed[key] / hist.n, 4) if hist.n else None)
+                    for key, hist in self.diffs.items()
+                }
+            }
+
+
+class TimedModel:
+    """Wraps a model to record predict latency and hand each batch to the shadow scorer."""
+
+    def __init__(self, model, name, registry):
+        self.model = model
+        self.name = name
+        self.registry = registry
+        self.version = getattr(model, 'version', name)
+
+    def predict(self, X):
+        start = time.perf_counter()
+        scores = self.model.predict(X)
+        self.registry.stats.record_latency(self.name, time.perf_counter() - start, len(X))
+        self.registry.shadow_score(self.name, X, scores)
+        return scores
+
+    def __getattr__(self, attr):
+        return getattr(self.model, attr)
+
+
+class ModelRegistry:
+    """Named CCS models, each loaded on first use and kept behind a ModelHolder.
+
+    ``get(name)`` returns the named model, or the default one. With a
+    ``shadow`` model, every batch the default model scores is scored again by
+    the shadow model on a background thread and the differences are
+    recorded; batches are dropped rather than queued when it falls behind.
+    The hand-off only takes a native lock and the shadow thread is a real
+    OS thread, since under gevent the default model scores inside run_cpu.
+    """
+
+    def __init__(self, default, load=load_named_model, names=tuple(MODEL_MODULES), shadow=None,
+                 pointer_path=POINTER_PATH, poll_interval=30, max_shadow_pending=64):
+        self.default = default
+        self.load = load
+        self.names = tuple(names)
+        self.shadow = shadow
+        self.pointer_path = pointer_path
+        self.poll_interval = poll_interval
+        self.max_shadow_pending = max_shadow_pending
+        self.stats = ModelStats()
+        self.shadow_dropped = 0
+        self._holders = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._shadow_jobs = deque()
+        self._shadow_pending = 0
+        self._shadow_idle = True
+        self._shadow_started = False
+        self._shadow_lock = native_lock()  # separate: models warm up (and shadow) while _lock is held
+        self._shadow_wake = native_lock()  # released when jobs arrive for an idle shadow thread
+        self._shadow_wake.acquire()
+        for name in (default, shadow):
+            if name is not None and name not in self.names:
+                raise ValueError(f"Unknown model '{name}'; expected one of {', '.join(self.names)}")
+
+    def holder(self, name=None):
+        name = name or self.default
+        if name not in self.names:
+            raise KeyError(name)
+        holder = self._holders.get(name)
+        if holder is None:
+            with self._lock:
+                holder = self._holders.get(name)
+                if holder is None:
+                    holder = self._load_holder(name)
+                    self._holders[name] = holder
+        return holder
+
+    def _load_holder(self, name):
+        start = time.perf_counter()
+        holder = ModelHolder(
+            TimedModel(self.load(name), name, self),
+            lambda path, version: TimedModel(serving_model(load_compiled_model(path), path), name, self),
+            pointer_path=self.pointer_path if name == RETRAINED_MODEL else None
+        )
+        holder.poll()
+        print(f"Model '{name}' loaded in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return holder
+
+    def get(self, name=None):
+        return self.holder(name).get()
+
+    def shadow_score(self, name, X, scores):
+        if self.shadow is None or name != self.default or self.shadow == name:
+            return
+        job = (name, np.array(X, dtype=float), np.asarray(scores, dtype=float))
+        with self._shadow_lock:
+            if self._shadow_pending >= self.max_shadow_pending:
+                self.shadow_dropped += 1
+                return
+            self._shadow_pending += 1
+            self._shadow_jobs.append(job)
+            if not self._shadow_started:
+                self._shadow_started = True
+                start_native_thread(self._run_shadow)
+            if self._shadow_idle:
+                self._shadow_idle = False
+                self._shadow_wake.release()
+
+    def _run_shadow(self):
+        while True:
+            self._shadow_wake.acquire()
+            while True:
+                with self._shadow_lock:
+                    if not self._shadow_jobs:
+                        self._shadow_idle = True
+                        break
+                    job = self._shadow_jobs.popleft()
+                self._score_shadow(*job)
+
+    def _score_shadow(self, name, X, scores):
+        try:
+            shadow_scores = self.get(self.shadow).predict(X)
+            self.stats.record_diff(name, self.shadow, np.asarray(shadow_scores, dtype=float) - scores)
+        except Exception as e:
+            print(f"Shadow scoring with '{self.shadow}' failed: {e}")
+        finally:
+            with self._shadow_lock:
+                self._shadow_pending -= 1
+
+    def status(self):
+        return {
+            'default': self.default,
+            'shadow': self.shadow,
+            'available': list(self.names),
+            'loaded': {name: holder.get().version for name, holder in self._holders.items()},
+            'shadow_dropped': self.shadow_dropped,
+            **self.stats.summary()
+        }
+
+    def start(self):
+        """Poll every loaded model for newly published versions."""
+        self._thread = threading.Thread(target=self._run, name='model-poll', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            for holder in list(self._holders.values()):
+                holder.poll()
+
+
+def make_registry_from_env(**kwargs):
+    registry = ModelRegistry(
+        default=os.getenv("CCS_MODEL", "rf"),
+        shadow=os.getenv("CCS_SHADOW_MODEL") or None,
+        poll_interval=float(os.getenv("MODEL_POLL_INTERVAL", "30")),
+        **kwargs
+    )
+    registry.holder()
+    if registry.shadow:
+        registry.holder(registry.shadow)
+    return registry
@@ -0,0 +1,36 @@
+import gzip
+import hashlib
+import json
+from flask import Response, request
+
+
+class EncodedResponse:
+    """A JSON body encoded once, gzipped once, with a strong ETag per representation."""
+
+    __slots__ = ('body', 'gzipped', 'etag')
+
+    def __init__(self, payload, level=9):
+        self.body = json.dumps(payload, separators=(',', ':')).encode()
+        self.gzipped = gzip.compress(self.body, compresslevel=level, mtime=0)
+        self.etag = hashlib.sha1(self.body).hexdigest()
+
+
+def send_encoded(encoded, max_age=0):
+    """Serve an EncodedResponse, answering 304 when the client already holds it."""
+    use_gzip = request.accept_encodings['gzip'] > 0
+    # Strong validators must differ between the gzip and identity representations
+    etag = f"{encoded.etag}-gz" if use_gzip else encoded.etag
+    headers = {
+        'ETag': f'"{etag}"',
+        'Vary': 'Accept-Encoding',
+        'Cache-Control': f'private, max-age={max_age}, must-revalidate'
+    }
+
+    # If-None-Match uses weak comparison, so proxies that weaken the tag still revalidate
+    if request.if_none_match.contains_weak(etag) or request.if_none_match.contains_weak(encoded.etag):
+        return Response(status=304, headers=headers)
+
+    if use_gzip:
+        headers['Content-Encoding'] = 'gzip'
+        return Response(encoded.gzipped, mimetype='application/json', headers=headers)
+    return Response(encoded.body, mimetype='application/json', headers=headers)
@@ -0,0 +1,297 @@
+"""Retrain the CCS model on the base data plus user submissions, off the request path.
+
+    python -m app.retrain [--force]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from app.compiled_model import compile_model, load_compiled_model, save_compiled_model
+from app.ingest import USER_DB_PATH
+from app.prefetch import try_acquire_leader
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), 'model')
+VERSIONS_DIR = os.path.join(MODEL_DIR, 'versions')
+POINTER_PATH = os.path.join(VERSIONS_DIR, 'CURRENT')
+LOCK_PATH = os.path.join(os.path.dirname(__file__), 'data', 'retrain.lock')
+
+
+def training_pool():
+    """One spawned training process; forking a threaded gunicorn worker can copy held locks."""
+    return ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+
+
+def artifact_path(version, versions_dir=VERSIONS_DIR):
+    return os.path.join(versions_dir, f'{version}.compiled')
+
+
+def metadata_path(version, versions_dir=VERSIONS_DIR):
+    return os.path.join(versions_dir, f'{version}.json')
+
+
+def read_pointer(pointer_path=POINTER_PATH):
+    try:
+        with open(pointer_path) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def write_pointer(version, pointer_path=POINTER_PATH):
+    """Point every worker at ``version``; readers see the old or the new file, never a partial one."""
+    tmp = f'{pointer_path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        f.write(version)
+    os.replace(tmp, pointer_path)
+
+
+def read_metadata(version, versions_dir=VERSIONS_DIR):
+    try:
+        with open(metadata_path(version, versions_dir)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def load_user_scores(db_path=USER_DB_PATH):
+    """(id, temperature, humidity, ccs) rows from user submissions and the highest row id seen."""
+    if not os.path.exists(db_path):
+        return [], 0
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute('''
+            SELECT id, temperature, humidity, ccs FROM user_scores
+            WHERE temperature IS NOT NULL AND humidity IS NOT NULL AND ccs IS NOT NULL
+            ORDER BY id
+        ''').fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    finally:
+        conn.close()
+    return rows, (rows[-1][0] if rows else 0)
+
+
+def split(data, test_size=0.2, random_state=42):
+    """Same split as the training scripts, so the base holdout is never trained on."""
+    from sklearn.model_selection import train_test_split
+
+    data = np.asarray(data, dtype=float).reshape(-1, 3)
+    if len(data) < 2:
+        return data, data[:0]
+    return train_test_split(data, test_size=test_size, random_state=random_state)
+
+
+def mse(model, rows):
+    """Mean squared error over (temperature, humidity, ccs) rows."""
+    return float(np.mean((model.predict(rows[:, :2]) - rows[:, 2]) ** 2))
+
+
+def train_candidate(base_data, user_seen, user_new, version, current_path=None, tolerance=0.05,
+                    versions_dir=VERSIONS_DIR, n_estimators=100, n_jobs=1):
+    """Fit on the merged training split and validate on the merged holdout.
+
+    ``user_seen`` are submissions up to the current model's training cutoff,
+    which it may have trained on, so they only ever go to training. The
+    holdout is the base holdout plus a split of ``user_new``: rows neither
+    model has seen, so the comparison doesn't favour the current one.
+
+    Runs in a worker process. The candidate is written as a versioned compiled
+    artifact and accepted if its holdout MSE is within ``tolerance`` of the
+    current model's (or there is no current model). ``n_jobs`` defaults to one
+    core so a refit on the serving host doesn't compete with request threads.
+    """
+    from sklearn.ensemble import RandomForestRegressor
+
+    base_train, base_test = split(base_data)
+    new_train, new_test = split(user_new)
+    user_seen = np.asarray(user_seen, dtype=float).reshape(-1, 3)
+    train, holdout = np.vstack((base_train, user_seen, new_train)), np.vstack((base_test, new_test))
+
+    rf = RandomForestRegressor(n_estimators=n_estimators, random_state=42, n_jobs=n_jobs)
+    rf.fit(train[:, :2], train[:, 2])
+    candidate = compile_model(rf)
+
+    current = load_compiled_model(current_path) if current_path else None
+    candidate_mse = mse(candidate, holdout)
+    current_mse = mse(current, holdout) if current is not None else None
+    y = holdout[:, 2]
+    r2 = 1 - candidate_mse * len(y) / (float(np.sum((y - y.mean()) ** 2)) or 1.0)
+
+    accepted = current_mse is None or candidate_mse <= current_mse * (1 + tolerance)
+    if accepted:
+        save_compiled_model(candidate, artifact_path(version, versions_dir))
+    return {
+        'version': version,
+        'accepted': accepted,
+        'mse': round(candidate_mse, 4),
+        'r2': round(r2, 4),
+        'current_mse': None if current_mse is None else round(current_mse, 4),
+        'train_rows': len(train),
+        'holdout_rows': len(holdout),
+        'user_rows': len(user_seen) + len(new_train) + len(new_test),
+        'new_user_rows': len(new_train) + len(new_test)
+    }
+
+
+def retrain_once(load_base_data, base_model_path, user_db_path=USER_DB_PATH, versions_dir=VERSIONS_DIR,
+                 pointer_path=POINTER_PATH, min_new_rows=50, tolerance=0.05, executor=None, force=False, n_jobs=1):
+    """Retrain if enough new submissions arrived since the current version; returns the report or None."""
+    current_version = read_pointer(pointer_path)
+    seen = read_metadata(current_version, versions_dir).get('user_max_id', 0) if current_version else 0
+    user_rows, user_max_id = load_user_scores(user_db_path)
+    if not force and user_max_id - seen < min_new_rows:
+        return None
+    user_rows = np.asarray(user_rows, dtype=float).reshape(-1, 4)
+    new = user_rows[:, 0] > seen
+
+    os.makedirs(versions_dir, exist_ok=True)
+    now = time.time()
+    version = time.strftime('%Y%m%d-%H%M%S', time.gmtime(now)) + f'-{int(now * 1000) % 1000:03d}'
+    current_path = artifact_path(current_version, versions_dir) if current_version else base_model_path
+    args = (load_base_data(), user_rows[~new, 1:], user_rows[new, 1:], version, current_path, tolerance, versions_dir)
+    start = time.monotonic()
+    if executor:
+        report = executor.submit(train_candidate, *args, n_jobs=n_jobs).result()
+    else:
+        report = train_candidate(*args, n_jobs=n_jobs)
+    report['train_seconds'] = round(time.monotonic() - start, 1)
+    report['user_max_id'] = user_max_id
+    report['previous'] = current_version
+
+    if report['accepted']:
+        with open(metadata_path(version, versions_dir), 'w') as f:
+            json.dump(report, f, indent=2)
+        write_pointer(version, pointer_path)
+    print(f"Retrain {version}: {'accepted' if report['accepted'] else 'rejected'} "
+          f"(MSE {report['mse']}, current {report['current_mse']}, {report['user_rows']} user rows, "
+          f"{report['new_user_rows']} new)")
+    return report
+
+
+class RetrainScheduler:
+    """Periodically retrains in a separate process from whichever worker holds the lock file."""
+
+    def __init__(self, load_base_data, base_model_path, interval=21600, min_new_rows=50, tolerance=0.05,
+                 lock_path=LOCK_PATH, n_jobs=1, **paths):
+        self.load_base_data = load_base_data
+        self.base_model_path = base_model_path
+        self.interval = interval
+        self.min_new_rows = min_new_rows
+        self.tolerance = tolerance
+        self.lock_path = lock_path
+        self.n_jobs = n_jobs
+        self.paths = paths
+        self.last_report = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_handle = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='retrain', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self._lock_handle:
+            self._lock_handle.close()
+            self._lock_handle = None
+
+    def _run(self):
+        with training_pool() as executor:
+            while not self._stop.wait(self.interval):
+                if self._lock_handle is None:
+                    self._lock_handle = try_acquire_leader(self.lock_path)
+                if self._lock_handle is None:
+                    continue
+                try:
+                    self.last_report = retrain_once(
+                        self.load_base_data, self.base_model_path, min_new_rows=self.min_new_rows,
+                        tolerance=self.tolerance, executor=executor, n_jobs=self.n_jobs, **self.paths
+                    ) or self.last_report
+                except Exception as e:
+                    print(f"Retrain failed: {e}")
+
+
+class ModelHolder:
+    """The model requests score with, swapped in place when a new version is published.
+
+    ``load(path, version)`` builds the serving model for an artifact. New
+    versions are loaded and warmed up on the polling thread and then published
+    with a single reference assignment, so requests never wait on a swap.
+    """
+
+    def __init__(self, initial, load, pointer_path=POINTER_PATH, versions_dir=VERSIONS_DIR, poll_interval=30):
+        self._model = initial
+        self.load = load
+        self.pointer_path = pointer_path
+        self.versions_dir = versions_dir
+        self.poll_interval = poll_interval
+        self.version = getattr(initial, 'version', None)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def get(self):
+        return self._model
+
+    def poll(self):
+        """Swap to the published version if it changed; returns True on a swap."""
+        if self.pointer_path is None:
+            return False
+        version = read_pointer(self.pointer_path)
+        if version is None or version == self.version:
+            return False
+        try:
+            model = self.load(artifact_path(version, self.versions_dir), version)
+            model.predict(np.array([[60.0, 40.0]]))  # warm up before serving
+        except Exception as e:
+            print(f"Model {version} not loaded: {e}")
+            return False
+        model.version = version
+        self._model = model
+        self.version = version
+        print(f"Serving model version {version}")
+        return True
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='model-poll', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            self.poll()
+
+
+def main():
+    from app.train_rf import MODEL_PATH, load_training_data
+    from app.compiled_model import compiled_model_path
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--force', action='store_true', help='retrain even without new submissions')
+    parser.add_argument('--tolerance', type=float, default=float(os.getenv("RETRAIN_TOLERANCE", "0.05")))
+    parser.add_argument('--jobs', type=int, default=int(os.getenv("RETRAIN_JOBS", "1")),
+                        help='cores the forest is fitted on (-1 for all)')
+    args = parser.parse_args()
+
+    with training_pool() as executor:
+        report = retrain_once(load_training_data, compiled_model_path(MODEL_PATH),
+                              min_new_rows=int(os.getenv("RETRAIN_MIN_NEW_ROWS", "50")),
+                              tolerance=args.tolerance, executor=executor, force=args.force, n_jobs=args.jobs)
+    print(json.dumps(report, indent=2) if report else "Not enough new submissions to retrain")
+
+
+if __name__ == '__main__':
+    main()
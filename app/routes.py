@@ -1,88 +1,49 @@
-from flask import Blueprint, render_template, request, jsonify
-from weather_app.weather_api import fetch_hourly_weather_data
-from weather_app.plot_utils import (
-    plot_hourly_climbing_scores,
-    plot_hourly_temp,
-    plot_hourly_humidity
+from flask import Blueprint, Response, abort, current_app, jsonify, make_response, render_template, request
+from weather_app.historical import fetch_past_day, recent_hours
+from app.pipeline import (
+    build_ranking,
+    build_windows,
+    localize_state,
+    neutral_state,
+    render_all_data,
+    stream_all_data,
+    stream_state
 )
-from weather_app.utils import calculate_climbing_conditions_score
-from weather_app.forecast import generate_daily_forecast
-from app import model
+from app.responses import EncodedResponse, send_encoded
+from app.concurrency import run_cpu
+from app.ingest import parse_submission
+from app.crags import load_catalog_from_env
+from weather_app.ranking import RANK_BY
+from weather_app.columnar import COLUMNS
+from weather_app.metrics import metrics
+import json
 import os
-import sqlite3
-from datetime import datetime, timedelta, timezone
-import requests
-from dateutil import parser
+from datetime import datetime, timezone
 
 main = Blueprint('main', __name__)
 
+
+def current_model():
+    """The model to score this request with: ``?model=<name>`` or the configured default.
+
+    It may be swapped for a retrained version between requests.
+    """
+    registry = current_app.extensions['models']
+    name = request.args.get('model') or None
+    if name is not None and name not in registry.names:
+        abort(make_response(jsonify({'error': f"Unknown model '{name}'", 'available': list(registry.names)}), 400))
+    return registry.get(name)
+
+
+def default_model_requested():
+    """Precomputed payloads are only scored with the default model."""
+    return request.args.get('model') in (None, '', current_app.extensions['models'].default)
+
+
 API_KEY = os.getenv("OPENWEATHER_API_KEY")
 
-CLIMBING_DESTINATIONS = {
-    "Bishop, CA": (35.3023, -120.6944),
-    "Black Canyon of the Gunnison, CO": (38.5791, -107.7276),
-    "Boone, NC": (36.2164, -81.6747),
-    "Broughton Bluff, OR": (45.5311, -122.3782),
-    "Castle Rock State Park, CA": (37.2324, -122.1535),
-    "Chattanooga, TN": (35.0456, -85.3097),
-    "City of Rocks SP, NM": (32.5900, -107.9758),
-    "City of Rocks, ID": (42.0699, -113.7124),
-    "Clear Creek Canyon, CO": (39.7402, -105.2488),
-    "Cochise Stronghold, AZ": (31.9022, -109.9770),
-    "Currahee Mountain, GA": (34.5620, -83.3726),
-    "Devil's Lake, WI": (43.4194, -89.7372),
-    "Devils Tower National Monument, WY": (44.5902, -104.7146),
-    "Eldorado Canyon, CO": (39.9313, -105.2832),
-    "Enchanted Rock State Park, NM": (32.5900, -107.9758),
-    "Enchanted Rock, TX": (30.5032, -98.8190),
-    "Flagstaff, AZ": (35.1983, -111.6513),
-    "Foster Falls, TN": (35.1756, -85.6401),
-    "Frenchman Coulee (Vantage), WA": (47.02735, -120.00089),
-    "Grand Ledge, MI": (42.7548, -84.7466),
-    "Horse Pens 40, AL": (33.9320, -86.3239),
-    "Hueco Tanks State Historic Site, TX": (31.9790, -106.0350),
-    "Indian Creek, UT": (38.0371, -109.5481),
-    "Index Town Walls, WA": (47.8222, -121.5548),
-    "Joshua Tree National Park, CA": (33.8819, -115.9007),
-    "Laurel Knob, NC": (35.1372, -82.9617),
-    "Lander, WY": (42.8330, -108.7281),
-    "Leavenworth, WA": (47.5965, -120.6610),
-    "Linville Gorge, NC": (35.8903, -81.8976),
-    "Little Cottonwood Canyon, UT": (40.6041, -111.6540),
-    "Looking Glass Rock, NC": (35.2300, -82.8438),
-    "Lost Wall, GA": (34.5958, -85.3585),
-    "Lover's Leap, CA": (38.8234, -120.1414),
-    "Maple Canyon, UT": (39.6539, -111.8631),
-    "Mt. Erie, WA": (48.4206, -122.6435),
-    "Mt. Lemmon, AZ": (32.4425, -110.7882),
-    "New River Gorge National Park, WV": (37.9645, -81.0901),
-    "Obed Wild & Scenic River, TN": (36.0968, -84.6890),
-    "Red River Gorge, KY": (37.8339, -83.6078),
-    "Red Rock Canyon, NV": (36.1566, -115.4451),
-    "Red Wing, MN": (44.5667, -92.5333),
-    "Reimers Ranch, TX": (30.3419, -98.1145),
-    "Rifle Mountain Park, CO": (39.5368, -107.7879),
-    "Rocky Mountain National Park, CO": (40.3428, -105.6836),
-    "Rumbling Bald, NC": (35.4552, -82.2345),
-    "Rumney, NH": (43.9850, -71.7164),
-    "Sandia Mountains, NM": (35.2090, -106.4442),
-    "Shawangunks, NY": (41.7090, -74.1319),
-    "Shelf Road, CO": (38.6183, -105.1962),
-    "Smith Rock State Park, OR": (44.3263, -121.1319),
-    "Spearfish Canyon, SD": (44.3697, -103.9064),
-    "Stone Fort (Little Rock City), TN": (35.2026, -85.2369),
-    "Tacoma, WA": (47.2529, -122.4443),
-    "Tahquitz Rock / Suicide Rock, CA": (33.7602, -116.6832),
-    "Ten Sleep Canyon, WY": (44.0951, -107.4026),
-    "The Needles, CA": (36.9964, -118.6000),
-    "Unaweep Canyon, CO": (38.7850, -108.6970),
-    "Vedauwoo, WY": (41.1522, -105.3757),
-    "Wichita Mountains, OK": (34.7233, -98.6119),
-    "Wild Iris, WY": (42.6631, -108.7403),
-    "Winslow Wall, AZ": (34.7397, -111.1345),
-    "Yosemite National Park, CA": (37.8393, -119.5165),
-    "Zion National Park, UT": (37.2978, -113.0288)
-}
+# Crag catalog (app/data/crags.csv, or CRAGS_PATH); a read-only name -> (lat, lon) mapping
+CLIMBING_DESTINATIONS = load_catalog_from_env()
 
 @main.route('/')
 def index():
@@ -92,61 +53,257 @@ def index():
 def all_data():
     destination = request.args.get('destination', '')
     tz_offset = int(request.args.get('tz_offset', default=0, type=int))  # in minutes
-    tz_offset_sec = -tz_offset * 60  # 🟢 Subtract offset to shift to local time
 
     if destination not in CLIMBING_DESTINATIONS:
         return jsonify({'error': 'Invalid destination'}), 400
 
     lat, lon = CLIMBING_DESTINATIONS[destination]
-    current_data, adapted, daily_v3 = fetch_hourly_weather_data(API_KEY, lat, lon)
-
-    if not current_data or not adapted:
-        return jsonify({'error': 'Failed to fetch weather data'}), 500
-
-    # Shift current time
-    if 'dt' in current_data:
-        current_data['dt'] += tz_offset_sec
-
-    # Shift adapted forecast entries
-    for entry in adapted:
-        if 'dt' in entry:
-            entry['dt'] += tz_offset_sec
-
-    # Shift daily forecast entries
-    if daily_v3:
-        for entry in daily_v3:
-            if 'dt' in entry:
-                entry['dt'] += tz_offset_sec
-
-    temp = current_data['temp']
-    humidity = current_data['humidity']
-    dew_point = current_data['dew_point']
-    wind_speed = current_data['wind_speed']
-    wind_gust = current_data['wind_gust']
-    wind_direction = current_data['wind_direction']
-    score = round(calculate_climbing_conditions_score(model, dew_point, humidity, temp), 1)
-
-    forecast = generate_daily_forecast(adapted, model)
-
-    return jsonify({
-        'conditions': {
-            'climbing_conditions_score': score,
-            'current': {
-                'temp': temp,
-                'humidity': humidity,
-                'dew_point': dew_point,
-                'wind_speed': wind_speed,
-                'wind_gust': wind_gust,
-                'wind_direction': wind_direction
-            },
-            'forecast': forecast
-        },
-        'graphs': {
-            'ccs': plot_hourly_climbing_scores(model, adapted, destination).to_json(),
-            'temperature': plot_hourly_temp(model, adapted, destination).to_json(),
-            'humidity': plot_hourly_humidity(model, adapted, destination).to_json()
-        }
-    })
+    max_age = int(os.getenv("RESPONSE_MAX_AGE", "0"))
+    scheduler = current_app.extensions.get('prefetch') if default_model_requested() else None
+
+    # Serve the precomputed payload when the prefetch scheduler has a fresh one
+    if scheduler is not None:
+        encoded = _prefetched(scheduler, destination, tz_offset, scheduler.interval * 2)
+        if encoded is not None:
+            return send_encoded(encoded, max_age)
+
+    # Weather comes from its cache; scores are reused while the snapshot version is unchanged
+    state = neutral_state(current_model(), API_KEY, destination, lat, lon, current_app.extensions['neutral_cache'])
+    if state is None:
+        # Upstream is down: an old precomputed payload beats an error
+        encoded = _prefetched(scheduler, destination, tz_offset, float('inf')) if scheduler is not None else None
+        if encoded is None:
+            return jsonify({'error': 'Failed to fetch weather data'}), 500
+        return send_encoded(encoded)
+
+    # The neutral state is shared by every offset; only the shifted, encoded bytes are kept per offset
+    key = f"all_data:{destination}:{state['version']}:{tz_offset}"
+    encoded = _encoded(key, lambda: current_app.extensions['coalescer'].do(
+        key, lambda: run_cpu(lambda: render_all_data(localize_state(state, tz_offset)))
+    ))
+    return send_encoded(encoded, max_age)
+
+def _prefetched(scheduler, destination, tz_offset, max_age):
+    """The stored payload, encoded; it is only read and decoded when its encoding isn't cached."""
+    stored_at = scheduler.stored_at(destination, tz_offset, max_age)
+    if stored_at is None:
+        return None
+    return _encoded(f"prefetch:{destination}:{tz_offset}:{stored_at}",
+                    lambda: scheduler.get(destination, tz_offset, float('inf')))
+
+def _encoded(key, build_payload):
+    responses = current_app.extensions['response_cache']
+    entry = responses.get(key)
+    metrics.inc('ccs_cache_requests_total', cache='response', result='miss' if entry is None else 'hit')
+    if entry is not None:
+        return entry[0]
+    level = current_app.config['RESPONSE_GZIP_LEVEL']
+
+    def build():
+        entry = responses.get(key)  # stored by a build that finished just after this request missed
+        if entry is not None:
+            return entry[0]
+        payload = build_payload()
+        with metrics.stage("encode"):
+            encoded = run_cpu(EncodedResponse, payload, level)
+        responses.set(key, encoded)
+        return encoded
+
+    # Concurrent misses in this worker share one build and one gzip encode
+    return current_app.extensions['response_flight'].do(key, build)
+
+@main.route('/all_data/stream')
+def all_data_stream():
+    destination = request.args.get('destination', '')
+    tz_offset = int(request.args.get('tz_offset', default=0, type=int))  # in minutes
+
+    if destination not in CLIMBING_DESTINATIONS:
+        return jsonify({'error': 'Invalid destination'}), 400
+
+    stored_at = None
+    scheduler = current_app.extensions.get('prefetch') if default_model_requested() else None
+    if scheduler is not None:
+        stored_at = scheduler.stored_at(destination, tz_offset, scheduler.interval * 2)
+
+    # One JSON document per line: conditions first, then each graph as soon as it is built
+    lat, lon = CLIMBING_DESTINATIONS[destination]
+    if stored_at is not None:
+        # The precomputed payload is only read and decoded when its lines aren't cached yet
+        key = f"stream:prefetch:{destination}:{tz_offset}:{stored_at}"
+        lines = _stream_lines(key, lambda: stream_all_data(
+            None, API_KEY, destination, lat, lon, tz_offset, scheduler.get(destination, tz_offset, float('inf'))
+        ))
+    else:
+        state = neutral_state(current_model(), API_KEY, destination, lat, lon, current_app.extensions['neutral_cache'])
+        if state is None:
+            lines = iter([_ndjson({'stage': 'error', 'error': 'Failed to fetch weather data'})])
+        else:
+            # Encoded lines are kept per snapshot version and offset, so repeat loads skip the plots
+            key = f"stream:{destination}:{state['version']}:{tz_offset}"
+            lines = _stream_lines(key, lambda: stream_state(localize_state(state, tz_offset)))
+    return Response(lines, mimetype='application/x-ndjson', headers={'X-Accel-Buffering': 'no'})
+
+def _ndjson(stage):
+    return json.dumps(stage, separators=(',', ':')) + '\n'
+
+def _stream_lines(key, build_stages):
+    """Replay the cached lines for ``key``, or stream new ones and cache them once all are sent."""
+    responses = current_app.extensions['response_cache']
+    entry = responses.get(key)
+    metrics.inc('ccs_cache_requests_total', cache='stream', result='miss' if entry is None else 'hit')
+    if entry is not None:
+        return iter(entry[0])
+
+    def generate():
+        lines = []
+        for stage in build_stages():
+            lines.append(_ndjson(stage))
+            yield lines[-1]
+        responses.set(key, tuple(lines))
+    return generate()
+
+@main.route('/api/windows')
+def climbing_windows():
+    destination = request.args.get('destination', '')
+    if destination == 'all':
+        destinations = CLIMBING_DESTINATIONS
+    elif destination in CLIMBING_DESTINATIONS:
+        destinations = {destination: CLIMBING_DESTINATIONS[destination]}
+    else:
+        return jsonify({'error': 'Invalid destination'}), 400
+
+    windows = build_windows(
+        current_model(),
+        API_KEY,
+        destinations,
+        min_hours=request.args.get('min_hours', default=2, type=float),
+        min_ccs=request.args.get('min_ccs', default=6, type=float),
+        max_pop=request.args.get('max_pop', default=30, type=float),
+        max_wind=request.args.get('max_wind', default=20, type=float),
+        top_n=max(request.args.get('top_n', default=5, type=int), 1)
+    )
+    return jsonify(windows)
+
+BBOX_ERROR = 'south, west, north and east are required, with south <= north'
+
+def _bbox_bounds(args):
+    """[south, west, north, east] from the query, or None if one is missing or south > north."""
+    bounds = [args.get(name, type=float) for name in ('south', 'west', 'north', 'east')]
+    if None in bounds or bounds[0] > bounds[2]:
+        return None
+    return bounds
+
+@main.route('/api/rank')
+def rank():
+    """Crags ordered by mean or peak CCS over a time window, optionally within a radius or box."""
+    args = request.args
+    if 'radius_km' in args:
+        lat, lon, radius = args.get('lat', type=float), args.get('lon', type=float), args.get('radius_km', type=float)
+        if None in (lat, lon, radius):
+            return jsonify({'error': 'radius_km needs numeric lat and lon'}), 400
+        crags = CLIMBING_DESTINATIONS.nearest(lat, lon, len(CLIMBING_DESTINATIONS), radius)
+    elif 'south' in args:
+        bounds = _bbox_bounds(args)
+        if bounds is None:
+            return jsonify({'error': BBOX_ERROR}), 400
+        crags = CLIMBING_DESTINATIONS.bbox(*bounds)
+    else:
+        crags = None
+    destinations = CLIMBING_DESTINATIONS if crags is None else {c['name']: (c['lat'], c['lon']) for c in crags}
+
+    by = args.get('by', 'mean')
+    if by not in RANK_BY:
+        return jsonify({'error': f"by must be one of {', '.join(RANK_BY)}"}), 400
+    start = args.get('start', default=int(datetime.now(timezone.utc).timestamp()), type=int)
+    end = args.get('end', default=start + 72 * 3600, type=int)
+    if end <= start:
+        return jsonify({'error': 'end must be after start'}), 400
+    top_n = min(max(args.get('top_n', default=20, type=int), 1), max(len(destinations), 1))
+
+    ranking = build_ranking(
+        current_model(),
+        API_KEY,
+        destinations,
+        start=start,
+        end=end,
+        by=by,
+        max_pop=args.get('max_pop', default=100, type=float),
+        max_wind=args.get('max_wind', type=float),
+        top_n=top_n
+    )
+    return jsonify({'start': start, 'end': end, 'by': by, 'considered': len(destinations), 'crags': ranking})
+
+@main.route('/api/crags/nearest')
+def nearest_crags():
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    if lat is None or lon is None or not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return jsonify({'error': 'lat and lon are required and must be valid coordinates'}), 400
+
+    n = min(max(request.args.get('n', default=10, type=int), 1), 500)
+    max_km = request.args.get('max_km', type=float)
+    return jsonify(CLIMBING_DESTINATIONS.nearest(lat, lon, n, max_km))
+
+@main.route('/api/crags/bbox')
+def crags_in_bbox():
+    bounds = _bbox_bounds(request.args)
+    if bounds is None:
+        return jsonify({'error': BBOX_ERROR}), 400
+
+    limit = min(max(request.args.get('limit', default=1000, type=int), 1), 10000)
+    return jsonify(CLIMBING_DESTINATIONS.bbox(*bounds, limit=limit))
+
+@main.route('/api/forecast_archive')
+def forecast_archive():
+    """Forecasts archived for one crag, issued in [start, end); ``full=1`` adds current conditions and columns."""
+    archive = current_app.extensions.get('archive')
+    if archive is None:
+        return jsonify({'error': 'Forecast archive is disabled'}), 404
+    destination = request.args.get('destination', '')
+    if destination not in CLIMBING_DESTINATIONS:
+        return jsonify({'error': 'Invalid destination'}), 400
+
+    end = request.args.get('end', default=int(datetime.now(timezone.utc).timestamp()), type=int)
+    start = request.args.get('start', default=end - 30 * 86400, type=int)
+    full = request.args.get('full') == '1'
+    lat, lon = CLIMBING_DESTINATIONS[destination]
+    if not full:
+        # First/last dt are stored alongside each snapshot, so the listing decodes nothing
+        snapshots = [{name: snapshot[name] for name in ('issued_at', 'rows', 'first', 'last')}
+                     for snapshot in archive.snapshots(lat, lon, start, end, decode=False)]
+        return jsonify({'destination': destination, 'start': start, 'end': end, 'snapshots': snapshots})
+
+    snapshots = []
+    for snapshot in archive.snapshots(lat, lon, start, end):
+        forecast = snapshot['forecast']
+        columns = {name: getattr(forecast, name).tolist() for name in COLUMNS}
+        columns['wind'] = [None if wind != wind else wind for wind in columns['wind']]  # NaN isn't JSON
+        snapshots.append({
+            'issued_at': snapshot['issued_at'],
+            'rows': snapshot['rows'],
+            'first': int(forecast.dt[0]) if len(forecast) else None,
+            'last': int(forecast.dt[-1]) if len(forecast) else None,
+            'current': snapshot['current'],
+            'forecast': columns
+        })
+    return jsonify({'destination': destination, 'start': start, 'end': end, 'snapshots': snapshots})
+
+@main.route('/metrics')
+def prometheus_metrics():
+    if not metrics.enabled:
+        return jsonify({'error': 'Metrics are disabled (METRICS_ENABLED=1)'}), 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@main.route('/api/models')
+def models_status():
+    return jsonify(current_app.extensions['models'].status())
+
+@main.route('/api/prefetch_status')
+def prefetch_status():
+    scheduler = current_app.extensions.get('prefetch')
+    if scheduler is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **scheduler.status()})
 
 @main.route('/submit-ccs')
 def submit_ccs():
@@ -160,82 +317,65 @@ def historical_weather():
     lon = request.args.get("lon")
     if not lat or not lon:
         return jsonify({"error": "Missing lat/lon"}), 400
-
     try:
-        url = (
-            f"https://api.open-meteo.com/v1/forecast?"
-            f"latitude={lat}&longitude={lon}"
-            "&hourly=temperature_2m,relative_humidity_2m,precipitation"
-            "&past_days=1&timezone=auto"
-        )
-        r = requests.get(url)
-        r.raise_for_status()
-        data = r.json()
-
-        times = data["hourly"]["time"]
-        temps_c = data["hourly"]["temperature_2m"]
-        humidity = data["hourly"]["relative_humidity_2m"]
-
-        # Use UTC times for filtering
-        now = datetime.now(timezone.utc)          # Current UTC time
-        earliest = now - timedelta(hours=8)       # 8 hours ago UTC
-
-        results = []
-        for t_iso, temp_c, hum in zip(times, temps_c, humidity):
-            t_obj = parser.isoparse(t_iso).astimezone(timezone.utc)  # Convert parsed time to UTC
-            if earliest <= t_obj <= now:
-                dt_unix = int(t_obj.timestamp())
-                temp_f = round(temp_c * 9 / 5 + 32, 1)
-                results.append({
-                    "dt": dt_unix,
-                    "temp": temp_f,
-                    "humidity": hum
-                })
-
-        results.sort(key=lambda x: x["dt"])
-
-        return jsonify(results)
-
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        lat, lon = float(lat), float(lon)
+    except ValueError:
+        return jsonify({"error": "Invalid lat/lon"}), 400
+
+    # Upstream responses are cached per ~1 km cell and hour; only the 8-hour filter runs per request
+    data = fetch_past_day(lat, lon)
+    if not data or "hourly" not in data:
+        return jsonify({"error": "Failed to fetch historical weather"}), 500
+    return jsonify(recent_hours(data["hourly"]))
 
 @main.route('/submit_ccs_data', methods=['POST'])
 def submit_ccs_data():
-    data = request.get_json()
-    dt = data['timestamp']
-    temp = data['temperature']
-    humidity = data['humidity']
-    ccs = data['ccs']
-
-    db_folder = 'data'
-    db_file = 'user_ccs_data.sqlite'
-
-    base_dir = os.path.abspath(os.path.dirname(__file__))
-    data_dir = os.path.join(base_dir, db_folder)
-
-    if not os.path.exists(data_dir):
-        os.makedirs(data_dir)
-
-    db_path = os.path.join(data_dir, db_file)
-
-    print(f"DB Path: {db_path}")
-
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS user_scores (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp INTEGER,
-            temperature REAL,
-            humidity REAL,
-            ccs INTEGER
-        )
-    ''')
-    cursor.execute('''
-        INSERT INTO user_scores (timestamp, temperature, humidity, ccs)
-        VALUES (?, ?, ?, ?)
-    ''', (dt, temp, humidity, ccs))
-    conn.commit()
-    conn.close()
+    try:
+        row = parse_submission(request.get_json(), CLIMBING_DESTINATIONS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
+    # Queued and written in batches by the worker's ingest thread
+    current_app.extensions['ingest'].submit([_with_location(row)])
     return jsonify({'success': True})
+
+
+@main.route('/submit_ccs_data/bulk', methods=['POST'])
+def submit_ccs_data_bulk():
+    data = request.get_json()
+    if not isinstance(data, list):
+        return jsonify({'error': 'Expected a JSON array of submissions'}), 400
+    try:
+        rows = [parse_submission(item, CLIMBING_DESTINATIONS) for item in data]
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    current_app.extensions['ingest'].submit([_with_location(row) for row in rows])
+    return jsonify({'success': True, 'accepted': len(rows)})
+
+
+def _with_location(row):
+    """Fill in a known destination's coordinates when the client didn't send them."""
+    destination, lat, lon = row[4:]
+    if destination in CLIMBING_DESTINATIONS and (lat is None or lon is None):
+        lat, lon = CLIMBING_DESTINATIONS[destination]
+    return row[:4] + (destination, lat, lon)
+
+
+@main.route('/api/community_ccs')
+def community_ccs():
+    destination = request.args.get('destination')
+    if not destination:
+        return jsonify({'error': 'destination is required'}), 400
+
+    resolution = request.args.get('resolution', 'day')
+    if resolution not in ('hour', 'day'):
+        return jsonify({'error': "resolution must be 'hour' or 'day'"}), 400
+
+    try:
+        end = int(request.args.get('end', datetime.now(timezone.utc).timestamp()))
+        start = int(request.args.get('start', end - 7 * 86400))
+    except ValueError:
+        return jsonify({'error': 'start and end must be Unix timestamps'}), 400
+
+    return jsonify(current_app.extensions['ingest'].community_ccs(destination, start, end, resolution))
@@ -0,0 +1,124 @@
+import hashlib
+import os
+import numpy as np
+
+TEMP_RANGE = (-40.0, 130.0)      # °F
+HUMIDITY_RANGE = (0.0, 100.0)    # %
+STEP = 0.5
+
+
+class ScoreSurface:
+    """Model output tabulated over a (temperature, humidity) grid.
+
+    Lookups use right-closed cells, (g[i-1], g[i]] -> g[i], which matches the
+    ``x <= threshold`` splits of tree models trained on whole-degree data, so
+    the table reproduces them exactly. Bilinear interpolation is available for
+    smooth estimators. Rows outside the grid fall through to the model.
+    """
+
+    def __init__(self, model, table, temp_range=TEMP_RANGE, humidity_range=HUMIDITY_RANGE,
+                 step=STEP, interpolate=False):
+        self.model = model
+        self.table = table
+        self.temp_range = temp_range
+        self.humidity_range = humidity_range
+        self.step = step
+        self.interpolate = interpolate
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        temps, hums = X[:, 0], X[:, 1]
+
+        inside = (
+            (temps >= self.temp_range[0]) & (temps <= self.temp_range[1]) &
+            (hums >= self.humidity_range[0]) & (hums <= self.humidity_range[1])
+        )
+        ti = (temps - self.temp_range[0]) / self.step
+        hi = (hums - self.humidity_range[0]) / self.step
+
+        if self.interpolate:
+            out = self._bilinear(ti, hi)
+        else:
+            rows = np.clip(np.ceil(ti), 0, self.table.shape[0] - 1).astype(np.intp)
+            cols = np.clip(np.ceil(hi), 0, self.table.shape[1] - 1).astype(np.intp)
+            out = self.table[rows, cols].astype(float)
+
+        if not inside.all():
+            out[~inside] = np.asarray(self.model.predict(X[~inside]), dtype=float)
+        return out
+
+    def _bilinear(self, ti, hi):
+        t0 = np.clip(np.floor(ti), 0, self.table.shape[0] - 2).astype(np.intp)
+        h0 = np.clip(np.floor(hi), 0, self.table.shape[1] - 2).astype(np.intp)
+        ft = np.clip(ti - t0, 0, 1)
+        fh = np.clip(hi - h0, 0, 1)
+        top = self.table[t0, h0] * (1 - fh) + self.table[t0, h0 + 1] * fh
+        bottom = self.table[t0 + 1, h0] * (1 - fh) + self.table[t0 + 1, h0 + 1] * fh
+        return top * (1 - ft) + bottom * ft
+
+
+def grid_axes(temp_range=TEMP_RANGE, humidity_range=HUMIDITY_RANGE, step=STEP):
+    temps = np.arange(temp_range[0], temp_range[1] + step / 2, step)
+    hums = np.arange(humidity_range[0], humidity_range[1] + step / 2, step)
+    return temps, hums
+
+
+def build_table(model, temp_range=TEMP_RANGE, humidity_range=HUMIDITY_RANGE, step=STEP):
+    temps, hums = grid_axes(temp_range, humidity_range, step)
+    tt, hh = np.meshgrid(temps, hums, indexing='ij')
+    values = np.asarray(model.predict(np.column_stack((tt.ravel(), hh.ravel()))), dtype=float)
+    return values.reshape(tt.shape)
+
+
+def file_digest(path):
+    """sha256 of a model file, or of every file in a model directory."""
+    h = hashlib.sha256()
+    if os.path.isdir(path):
+        paths = [os.path.join(path, name) for name in sorted(os.listdir(path))]
+    else:
+        paths = [path]
+    for file_path in paths:
+        if file_path != path:
+            h.update(os.path.basename(file_path).encode())
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def surface_path(model_path, digest):
+    return f"{os.path.splitext(model_path)[0]}.surface-{digest[:16]}.npz"
+
+
+def check_error_bound(surface, model, max_error, n_samples=2000, seed=0):
+    """Compare the surface with the real model on random in-domain rows."""
+    rng = np.random.default_rng(seed)
+    X = np.column_stack((
+        rng.uniform(*surface.temp_range, n_samples),
+        rng.uniform(*surface.humidity_range, n_samples)
+    ))
+    error = float(np.max(np.abs(surface.predict(X) - np.asarray(model.predict(X), dtype=float))))
+    if error > max_error:
+        raise ValueError(f"Score surface error {error:.3f} exceeds bound {max_error:.3f}")
+    return error
+
+
+def get_or_build_surface(model, model_path, step=STEP, interpolate=False, max_error=0.05, n_samples=2000):
+    """Load the cached surface for this model file, or tabulate and persist it."""
+    path = surface_path(model_path, file_digest(model_path))
+    table = None
+    if os.path.exists(path):
+        with np.load(path) as data:
+            if float(data['step']) == step:
+                table = data['table']
+
+    if table is None:
+        table = build_table(model, step=step)
+        np.savez_compressed(path, table=table, step=np.array(step))
+
+    surface = ScoreSurface(model, table, step=step, interpolate=interpolate)
+    error = check_error_bound(surface, model, max_error, n_samples)
+    print(f"Score surface ready ({table.size} cells, max error {error:.4f})")
+    return surface
@@ -0,0 +1,61 @@
+import os
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def memory_usage():
+    """This process's memory in MB: rss, pss (shared pages split between sharers) and shared.
+
+    PSS and shared come from /proc/self/smaps_rollup and are None where it
+    doesn't exist; rss then falls back to the peak from getrusage. Returns
+    None where neither is available.
+    """
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line and not line.startswith(' '))
+        kb = {name: int(value.split()[0]) for name, value in fields.items() if value.strip().endswith('kB')}
+        return {
+            'rss': kb['Rss'] / 1024,
+            'pss': kb['Pss'] / 1024,
+            'shared': (kb['Shared_Clean'] + kb['Shared_Dirty']) / 1024
+        }
+    except (OSError, KeyError, ValueError):
+        if resource is None:
+            return None
+        return {'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 'pss': None, 'shared': None}
+
+
+def describe_memory():
+    usage = memory_usage()
+    if usage is None:
+        return ""
+    if usage['pss'] is None:
+        return f"pid {os.getpid()}, max RSS {usage['rss']:.0f} MB"
+    return f"pid {os.getpid()}, RSS {usage['rss']:.0f} MB, PSS {usage['pss']:.0f} MB, shared {usage['shared']:.0f} MB"
+
+
+def process_uptime():
+    """Seconds since this process started, from /proc; None where that isn't available."""
+    try:
+        with open('/proc/self/stat') as f:
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def log_first_request(app):
+    """Print how long after process start the first request arrived (CCS_PROFILE_STARTUP=1)."""
+    pending = [True]
+
+    @app.before_request
+    def first_request():
+        if pending and pending.pop():
+            uptime = process_uptime()
+            if uptime is not None:
+                print(f"First request {uptime * 1000:.0f} ms after process start ({describe_memory()})")
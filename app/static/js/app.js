@@ -43,34 +43,66 @@ function updateSelectedDestination(destination) {
 
   const tzOffset = getUserTimezoneOffset();
 
-  axios.get(`/all_data?destination=${encodeURIComponent(destination)}&tz_offset=${tzOffset}`)
-    .then(res => {
-      const c = res.data.conditions;
-      const current = c.current;
-
-      updateMetric('climbing-conditions-score', c.climbing_conditions_score.toFixed(1), getCCSColor(c.climbing_conditions_score), 'ccs-circle');
-      updateMetric('temperature', `${current.temp.toFixed(2)} °F`, getTempColor(current.temp));
-      updateMetric('humidity', `${current.humidity}%`, getHumidityColor(current.humidity));
-      updateMetric('dew-point', `${current.dew_point.toFixed(2)} °F`, current.temp <= current.dew_point ? 'metric-red' : '');
-      updateMetric('wind-speed', `${current.wind_speed.toFixed(0)} mph`);
-      updateMetric('wind-gust', `${current.wind_gust.toFixed(0)} mph`);
-      updateMetric('wind-direction', `${degreesToCardinal(current.wind_direction)}`);
-
-      if (Array.isArray(c.forecast)) renderForecastCards(c.forecast);
-
-      // Render all graphs, then sync scrollbars
-      Promise.all([
-        renderPlotlyGraphFromJSON(res.data.graphs.ccs, 'conditions-graph', 'conditions-button-container'),
-        renderPlotlyGraphFromJSON(res.data.graphs.temperature, 'temp-graph', 'temperature-button-container'),
-        renderPlotlyGraphFromJSON(res.data.graphs.humidity, 'humidity-graph', 'humidity-button-container')
-      ]).then(() => setupScrollSync());
-    })
+  const graphTargets = {
+    ccs: ['conditions-graph', 'conditions-button-container'],
+    temperature: ['temp-graph', 'temperature-button-container'],
+    humidity: ['humidity-graph', 'humidity-button-container']
+  };
+  const rendered = [];
+
+  // Stages arrive as NDJSON: conditions first, then each graph as soon as it is ready
+  streamNDJSON(`/all_data/stream?destination=${encodeURIComponent(destination)}&tz_offset=${tzOffset}`, stage => {
+    if (stage.stage === 'conditions') {
+      renderConditions(stage.conditions);
+    } else if (stage.stage === 'graph' && graphTargets[stage.name]) {
+      rendered.push(renderPlotlyGraphFromJSON(stage.figure, ...graphTargets[stage.name]));
+    } else if (stage.stage === 'error') {
+      console.error('Error loading all data:', stage.error);
+    }
+  })
+    .then(() => Promise.all(rendered))
+    .then(() => setupScrollSync())
     .catch(err => console.error('Error loading all data:', err));
 }
 
-function renderPlotlyGraphFromJSON(jsonStr, graphId, buttonContainerId) {
+function streamNDJSON(url, onItem) {
+  return fetch(url).then(res => {
+    if (!res.ok) throw new Error(`HTTP ${res.status}`);
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    function pump() {
+      return reader.read().then(({ done, value }) => {
+        buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+        const lines = buffer.split('\n');
+        buffer = done ? '' : lines.pop();
+        lines.filter(line => line.trim()).forEach(line => onItem(JSON.parse(line)));
+        return done ? undefined : pump();
+      });
+    }
+    return pump();
+  });
+}
+
+function renderConditions(c) {
+  const current = c.current;
+
+  updateMetric('climbing-conditions-score', c.climbing_conditions_score.toFixed(1), getCCSColor(c.climbing_conditions_score), 'ccs-circle');
+  updateMetric('temperature', `${current.temp.toFixed(2)} °F`, getTempColor(current.temp));
+  updateMetric('humidity', `${current.humidity}%`, getHumidityColor(current.humidity));
+  updateMetric('dew-point', `${current.dew_point.toFixed(2)} °F`, current.temp <= current.dew_point ? 'metric-red' : '');
+  updateMetric('wind-speed', `${current.wind_speed.toFixed(0)} mph`);
+  updateMetric('wind-gust', `${current.wind_gust.toFixed(0)} mph`);
+  updateMetric('wind-direction', `${degreesToCardinal(current.wind_direction)}`);
+
+  if (Array.isArray(c.forecast)) renderForecastCards(c.forecast);
+}
+
+function renderPlotlyGraphFromJSON(figure, graphId, buttonContainerId) {
   const graph = document.getElementById(graphId);
-  const obj = JSON.parse(jsonStr);
+  // Figures arrive as JSON objects; older payloads embedded them as strings
+  const obj = typeof figure === 'string' ? JSON.parse(figure) : figure;
   Plotly.purge(graph);
 
   // ✅ Disable pan/zoom, but keep hover + click popups
@@ -0,0 +1,188 @@
+"""Cross-validated search over decision tree / random forest settings, reporting speed as well as accuracy.
+
+    python -m app.train [--model rf|dt|all] [--folds 5] [--workers N] [--max-mse 0.05] [--save]
+
+Candidates are evaluated in a process pool, one per core. Each reports mean
+CV MSE/R² on the training split, fit time, compiled predict latency (1 row
+and 1000 rows) and model size. The pick is the fastest candidate within
+``--max-mse`` of CV error, or the most accurate one without a bound. Only the
+pick is scored on the 20% holdout the training scripts also use, so the
+holdout plays no part in choosing it.
+"""
+import argparse
+import itertools
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from app.compiled_model import compile_model, compiled_model_path, save_compiled_model
+
+SEARCH_SPACE = {
+    'dt': {
+        'max_depth': [None, 8, 12, 16],
+        'min_samples_leaf': [1, 2, 5]
+    },
+    'rf': {
+        'n_estimators': [25, 50, 100],
+        'max_depth': [None, 12],
+        'min_samples_leaf': [1, 2]
+    }
+}
+
+
+def candidates(kinds, space=SEARCH_SPACE):
+    """(kind, params) for every point of each kind's grid."""
+    for kind in kinds:
+        names = list(space[kind])
+        for values in itertools.product(*(space[kind][name] for name in names)):
+            yield kind, dict(zip(names, values))
+
+
+def make_estimator(kind, params, n_jobs=-1):
+    if kind == 'rf':
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(random_state=42, n_jobs=n_jobs, **params)
+    from sklearn.tree import DecisionTreeRegressor
+    return DecisionTreeRegressor(random_state=42, **params)
+
+
+def kfold(n, folds, seed=42):
+    """(train, test) index arrays for shuffled k-fold cross-validation."""
+    parts = np.array_split(np.random.default_rng(seed).permutation(n), folds)
+    return [(np.concatenate(parts[:i] + parts[i + 1:]), parts[i]) for i in range(folds)]
+
+
+def scores(y_true, y_pred):
+    """(MSE, R²)."""
+    sse = float(np.sum((y_true - y_pred) ** 2))
+    sst = float(np.sum((y_true - y_true.mean()) ** 2)) or 1.0
+    return sse / len(y_true), 1 - sse / sst
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def evaluate(kind, params, X_train, y_train, folds=5, n_jobs=-1):
+    """Cross-validate one candidate, then refit on the whole training split and time it."""
+    cv_mse, cv_r2, fit_seconds = [], [], []
+    for train, test in kfold(len(X_train), folds):
+        estimator = make_estimator(kind, params, n_jobs)
+        start = time.perf_counter()
+        estimator.fit(X_train[train], y_train[train])
+        fit_seconds.append(time.perf_counter() - start)
+        mse, r2 = scores(y_train[test], estimator.predict(X_train[test]))
+        cv_mse.append(mse)
+        cv_r2.append(r2)
+
+    estimator = make_estimator(kind, params, n_jobs).fit(X_train, y_train)
+    compiled = compile_model(estimator)
+    batch = np.resize(X_train, (1000, 2))
+    return {
+        'kind': kind,
+        'params': params,
+        'cv_mse': float(np.mean(cv_mse)),
+        'cv_r2': float(np.mean(cv_r2)),
+        'fit_s': float(np.mean(fit_seconds)),
+        'predict_1_ms': best_of(lambda: compiled.predict(X_train[:1]), 50) * 1000,
+        'predict_1k_ms': best_of(lambda: compiled.predict(batch), 10) * 1000,
+        'pickle_kb': len(pickle.dumps(estimator)) / 1024,
+        'compiled_kb': sum(getattr(compiled, name).nbytes for name in
+                           ('feature', 'threshold', 'children_left', 'children_right', 'value')) / 1024
+    }
+
+
+def split(X, y):
+    """The training scripts' 80/20 train/holdout split."""
+    from sklearn.model_selection import train_test_split
+
+    return train_test_split(X, y, test_size=0.2, random_state=42)
+
+
+def search(X, y, kinds=('dt', 'rf'), folds=5, workers=None, space=SEARCH_SPACE):
+    """Evaluate every candidate on the training split, one process per core; returns results sorted by CV MSE."""
+    X_train, _, y_train, _ = split(X, y)
+    workers = workers or os.cpu_count() or 1
+    # Parallelism goes to candidates; a single worker lets each forest use every core instead
+    n_jobs = 1 if workers > 1 else -1
+    grid = list(candidates(kinds, space))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(evaluate, kind, params, X_train, y_train, folds, n_jobs)
+            for kind, params in grid
+        ]
+        results = [future.result() for future in futures]
+    return sorted(results, key=lambda result: result['cv_mse'])
+
+
+def choose(results, max_mse=None):
+    """Fastest candidate (1000-row predict) within ``max_mse`` CV error, else the most accurate."""
+    within = [r for r in results if max_mse is not None and r['cv_mse'] <= max_mse]
+    if within:
+        return min(within, key=lambda r: r['predict_1k_ms'])
+    return min(results, key=lambda r: r['cv_mse'])
+
+
+def holdout(choice, X, y):
+    """MSE and R² of the chosen candidate on the holdout, fitted on the training split."""
+    X_train, X_test, y_train, y_test = split(X, y)
+    estimator = make_estimator(choice['kind'], choice['params']).fit(X_train, y_train)
+    return scores(y_test, compile_model(estimator).predict(X_test))
+
+
+def describe(params):
+    return ', '.join(f'{name}={value}' for name, value in params.items())
+
+
+def save_choice(choice, X, y):
+    """Refit the choice on the training split and write it where the app loads that kind from."""
+    import joblib
+    from app import train_dt, train_rf
+
+    model_path = {'rf': train_rf.MODEL_PATH, 'dt': train_dt.MODEL_PATH}[choice['kind']]
+    X_train, _, y_train, _ = split(X, y)
+    estimator = make_estimator(choice['kind'], choice['params']).fit(X_train, y_train)
+    joblib.dump(estimator, model_path)
+    save_compiled_model(compile_model(estimator), compiled_model_path(model_path))
+    return model_path
+
+
+def main():
+    from app.train_rf import load_training_arrays
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', choices=['rf', 'dt', 'all'], default='all')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=None, help='processes (default: one per core)')
+    parser.add_argument('--max-mse', type=float, default=None, help='pick the fastest model under this CV MSE')
+    parser.add_argument('--save', action='store_true', help='write the pick to the model path the app loads')
+    args = parser.parse_args()
+
+    X, y = load_training_arrays()
+    kinds = ('dt', 'rf') if args.model == 'all' else (args.model,)
+    start = time.perf_counter()
+    results = search(X, y, kinds, args.folds, args.workers)
+    print(f"{len(results)} candidates, {args.folds}-fold CV on {len(X)} rows in {time.perf_counter() - start:.1f}s\n")
+
+    print(f"{'model':<6}{'params':<48}{'cv MSE':>8}{'cv R²':>8}{'fit s':>8}{'1 ms':>8}{'1k ms':>8}"
+          f"{'pkl KB':>9}{'npy KB':>9}")
+    for r in results:
+        print(f"{r['kind']:<6}{describe(r['params']):<48}{r['cv_mse']:>8.4f}{r['cv_r2']:>8.4f}{r['fit_s']:>8.2f}"
+              f"{r['predict_1_ms']:>8.3f}{r['predict_1k_ms']:>8.2f}{r['pickle_kb']:>9.0f}{r['compiled_kb']:>9.0f}")
+
+    choice = choose(results, args.max_mse)
+    holdout_mse, holdout_r2 = holdout(choice, X, y)
+    print(f"\nPick: {choice['kind']} ({describe(choice['params'])}), CV MSE {choice['cv_mse']:.4f}, "
+          f"holdout MSE {holdout_mse:.4f} (R² {holdout_r2:.4f}), {choice['predict_1k_ms']:.2f} ms per 1000 rows")
+    if args.save:
+        print(f"Saved to {save_choice(choice, X, y)}")
+
+
+if __name__ == '__main__':
+    main()
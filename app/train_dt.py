@@ -1,25 +1,25 @@
 import os
-import joblib
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.tree import DecisionTreeRegressor
-from sklearn.metrics import mean_squared_error, r2_score
+import numpy as np
 
 MODEL_PATH = os.path.join(os.path.dirname(__file__), 'model', 'decision_tree_regression_model.pkl')
 DATA_PATH = os.path.join(os.path.dirname(__file__), 'data', 'climbing_conditions_data_v2.xlsx')
 
 
 def load_training_data(path=DATA_PATH):
+    import pandas as pd
+
     df = pd.read_excel(path)
-    temperature = df["Temperature"].tolist()
-    humidity = df["Humidity"].tolist()
-    values = df["Values"].tolist()
-    return list(zip(temperature, humidity, values))
+    return df[["Temperature", "Humidity", "Values"]].to_numpy(dtype=float)
 
 
 def train_decision_tree_regression(data, save_model=True, model_path=MODEL_PATH):
-    features = [(temp, humid) for temp, humid, _ in data]
-    labels = [ccs for _, _, ccs in data]
+    import joblib
+    from sklearn.metrics import mean_squared_error, r2_score
+    from sklearn.model_selection import train_test_split
+    from sklearn.tree import DecisionTreeRegressor
+
+    data = np.asarray(data, dtype=float)
+    features, labels = data[:, :2], data[:, 2]
 
     X_train, X_test, y_train, y_test = train_test_split(features, labels, test_size=0.2, random_state=42)
 
@@ -39,6 +39,7 @@ def train_decision_tree_regression(data, save_model=True, model_path=MODEL_PATH)
 
 def load_decision_tree_model(model_path=MODEL_PATH):
     if os.path.exists(model_path):
+        import joblib
         return joblib.load(model_path)
     else:
         return None
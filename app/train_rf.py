@@ -1,35 +1,40 @@
 import os
-import joblib
-import pandas as pd
 import sqlite3
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_squared_error, r2_score
+import numpy as np
+
+# Training libraries are imported where used; serving needs none of them
 
 MODEL_PATH = os.path.join(os.path.dirname(__file__), 'model', 'random_forest_regression_model.pkl')
 DB_PATH = os.path.join(os.path.dirname(__file__), 'data', 'climbing_conditions_data_v2.db')
 
 
-def load_training_data(db_path=DB_PATH):
-    """Load training data from SQLite database."""
+def load_training_arrays(db_path=DB_PATH):
+    """Features (temperature, humidity) and CCS labels as float arrays, straight from SQLite."""
     conn = sqlite3.connect(db_path)
-    query = 'SELECT Temperature, Humidity, "Values" FROM climbing_conditions_data_v2'
-    df = pd.read_sql_query(query, conn)
+    rows = conn.execute('SELECT Temperature, Humidity, "Values" FROM climbing_conditions_data_v2').fetchall()
     conn.close()
+    data = np.array(rows, dtype=float).reshape(-1, 3)
+    return data[:, :2], data[:, 2]
 
-    temperature = df["Temperature"].tolist()
-    humidity = df["Humidity"].tolist()
-    values = df["Values"].tolist()
-    return list(zip(temperature, humidity, values))
+
+def load_training_data(db_path=DB_PATH):
+    """Load training data from SQLite database as (temperature, humidity, ccs) rows."""
+    X, y = load_training_arrays(db_path)
+    return np.column_stack((X, y))
 
 
 def train_random_forest_regression(data, save_model=True, model_path=MODEL_PATH):
-    features = [(temp, humid) for temp, humid, _ in data]
-    labels = [ccs for _, _, ccs in data]
+    import joblib
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.metrics import mean_squared_error, r2_score
+    from sklearn.model_selection import train_test_split
+
+    data = np.asarray(data, dtype=float)
+    features, labels = data[:, :2], data[:, 2]
 
     X_train, X_test, y_train, y_test = train_test_split(features, labels, test_size=0.2, random_state=42)
 
-    rf = RandomForestRegressor(n_estimators=100, random_state=42)
+    rf = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
     rf.fit(X_train, y_train)
 
     y_pred = rf.predict(X_test)
@@ -45,6 +50,7 @@ def train_random_forest_regression(data, save_model=True, model_path=MODEL_PATH)
 
 def load_random_forest_model(model_path=MODEL_PATH):
     if os.path.exists(model_path):
+        import joblib
         return joblib.load(model_path)
     else:
         return None
@@ -0,0 +1,148 @@
+"""Load test of upstream-bound endpoints: sync vs gevent gunicorn workers against slow local upstream stubs.
+
+    python -m benchmarks.bench_async [--requests 400] [--concurrency 200] [--delay 0.25] [--workers 1]
+
+OpenWeather and open-meteo are replaced by one local stub answering every
+call after ``--delay`` seconds, and the weather cache is off, so each request
+waits on upstream the way a cold one does in production. Requests alternate
+between /all_data (one destination each) and /api/historical_weather (a
+different location each).
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote
+import numpy as np
+import requests
+from tests.stub_server import StubServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_responses():
+    now = int(time.time()) // 3600 * 3600
+    hourly = [{"dt": now + i * 3600, "temp": 55 + i % 10, "humidity": 40 + i % 20, "dew_point": 35, "pop": 0.1,
+               "wind_speed": 6, "wind_gust": 9, "weather": [{"id": 800}]} for i in range(48)]
+    three_hour = [{"dt": now + i * 3 * 3600, "main": {"temp": 60, "humidity": 45}, "pop": 0.2,
+                   "wind": {"speed": 5}, "weather": [{"id": 801}]} for i in range(40)]
+    daily = [{"dt": now + i * 86400, "temp": {"day": 62}, "humidity": 35, "dew_point": 38,
+              "wind_speed": 7, "pop": 0.1} for i in range(8)]
+    current = {"temp": 58, "humidity": 42, "dew_point": 36, "wind_speed": 6, "wind_gust": 9}
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(hours=24)
+    times = [(start + timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M") for i in range(48)]
+    return {
+        "/data/2.5/forecast": {"list": three_hour},
+        "/data/3.0/onecall": {"current": current, "hourly": hourly, "daily": daily},
+        "/v1/forecast": {"hourly": {"time": times, "temperature_2m": [12.0] * 48,
+                                    "relative_humidity_2m": [50] * 48, "precipitation": [0.0] * 48}}
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(worker_class, workers, upstream, tmp):
+    port = free_port()
+    env = dict(
+        os.environ,
+        GUNICORN_WORKER_CLASS=worker_class,
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        WEB_CONCURRENCY=str(workers),
+        OPENWEATHER_BASE_URL=upstream,
+        OPEN_METEO_BASE_URL=upstream,
+        OPENWEATHER_API_KEY="bench",
+        WEATHER_CACHE_BACKEND="none",
+        USER_DB_PATH=os.path.join(tmp, f"{worker_class}.sqlite"),
+        PREFETCH_ENABLED="0",
+        RETRAIN_ENABLED="0"
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "wsgi:app", "-c", "gunicorn.conf.py"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{url}/api/models", timeout=1).status_code == 200:
+                return process, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"gunicorn ({worker_class}) did not start")
+
+
+def make_paths(n):
+    from app.routes import CLIMBING_DESTINATIONS
+
+    destinations = list(CLIMBING_DESTINATIONS)
+    paths = []
+    for i in range(n):
+        if i % 2:
+            paths.append(f"/api/historical_weather?lat={30 + i * 0.01:.2f}&lon=-110")
+        else:
+            paths.append(f"/all_data?destination={quote(destinations[i // 2 % len(destinations)])}")
+    return paths
+
+
+def load(url, paths, concurrency):
+    def get(path):
+        start = time.perf_counter()
+        try:
+            ok = requests.get(url + path, timeout=120).status_code == 200
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(get, paths))
+    elapsed = time.perf_counter() - start
+    latencies = np.array([latency for latency, _ in results]) * 1000
+    return {
+        'rps': len(paths) / elapsed,
+        'p50': float(np.percentile(latencies, 50)),
+        'p99': float(np.percentile(latencies, 99)),
+        'errors': sum(not ok for _, ok in results)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--delay', type=float, default=0.25, help='upstream latency in seconds')
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+
+    paths = make_paths(args.requests)
+    results = {}
+    with StubServer(make_responses(), delay=args.delay) as stub, tempfile.TemporaryDirectory() as tmp:
+        for worker_class in ('sync', 'gevent'):
+            process, url = start_server(worker_class, args.workers, stub.url, tmp)
+            try:
+                load(url, paths[:20], 10)  # first figures import plotly
+                results[worker_class] = load(url, paths, args.concurrency)
+            finally:
+                process.terminate()
+                process.wait()
+
+    print(f"{args.requests} requests, {args.concurrency} concurrent, {args.workers} worker(s), "
+          f"{args.delay * 1000:.0f} ms upstream\n")
+    print(f"{'':<8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for worker_class, r in results.items():
+        print(f"{worker_class:<8}{r['rps']:>10.1f}{r['p50']:>10.0f}{r['p99']:>10.0f}{r['errors']:>8}")
+    print(f"speedup {results['gevent']['rps'] / results['sync']['rps']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Crag lookups as the catalog grows: linear scan over the name dict (previous) vs the spatial index.
+
+    python -m benchmarks.bench_crags [--sizes 63,1000,10000,100000] [--queries 500]
+"""
+import argparse
+import math
+import time
+import numpy as np
+from app.crags import CragCatalog
+
+
+def make_catalog(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return CragCatalog([f"crag {i}" for i in range(n)], rng.uniform(25, 49, n), rng.uniform(-124, -67, n))
+
+
+def linear_nearest(destinations, lat, lon, n):
+    def distance(item):
+        lat2, lon2 = item[1]
+        a = math.sin(math.radians(lat2 - lat) / 2) ** 2 + math.cos(math.radians(lat)) * math.cos(
+            math.radians(lat2)) * math.sin(math.radians(lon2 - lon) / 2) ** 2
+        return math.asin(math.sqrt(a))
+
+    return sorted(destinations.items(), key=distance)[:n]
+
+
+def linear_bbox(destinations, south, west, north, east):
+    return [name for name, (lat, lon) in destinations.items() if south <= lat <= north and west <= lon <= east]
+
+
+def per_query_us(fn, queries):
+    start = time.perf_counter()
+    for query in queries:
+        fn(*query)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='63,1000,10000,100000')
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    points = [(float(lat), float(lon)) for lat, lon in zip(rng.uniform(25, 49, args.queries),
+                                                           rng.uniform(-124, -67, args.queries))]
+    boxes = [(lat - 1, lon - 1, lat + 1, lon + 1) for lat, lon in points]
+
+    print(f"{'crags':>8}{'build ms':>10}{'scan nearest µs':>17}{'nearest µs':>12}{'scan bbox µs':>14}{'bbox µs':>10}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        catalog = make_catalog(size)
+        destinations = dict(catalog.items())
+        start = time.perf_counter()
+        catalog.build_index()
+        build_ms = (time.perf_counter() - start) * 1000
+        # The scans are slow at large sizes; a few queries are enough to time them
+        few = max(1, min(args.queries, 200000 // size))
+        print(f"{size:>8}{build_ms:>10.1f}"
+              f"{per_query_us(lambda lat, lon: linear_nearest(destinations, lat, lon, 10), points[:few]):>17.0f}"
+              f"{per_query_us(lambda lat, lon: catalog.nearest(lat, lon, 10), points):>12.0f}"
+              f"{per_query_us(lambda *box: linear_bbox(destinations, *box), boxes[:few]):>14.0f}"
+              f"{per_query_us(lambda *box: catalog.bbox(*box), boxes):>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
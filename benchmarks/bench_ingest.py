@@ -0,0 +1,86 @@
+"""CCS submission throughput: connect/insert/commit per row (previous) vs write-behind batches.
+
+    python -m benchmarks.bench_ingest [--rows 2000] [--threads 8] [--batch 200]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.ingest import UserScoreWriter, init_db
+
+
+def legacy_insert(db_path, row):
+    conn = sqlite3.connect(db_path, timeout=30)
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_scores (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp INTEGER,
+            temperature REAL,
+            humidity REAL,
+            ccs INTEGER
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO user_scores (timestamp, temperature, humidity, ccs)
+        VALUES (?, ?, ?, ?)
+    ''', row[:4])
+    conn.commit()
+    conn.close()
+
+
+def make_rows(n):
+    return [(1691232000 + i * 60, 50 + i % 30, 20 + i % 60, i % 11, 'Bench', 35.0, -105.0) for i in range(n)]
+
+
+def count(db_path):
+    conn = sqlite3.connect(db_path)
+    n = conn.execute('SELECT COUNT(*) FROM user_scores').fetchone()[0]
+    conn.close()
+    return n
+
+
+def bench_legacy(db_path, rows, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(lambda row: legacy_insert(db_path, row), rows))
+    return time.perf_counter() - start
+
+
+def bench_write_behind(db_path, rows, threads, batch):
+    init_db(db_path)
+    writer = UserScoreWriter(db_path, max_batch=batch, max_delay=0.05).start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(lambda row: writer.submit([row]), rows))
+    writer.queue.flush()  # time until every row is durable, not just accepted
+    elapsed = time.perf_counter() - start
+    writer.queue.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--batch', type=int, default=200)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, 'legacy.sqlite')
+        batched_path = os.path.join(tmp, 'batched.sqlite')
+        legacy_time = bench_legacy(legacy_path, rows, args.threads)
+        batched_time = bench_write_behind(batched_path, rows, args.threads, args.batch)
+        assert count(legacy_path) == count(batched_path) == args.rows
+
+    print(f"{'':<22}{'rows/s':>12}")
+    print(f"{'per-request commit':<22}{args.rows / legacy_time:>12.0f}")
+    print(f"{'write-behind':<22}{args.rows / batched_time:>12.0f}")
+    print(f"speedup {legacy_time / batched_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
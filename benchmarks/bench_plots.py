@@ -0,0 +1,85 @@
+"""Figure build + serialization cost: per-hour shapes (previous) vs merged bands.
+
+    python -m benchmarks.bench_plots [--hours 80] [--repeat 20]
+"""
+import argparse
+import time
+import numpy as np
+import plotly.graph_objects as go
+from weather_app.columnar import ColumnarForecast
+from weather_app.plot_utils import (
+    color_range_for_ccs,
+    color_range_for_humidity,
+    color_range_for_temp,
+    plot_data,
+    process_hourly_data
+)
+
+PLOTS = (
+    ('score', 'CCS', color_range_for_ccs),
+    ('temp', 'Temp (°F)', color_range_for_temp),
+    ('humidity', 'Humidity (%)', color_range_for_humidity)
+)
+
+
+def legacy_plot_data(x_indices, values, colors, x_labels, hover_text, title, yaxis_title, color_ranges):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=x_indices, y=values, mode='lines+markers', marker=dict(color=colors),
+                             text=hover_text, hovertemplate="<b>%{text}</b><extra></extra>"))
+    for i in range(len(values) - 1):
+        fig.add_shape(type="rect", x0=i, x1=i + 1, y0=min(values), y1=max(values), line=dict(width=0),
+                      fillcolor=color_ranges(values[i]), opacity=0.3)
+    fig.add_vline(x=48, line_dash="dot", line_color="black", opacity=0.5)
+    fig.add_vline(x=71, line_dash="dot", line_color="black", opacity=0.5)
+    fig.add_annotation(x=24, y=1.10, yref="paper", text="Hourly", showarrow=False, font=dict(size=12))
+    fig.add_annotation(x=60, y=1.10, yref="paper", text="3-Hour", showarrow=False, font=dict(size=12))
+    fig.add_annotation(x=73, y=1.10, yref="paper", text="Daily", showarrow=False, font=dict(size=12))
+    fig.update_layout(title=title, xaxis=dict(title='Time', tickmode='array', tickvals=x_indices,
+                      ticktext=x_labels, tickangle=45), yaxis=dict(title=yaxis_title), showlegend=False)
+    return fig
+
+
+def make_forecast(hours, seed=0):
+    rng = np.random.default_rng(seed)
+    forecast = ColumnarForecast.empty(hours)
+    forecast.dt[:] = 1691232000 + np.arange(hours) * 3600
+    day = np.sin(np.arange(hours) / 24 * 2 * np.pi)
+    forecast.temp[:] = 55 + 15 * day + rng.normal(0, 1, hours)
+    forecast.humidity[:] = np.round(45 - 20 * day + rng.normal(0, 3, hours))
+    forecast.dew_point[:] = forecast.temp - (100 - forecast.humidity) / 5.0
+    forecast.weather_id[:] = 800
+    return forecast
+
+
+def run(build, forecast, scores, repeat):
+    inputs = [process_hourly_data(forecast, None, value_type, scores) for value_type, _, _ in PLOTS]
+    best, size = float('inf'), 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = 0
+        for args, (_, yaxis_title, color_ranges) in zip(inputs, PLOTS):
+            size += len(build(*args, 'Bench', yaxis_title, color_ranges).to_json())
+        best = min(best, time.perf_counter() - start)
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hours', type=int, default=80)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    forecast = make_forecast(args.hours)
+    scores = np.clip(10 - np.abs(forecast.temp - 55) / 4 - forecast.humidity / 20, 0, 10)
+
+    legacy_time, legacy_bytes = run(legacy_plot_data, forecast, scores, max(1, args.repeat // 5))
+    new_time, new_bytes = run(plot_data, forecast, scores, args.repeat)
+
+    print(f"{'':<22}{'3 figures (ms)':>16}{'JSON bytes':>12}")
+    print(f"{'per-hour shapes':<22}{legacy_time * 1000:>16.1f}{legacy_bytes:>12}")
+    print(f"{'merged bands':<22}{new_time * 1000:>16.1f}{new_bytes:>12}")
+    print(f"speedup {legacy_time / new_time:.1f}x, payload {100 * (1 - new_bytes / legacy_bytes):.0f}% smaller")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""gunicorn settings: gunicorn wsgi:app
+
+With preload (the default) the app and model are built once in the master and
+shared copy-on-write by every forked worker; the compiled model's node arrays
+are memory-mapped, so even workers that reload share one copy in the page
+cache. Each worker logs its boot time and memory at startup.
+
+GUNICORN_WORKER_CLASS=gevent serves requests as greenlets: a request waiting
+on OpenWeather or open-meteo yields to the others, so one worker keeps up to
+GUNICORN_WORKER_CONNECTIONS requests in flight. Scoring, plotting and gzip
+run on a thread pool meanwhile (app/concurrency.py). Load test with
+python -m benchmarks.bench_async. COALESCE_ACROSS_WORKERS=1 works with it:
+greenlets waiting on another worker's lock file poll it and yield rather
+than block the hub in flock.
+
+With METRICS_ENABLED=1 each worker writes its series to METRICS_DIR, and
+/metrics sums every worker's, so it doesn't matter which worker a scrape
+lands on. The directory is emptied when the server starts.
+"""
+import glob
+import os
+import time
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "1000"))
+
+if worker_class == "gevent":
+    # Patch before the app is imported (preload) so its pools, locks and sockets are cooperative
+    from gevent import monkey
+
+    monkey.patch_all()
+    # Pool threads are greenlets now; a pool as wide as the connection limit never queues fetches
+    os.environ.setdefault("HTTP_MAX_WORKERS", str(worker_connections))
+    os.environ.setdefault("HTTP_POOL_SIZE", "100")
+    os.environ.setdefault("FANOUT_WORKERS", "64")
+
+# Set before the app (and weather_app.metrics) is imported
+os.environ.setdefault("METRICS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "app", "data", "metrics"))
+
+if preload_app:
+    # Threads don't survive fork; each worker starts its own in post_fork
+    os.environ["CCS_START_BACKGROUND"] = "0"
+
+_started = time.monotonic()
+
+
+def on_starting(server):
+    # Counters restart from zero with the server, as Prometheus expects after a restart
+    for path in glob.glob(os.path.join(os.environ["METRICS_DIR"], "*.json*")):
+        os.remove(path)
+
+
+def when_ready(server):
+    from app.startup import describe_memory
+
+    server.log.info(f"Master ready in {time.monotonic() - _started:.2f}s ({describe_memory()})")
+
+
+def post_fork(server, worker):
+    worker.forked_at = time.monotonic()
+    if server.cfg.preload_app:
+        from app import start_background
+
+        start_background(worker.app.wsgi())
+
+
+def post_worker_init(worker):
+    from app.startup import describe_memory
+
+    boot_ms = (time.monotonic() - worker.forked_at) * 1000
+    worker.log.info(f"Worker booted in {boot_ms:.0f} ms after fork ({describe_memory()})")
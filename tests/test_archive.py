@@ -0,0 +1,119 @@
+import time
+from concurrent.futures import Future
+import numpy as np
+from app.archive import ForecastArchive, decode_forecast, encode_forecast, init_archive
+from weather_app import weather_api
+from weather_app.cache import MemoryCache, ResponseCache
+from weather_app.columnar import COLUMNS, ColumnarForecast
+
+DAY = 86400
+T0 = 1791000000 // DAY * DAY
+
+def make_forecast(issued_at, n=60, seed=0):
+    rng = np.random.default_rng(seed)
+    forecast = ColumnarForecast.empty(n)
+    forecast.dt[:] = issued_at + np.arange(n) * 3600
+    forecast.temp[:] = rng.uniform(30, 90, n)
+    forecast.humidity[:] = rng.integers(10, 90, n)
+    forecast.wind[:] = rng.uniform(0, 20, n)
+    forecast.wind[5] = np.nan
+    return forecast
+
+def make_archive(tmp_path):
+    path = str(tmp_path / 'archive.sqlite')
+    init_archive(path)
+    return ForecastArchive(path, max_batch=50, max_delay=0.05).start()
+
+def test_columns_round_trip_compressed():
+    forecast = make_forecast(T0)
+    blob = encode_forecast(forecast)
+    decoded = decode_forecast(blob, len(forecast))
+    for name in COLUMNS:
+        np.testing.assert_array_equal(getattr(decoded, name), getattr(forecast, name))
+    assert len(blob) < sum(getattr(forecast, name).nbytes for name in COLUMNS)
+
+def test_range_query_across_day_partitions(tmp_path):
+    archive = make_archive(tmp_path)
+    for i in range(8):  # every 6 hours for two days
+        issued_at = T0 + i * 6 * 3600
+        archive.record(39.93, -105.28, {'temp': 50 + i}, make_forecast(issued_at, seed=i), [{'dt': issued_at}],
+                       issued_at=issued_at)
+    archive.record(40.5, -105.28, {'temp': 1}, make_forecast(T0), [], issued_at=T0)
+    archive.queue.flush()
+
+    snapshots = archive.snapshots(39.931, -105.279, T0 + 12 * 3600, T0 + 36 * 3600)
+    assert [s['issued_at'] for s in snapshots] == [T0 + h * 3600 for h in (12, 18, 24, 30)]
+    assert snapshots[0]['current'] == {'temp': 52}
+    assert snapshots[0]['daily'] == [{'dt': T0 + 12 * 3600}]
+    np.testing.assert_array_equal(snapshots[0]['forecast'].temp, make_forecast(T0, seed=2).temp)
+    listing = archive.snapshots(39.93, -105.28, T0, T0 + 2 * DAY, decode=False)
+    assert len(listing) == 8
+    assert listing[2]['first'] == T0 + 12 * 3600 and listing[2]['last'] == T0 + 12 * 3600 + 59 * 3600
+
+def test_identical_snapshots_stored_once(tmp_path):
+    archive = make_archive(tmp_path)
+    forecast = make_forecast(T0)
+    for i in range(3):
+        archive.record(39.93, -105.28, {'temp': 50}, forecast, [], issued_at=T0 + i * 60)
+    # A second worker with its own archive object recording the same snapshot
+    other = ForecastArchive(archive.db_path, max_delay=0.05).start()
+    other.record(39.93, -105.28, {'temp': 50}, forecast, [], issued_at=T0 + 600)
+    archive.queue.flush()
+    other.queue.flush()
+    assert len(archive.snapshots(39.93, -105.28, T0, T0 + DAY)) == 1
+
+def test_latest_respects_max_age(tmp_path):
+    archive = make_archive(tmp_path)
+    archive.record(39.93, -105.28, {'temp': 50}, make_forecast(T0), [], issued_at=T0)
+    archive.queue.flush()
+    assert archive.latest(39.93, -105.28, max_age=3600, now=T0 + 1800)['issued_at'] == T0
+    assert archive.latest(39.93, -105.28, max_age=3600, now=T0 + 7200) is None
+
+def test_upstream_failure_served_from_archive(tmp_path, monkeypatch):
+    archive = make_archive(tmp_path)
+    now = int(weather_api.time.time())
+    archive.record(39.93, -105.28, {'temp': 50}, make_forecast(now - 7200), [{'dt': now}], issued_at=now - 7200)
+    archive.queue.flush()
+    monkeypatch.setattr(weather_api, "fetch_weather_data", lambda *args, **kwargs: (None, None))
+
+    current, forecast, daily = weather_api.fetch_columnar_weather_data("key", 39.93, -105.28, archive=archive)
+    assert current == {'temp': 50} and daily == [{'dt': now}]
+    assert forecast.dt[0] >= now - 3600 and len(forecast) == 59
+    assert weather_api.fetch_columnar_weather_data("key", 10.0, 10.0, archive=archive) == (None, None, None)
+
+class FakeClient:
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = 0
+
+    def get_json(self, url, params=None):
+        self.calls += 1
+        return next(data for path, data in self.responses.items() if url.endswith(path))
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+def test_cached_response_archived_once_as_issued_at_fetch(tmp_path, monkeypatch):
+    archive = make_archive(tmp_path)
+    fetched_at = T0 + 6 * 3600
+    hourly = [{'dt': fetched_at + i * 3600, 'temp': 50 + i % 7, 'humidity': 40, 'dew_point': 30}
+              for i in range(72)]
+    client = FakeClient({'/data/2.5/forecast': {'list': []},
+                         '/data/3.0/onecall': {'current': {'temp': 50}, 'hourly': hourly, 'daily': []}})
+    monkeypatch.setitem(weather_api.CACHE_TTLS, 'onecall', 4 * 3600)
+    monkeypatch.setitem(weather_api.CACHE_TTLS, 'forecast', 4 * 3600)
+    cache = ResponseCache(MemoryCache())
+    clock = [fetched_at]
+    monkeypatch.setattr(time, 'time', lambda: clock[0])
+
+    for hours in range(3):  # served from the cache an hour and two hours later
+        clock[0] = fetched_at + hours * 3600
+        _, forecast, _ = weather_api.fetch_columnar_weather_data("key", 39.93, -105.28, cache, client, archive=archive)
+        assert len(forecast) == 72 - hours
+    archive.queue.flush()
+
+    assert client.calls == 2
+    snapshots = archive.snapshots(39.93, -105.28, T0, T0 + DAY)
+    assert [(s['issued_at'], s['rows']) for s in snapshots] == [(fetched_at, 72)]
@@ -0,0 +1,36 @@
+import time
+from weather_app import weather_api
+from weather_app.cache import MemoryCache, ResponseCache
+from weather_app.client import HttpClient
+from tests.stub_server import StubServer
+
+RESPONSES = {
+    "/data/2.5/forecast": {"list": []},
+    "/data/3.0/onecall": {"hourly": [], "daily": [], "current": {}}
+}
+
+def test_fetch_weather_data_runs_endpoints_concurrently(monkeypatch):
+    with StubServer(RESPONSES, delay=0.3) as stub:
+        monkeypatch.setattr(weather_api, "OPENWEATHER_BASE_URL", stub.url)
+        client = HttpClient()
+
+        start = time.perf_counter()
+        data_2_5, data_3_0 = weather_api.fetch_weather_data("dummy", 35.0, -120.0, ResponseCache(MemoryCache()), client)
+        elapsed = time.perf_counter() - start
+
+    assert data_2_5 == {"list": []}
+    assert "hourly" in data_3_0
+    assert elapsed < 0.55  # max of the two calls, not their sum
+
+def test_client_reuses_pooled_connections():
+    with StubServer(RESPONSES) as stub:
+        client = HttpClient(pool_size=2)
+        for _ in range(5):
+            assert client.get_json(f"{stub.url}/data/2.5/forecast") == {"list": []}
+
+    assert len(stub.requests) == 5
+    assert len(stub.connections) == 1
+
+def test_client_returns_none_when_upstream_unreachable():
+    client = HttpClient(retries=0, connect_timeout=0.5, read_timeout=0.5)
+    assert client.get_json("http://127.0.0.1:9/unreachable") is None
@@ -0,0 +1,92 @@
+import subprocess
+import sys
+import threading
+import time
+import pytest
+from weather_app.cache import MemoryCache
+from weather_app.coalesce import SingleFlight
+
+def run_concurrently(targets):
+    results = [None] * len(targets)
+    def wrap(i, target):
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+    threads = [threading.Thread(target=wrap, args=(i, t)) for i, t in enumerate(targets)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+def test_concurrent_calls_share_one_computation():
+    flight = SingleFlight()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"score": 7}
+
+    results = run_concurrently([lambda: flight.do("Bishop, CA", compute)] * 8)
+    assert len(calls) == 1
+    assert all(r == {"score": 7} for r in results)
+    assert flight.in_flight() == 0
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+
+    def fail():
+        time.sleep(0.1)
+        raise RuntimeError("upstream down")
+
+    results = run_concurrently([lambda: flight.do("k", fail)] * 3)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+def test_workers_reuse_result_through_shared_store(tmp_path):
+    store = MemoryCache()
+    workers = [SingleFlight(lock_dir=str(tmp_path), store=store) for _ in range(3)]
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return "payload"
+
+    results = run_concurrently([lambda w=w: w.do("k", compute) for w in workers])
+    assert results == ["payload"] * 3
+    assert len(calls) == 1
+
+LOCK_UNDER_GEVENT = """
+from gevent import monkey; monkey.patch_all()
+import sys, time
+import gevent
+from weather_app.coalesce import file_lock
+
+ticks = []
+
+def hold():
+    with file_lock(sys.argv[1]):
+        gevent.sleep(0.3)
+
+def wait():
+    gevent.sleep(0.05)
+    with file_lock(sys.argv[1]):
+        pass
+
+def tick():
+    for _ in range(20):
+        ticks.append(time.monotonic())
+        gevent.sleep(0.02)
+
+gevent.joinall([gevent.spawn(hold), gevent.spawn(wait), gevent.spawn(tick)], timeout=10)
+print(len(ticks), max(b - a for a, b in zip(ticks, ticks[1:])) < 0.2)
+"""
+
+def test_waiting_on_the_file_lock_yields_under_gevent(tmp_path):
+    pytest.importorskip('gevent')
+    out = subprocess.run([sys.executable, '-c', LOCK_UNDER_GEVENT, str(tmp_path / 'k.lock')],
+                         capture_output=True, text=True, timeout=60)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.split() == ['20', 'True']
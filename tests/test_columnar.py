@@ -0,0 +1,38 @@
+import numpy as np
+from weather_app.columnar import ColumnarForecast, SOURCE_HOURLY, SOURCE_3_HOUR, SOURCE_DAILY
+from weather_app.forecast import generate_daily_forecast
+
+class DummyModel:
+    def predict(self, X):
+        return [5.0] * len(X)
+
+NOW = 1691232000
+
+def make_api_data():
+    hourly = [{"dt": NOW + i * 3600, "temp": 60 + i, "humidity": 40, "dew_point": 45, "pop": 0.1,
+               "wind_speed": 4, "weather": [{"id": 801}], "rain": {"1h": 0.2}} for i in range(-1, 3)]
+    three_hour = [{"dt": NOW + i * 3 * 3600, "main": {"temp": 70, "humidity": 50}, "pop": 0.3,
+                   "weather": [{"id": 500}], "rain": {"3h": 1.0}} for i in range(4)]
+    daily = [{"dt": NOW + i * 86400, "temp": {"day": 65}, "humidity": 30, "dew_point": 40,
+              "wind_speed": 7, "rain": 3.0} for i in range(2)]
+    return {"list": three_hour}, {"hourly": hourly, "daily": daily}
+
+def test_from_api_merges_tiers():
+    forecast = ColumnarForecast.from_api(*make_api_data(), now=NOW)
+    assert list(forecast.source) == [SOURCE_HOURLY] * 3 + [SOURCE_3_HOUR] * 3 + [SOURCE_DAILY] * 2
+    assert np.all(np.diff(forecast.dt) > 0)
+    assert np.isnan(forecast.wind[3])  # 2.5 entry without wind
+    assert forecast.dew_point[3] == 70 - (100 - 50) / 5.0
+    assert forecast.weather_id[-1] == 800
+
+def test_shifted_leaves_original_untouched():
+    forecast = ColumnarForecast.from_api(*make_api_data(), now=NOW)
+    shifted = forecast.shifted(-3600)
+    assert forecast.dt[0] == NOW
+    assert shifted.dt[0] == NOW - 3600
+    assert shifted.temp is forecast.temp
+
+def test_daily_forecast_same_for_columnar_and_entries():
+    forecast = ColumnarForecast.from_api(*make_api_data(), now=NOW)
+    model = DummyModel()
+    assert generate_daily_forecast(forecast, model) == generate_daily_forecast(forecast.to_entries(), model)
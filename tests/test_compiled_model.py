@@ -0,0 +1,39 @@
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.tree import DecisionTreeRegressor
+from app.compiled_model import compile_model, save_compiled_model, load_compiled_model
+
+def make_data():
+    rng = np.random.default_rng(0)
+    X = np.column_stack((rng.integers(25, 101, 500), rng.integers(10, 81, 500))).astype(float)
+    y = np.clip(10 - np.abs(X[:, 0] - 55) / 5 - X[:, 1] / 20 + rng.normal(0, 1, 500), 0, 10)
+    queries = np.column_stack((rng.uniform(0, 120, 300), rng.uniform(0, 100, 300)))
+    return X, y, np.vstack((queries, X[:50]))
+
+def test_random_forest_parity():
+    X, y, queries = make_data()
+    rf = RandomForestRegressor(n_estimators=20, random_state=42).fit(X, y)
+    compiled = compile_model(rf)
+    assert np.array_equal(compiled.predict(queries), rf.predict(queries))
+    assert compiled.predict([(61.5, 40)])[0] == rf.predict([(61.5, 40)])[0]
+
+def test_decision_tree_parity_after_round_trip(tmp_path):
+    X, y, queries = make_data()
+    dt = DecisionTreeRegressor(random_state=42).fit(X, y)
+    path = str(tmp_path / 'dt.compiled')
+    save_compiled_model(compile_model(dt), path)
+    assert np.array_equal(load_compiled_model(path).predict(queries), dt.predict(queries))
+
+def test_export_is_memory_mapped_and_replaceable(tmp_path):
+    X, y, queries = make_data()
+    rf = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, y)
+    path = str(tmp_path / 'rf.compiled')
+    save_compiled_model(compile_model(DecisionTreeRegressor(random_state=0).fit(X, y)), path)
+    save_compiled_model(compile_model(rf), path)
+
+    loaded = load_compiled_model(path)
+    assert isinstance(loaded.threshold.base, np.memmap)
+    assert not loaded.threshold.flags.writeable
+    assert loaded.n_trees == 5
+    assert np.array_equal(loaded.predict(queries), rf.predict(queries))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['rf.compiled']
@@ -0,0 +1,39 @@
+import subprocess
+import sys
+import threading
+import pytest
+from app.concurrency import cooperative, run_cpu
+
+def test_run_cpu_is_a_plain_call_without_gevent():
+    assert not cooperative()
+    assert run_cpu(lambda a, b=0: (threading.current_thread().name, a + b), 1, b=2) == (threading.current_thread().name, 3)
+
+SCRIPT = """
+from gevent import monkey; monkey.patch_all()
+import threading, time, gevent
+from app.concurrency import cooperative, run_cpu
+
+def busy():
+    end = time.perf_counter() + 0.3
+    while time.perf_counter() < end:
+        pass
+    return threading.get_native_id()
+
+ticks = []
+def ticker():
+    for _ in range(10):
+        ticks.append(time.perf_counter())
+        gevent.sleep(0.01)
+
+assert cooperative()
+t = gevent.spawn(ticker)
+assert run_cpu(busy) != threading.get_native_id()
+print(len(ticks))  # ticks taken while busy() ran
+t.join()
+"""
+
+def test_run_cpu_leaves_the_event_loop_free_under_gevent():
+    pytest.importorskip('gevent')
+    out = subprocess.run([sys.executable, '-c', SCRIPT], capture_output=True, text=True, timeout=60)
+    assert out.returncode == 0, out.stderr
+    assert int(out.stdout) >= 3
@@ -0,0 +1,56 @@
+import numpy as np
+from flask import Flask
+from app.crags import EARTH_RADIUS_KM, CragCatalog
+from app.routes import CLIMBING_DESTINATIONS, main
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+def make_catalog(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    return CragCatalog([f"crag {i}" for i in range(n)], rng.uniform(-60, 70, n), rng.uniform(-180, 180, n))
+
+def test_catalog_file_keeps_every_destination():
+    assert len(CLIMBING_DESTINATIONS) == 63
+    assert CLIMBING_DESTINATIONS["Smith Rock State Park, OR"] == (44.3263, -121.1319)
+    assert "Nowhere, XX" not in CLIMBING_DESTINATIONS
+    assert CLIMBING_DESTINATIONS.get("Nowhere, XX", (35.0, -105.0)) == (35.0, -105.0)
+
+def test_nearest_matches_brute_force():
+    catalog = make_catalog()
+    for lat, lon in [(40.0, -105.0), (-33.9, 151.2), (65.0, 179.9)]:
+        result = catalog.nearest(lat, lon, n=5)
+        distances = haversine_km(lat, lon, catalog.lat, catalog.lon)
+        expected = np.argsort(distances)[:5]
+        assert [c['name'] for c in result] == [catalog.names[i] for i in expected]
+        assert np.allclose([c['distance_km'] for c in result], distances[expected], atol=0.01)
+
+def test_nearest_respects_max_km():
+    catalog = make_catalog()
+    result = catalog.nearest(40.0, -105.0, n=50, max_km=300)
+    assert result and all(c['distance_km'] <= 300 for c in result)
+    assert len(result) == np.sum(haversine_km(40.0, -105.0, catalog.lat, catalog.lon) <= 300)
+
+def test_bbox_matches_mask_including_antimeridian():
+    catalog = make_catalog()
+    for south, west, north, east in [(30, -110, 45, -100), (-10, 170, 20, -170)]:
+        lon_ok = (catalog.lon >= west) & (catalog.lon <= east) if west <= east else \
+            (catalog.lon >= west) | (catalog.lon <= east)
+        expected = {catalog.names[i] for i in np.flatnonzero((catalog.lat >= south) & (catalog.lat <= north) & lon_ok)}
+        assert {c['name'] for c in catalog.bbox(south, west, north, east)} == expected
+    assert len(catalog.bbox(-90, -180, 90, 180, limit=7)) == 7
+
+def test_crag_endpoints():
+    app = Flask(__name__)
+    app.register_blueprint(main)
+    client = app.test_client()
+
+    nearest = client.get('/api/crags/nearest?lat=39.93&lon=-105.28&n=2').get_json()
+    assert nearest[0]['name'] == "Eldorado Canyon, CO" and len(nearest) == 2
+    assert client.get('/api/crags/nearest?lat=abc&lon=1').status_code == 400
+
+    box = client.get('/api/crags/bbox?south=38&west=-106&north=41&east=-104').get_json()
+    assert {"Eldorado Canyon, CO", "Clear Creek Canyon, CO"} <= {c['name'] for c in box}
+    assert client.get('/api/crags/bbox?south=41&west=-106&north=38&east=-104').status_code == 400
@@ -1,4 +1,9 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+import numpy as np
+from weather_app.columnar import SOURCE_3_HOUR, SOURCE_DAILY, SOURCE_HOURLY, ColumnarForecast
 from weather_app.forecast import generate_daily_forecast
+from weather_app.utils import calculate_climbing_conditions_score
 
 class DummyModel:
     def predict(self, X):
@@ -17,4 +22,67 @@ def test_generate_daily_forecast_basic():
     forecast = generate_daily_forecast(dummy_data, DummyModel())
     assert len(forecast) > 0
     assert "temp_low" in forecast[0]
-    assert "ccs_low" in forecast[0]
\ No newline at end of file
+    assert "ccs_low" in forecast[0]
+
+def test_daily_source_comes_from_the_rows():
+    day = 86400
+    forecast = ColumnarForecast.empty(6)
+    forecast.dt[:] = [0, 3600, day, day + 3600, 2 * day, 3 * day + 43200]
+    forecast.source[:] = [SOURCE_HOURLY, SOURCE_HOURLY, SOURCE_HOURLY, SOURCE_3_HOUR, SOURCE_3_HOUR, SOURCE_DAILY]
+    daily = generate_daily_forecast(forecast, DummyModel())
+    assert [d['source'] for d in daily] == ['hourly', '3-hour', '3-hour', 'daily']
+
+def per_day_loop(adapted, model):
+    """The per-day grouping generate_daily_forecast used before it was vectorized (minus 'source')."""
+    grouped = defaultdict(list)
+    for entry in adapted:
+        grouped[datetime.fromtimestamp(entry['dt'], timezone.utc).strftime('%Y-%m-%d')].append(entry)
+
+    forecast = []
+    for date in sorted(grouped)[:8]:
+        entries = grouped[date]
+        temps = [e['main']['temp'] for e in entries]
+        hums = [e['main']['humidity'] for e in entries]
+        pops = [e.get('pop', 0) * 100 for e in entries]
+        winds = [e.get('wind', 0) for e in entries if e.get('wind') is not None]
+        rains = [e.get('rain_accumulation', 0) for e in entries if e.get('rain_accumulation') is not None]
+        ccs_values = [
+            calculate_climbing_conditions_score(model, e['main']['dew_point'], e['main']['humidity'], e['main']['temp'])
+            for e in entries
+        ]
+        forecast.append({
+            'date': date,
+            'temp_low': round(min(temps), 1),
+            'temp_high': round(max(temps), 1),
+            'humidity_low': round(min(hums)),
+            'humidity_high': round(max(hums)),
+            'ccs_low': round(min(ccs_values), 1),
+            'ccs_high': round(max(ccs_values), 1),
+            'precip_high': round(max(pops), 1),
+            'wind_low': round(min(winds)) if winds else None,
+            'wind_high': round(max(winds)) if winds else None,
+            'rain_accumulation': round(sum(rains) / 25.4, 2) if rains else 0
+        })
+    return forecast
+
+class TempModel:
+    def predict(self, X):
+        return np.asarray(X, dtype=float)[:, 0] / 10
+
+def test_vectorized_daily_matches_per_day_loop():
+    rng = np.random.default_rng(3)
+    n = 240  # ten days, so the eight-day cut applies
+    forecast = ColumnarForecast.empty(n)
+    forecast.dt[:] = 1691200000 + np.sort(rng.choice(10 * 86400, n, replace=False))
+    forecast.temp[:] = rng.uniform(20, 95, n).round(1)
+    forecast.humidity[:] = rng.integers(5, 100, n)
+    forecast.dew_point[:] = np.where(rng.random(n) < 0.1, forecast.temp, forecast.temp - 10)
+    forecast.pop[:] = rng.integers(0, 100, n) / 100
+    forecast.wind[:] = rng.uniform(0, 30, n)
+    forecast.wind[rng.random(n) < 0.2] = np.nan
+    forecast.wind[(forecast.dt - forecast.dt[0]) // 86400 == 3] = np.nan  # a day with no wind at all
+    forecast.rain[:] = rng.integers(0, 8, n) * 0.5
+
+    daily = [{k: v for k, v in day.items() if k != 'source'} for day in generate_daily_forecast(forecast, TempModel())]
+    assert daily == per_day_loop(forecast.to_entries(), TempModel())
+    assert len(daily) == 8
@@ -0,0 +1,65 @@
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+from dateutil import parser
+from weather_app import historical
+from weather_app.cache import MemoryCache, ResponseCache
+from weather_app.client import HttpClient
+from weather_app.historical import fetch_past_day, recent_hours
+from tests.stub_server import StubServer
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'open_meteo_past_day.json')
+
+def load_fixture():
+    with open(FIXTURE) as f:
+        return json.load(f)
+
+def legacy_recent_hours(data, now):
+    """The per-row loop /api/historical_weather used before."""
+    earliest = now - timedelta(hours=8)
+    results = []
+    for t_iso, temp_c, hum in zip(data["hourly"]["time"], data["hourly"]["temperature_2m"],
+                                  data["hourly"]["relative_humidity_2m"]):
+        t_obj = parser.isoparse(t_iso).astimezone(timezone.utc)
+        if earliest <= t_obj <= now:
+            results.append({"dt": int(t_obj.timestamp()), "temp": round(temp_c * 9 / 5 + 32, 1), "humidity": hum})
+    results.sort(key=lambda x: x["dt"])
+    return results
+
+@pytest.fixture(params=['UTC', 'America/Denver'])
+def server_tz(request, monkeypatch):
+    monkeypatch.setenv('TZ', request.param)
+    time.tzset()
+    yield request.param
+    monkeypatch.undo()
+    time.tzset()
+
+def test_matches_legacy_loop_on_fixture(server_tz):
+    data = load_fixture()
+    for now in [datetime(2026, 10, 16, 0, 30, tzinfo=timezone.utc), datetime(2026, 10, 17, 14, 0, tzinfo=timezone.utc),
+                datetime(2026, 10, 17, 14, 59, 59, 123456, tzinfo=timezone.utc), datetime(2026, 11, 30, tzinfo=timezone.utc)]:
+        assert recent_hours(data["hourly"], now.timestamp()) == legacy_recent_hours(data, now)
+    assert len(recent_hours(data["hourly"], datetime(2026, 10, 17, 14, 0, tzinfo=timezone.utc).timestamp())) == 9
+
+def test_skips_missing_temperatures():
+    hourly = {"time": ["2026-10-17T10:00", "2026-10-17T11:00"], "temperature_2m": [None, 10.0],
+              "relative_humidity_2m": [50, 55]}
+    now = datetime(2026, 10, 17, 12, tzinfo=timezone.utc).timestamp()
+    assert [row["humidity"] for row in recent_hours(hourly, now)] == [55]
+
+def test_past_day_cached_per_cell_and_hour(monkeypatch):
+    with StubServer({"/v1/forecast": load_fixture()}) as stub:
+        monkeypatch.setattr(historical, "OPEN_METEO_BASE_URL", stub.url)
+        cache, client = ResponseCache(MemoryCache()), HttpClient()
+        hour = 1792216800
+
+        assert fetch_past_day(39.931, -105.281, cache, client, now=hour + 60) == load_fixture()
+        fetch_past_day(39.9299, -105.2801, cache, client, now=hour + 3000)  # same cell, same hour
+        assert len(stub.requests) == 1
+        assert "latitude=39.93&longitude=-105.28" in stub.requests[0]
+
+        fetch_past_day(39.93, -105.28, cache, client, now=hour + 3600)
+        fetch_past_day(40.01, -105.28, cache, client, now=hour + 3600)
+        assert len(stub.requests) == 3
@@ -0,0 +1,169 @@
+import sqlite3
+import threading
+import pytest
+from app.ingest import UserScoreWriter, WriteBehindQueue, init_db, parse_submission
+
+def rows_in(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(
+        'SELECT timestamp, temperature, humidity, ccs, destination, lat, lon FROM user_scores ORDER BY id'
+    ).fetchall()
+    conn.close()
+    return rows
+
+def test_parse_submission():
+    assert parse_submission({"timestamp": "1691232000", "temperature": 55, "humidity": 40.5, "ccs": 7}) == \
+        (1691232000, 55.0, 40.5, 7, None, None, None)
+    assert parse_submission({"timestamp": 1, "temperature": 55, "humidity": 40, "ccs": 7,
+                             "destination": "Bishop, CA", "lat": "37.3", "lon": -118.4}) == \
+        (1, 55.0, 40.0, 7, "Bishop, CA", 37.3, -118.4)
+    with pytest.raises(ValueError):
+        parse_submission({"timestamp": 1, "temperature": 55, "humidity": 40})
+    with pytest.raises(ValueError):
+        parse_submission(None)
+
+def test_parse_submission_rejects_unknown_destinations():
+    known = {"Bishop, CA": (37.36, -118.39)}
+    row = {"timestamp": 1, "temperature": 55, "humidity": 40, "ccs": 7}
+    assert parse_submission(dict(row, destination="Bishop, CA"), known)[4] == "Bishop, CA"
+    assert parse_submission(row, known)[4] is None
+    with pytest.raises(ValueError, match="unknown destination"):
+        parse_submission(dict(row, destination="anything'); --"), known)
+
+def test_queue_flushes_in_batches_by_size():
+    batches = []
+    release = threading.Event()
+
+    def write(batch):
+        release.wait(5)
+        batches.append(list(batch))
+
+    queue = WriteBehindQueue(write, max_batch=3, max_delay=5).start()
+    queue.put(0)  # held by the writer until released, so the rest pile up
+    queue.put_many(range(1, 7))
+    release.set()
+    queue.flush()
+    queue.close()
+
+    assert [item for batch in batches for item in batch] == list(range(7))
+    assert max(len(batch) for batch in batches) == 3
+    assert queue.written == 7
+
+def test_queue_flushes_partial_batch_after_delay():
+    batches = []
+    queue = WriteBehindQueue(batches.append, max_batch=100, max_delay=0.01).start()
+    queue.put_many([1, 2])
+    queue.flush()
+    queue.close()
+    assert batches == [[1, 2]]
+
+def test_failed_batch_is_counted_and_queue_keeps_running():
+    def write(batch):
+        if 'bad' in batch:
+            raise RuntimeError("disk full")
+
+    queue = WriteBehindQueue(write, max_batch=1, max_delay=0).start()
+    queue.put_many(['bad', 'good'])
+    queue.flush()
+    queue.close()
+    assert queue.errors == 1 and queue.written == 1
+
+def test_user_score_writer_persists_rows(tmp_path):
+    db_path = str(tmp_path / "user_ccs_data.sqlite")
+    init_db(db_path)
+    writer = UserScoreWriter(db_path, max_batch=50, max_delay=0.01).start()
+    rows = [(1691232000 + i, 50.0 + i, 30.0, i % 11, None, None, None) for i in range(120)]
+    writer.submit(rows[:1])
+    writer.submit(rows[1:])
+    writer.queue.flush()
+    writer.queue.close()
+    assert rows_in(db_path) == rows
+
+def test_init_db_migrates_legacy_table_and_backfills_rollups(tmp_path):
+    db_path = str(tmp_path / "user_ccs_data.sqlite")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE user_scores (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp INTEGER, "
+                 "temperature REAL, humidity REAL, ccs INTEGER)")
+    conn.execute("INSERT INTO user_scores (timestamp, temperature, humidity, ccs) VALUES (100, 50, 30, 7)")
+    conn.commit()
+    conn.close()
+
+    init_db(db_path)
+    init_db(db_path)  # idempotent
+
+    conn = sqlite3.connect(db_path)
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(user_scores)')]
+    indexes = [row[1] for row in conn.execute('PRAGMA index_list(user_scores)')]
+    conn.execute("UPDATE user_scores SET destination = 'A'")
+    conn.execute("DELETE FROM user_scores_daily")
+    conn.commit()
+    conn.close()
+    assert columns[-3:] == ['destination', 'lat', 'lon']
+    assert 'idx_user_scores_destination_ts' in indexes
+    assert rows_in(db_path) == [(100, 50.0, 30.0, 7, 'A', None, None)]
+
+    init_db(db_path)
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT destination, bucket, n, ccs_sum FROM user_scores_daily").fetchall() == [('A', 0, 1, 7.0)]
+    conn.close()
+
+def test_rollups_match_raw_rows(tmp_path):
+    db_path = str(tmp_path / "user_ccs_data.sqlite")
+    init_db(db_path)
+    writer = UserScoreWriter(db_path, max_batch=7, max_delay=0.01).start()
+    day = 1691193600
+    rows = [(day + i * 1200, 50.0 + i, 20.0 + i, i % 11, 'A' if i % 3 else 'B', None, None) for i in range(200)]
+    writer.submit(rows + [(day, 60.0, 30.0, 5, None, None, None)])
+    writer.queue.flush()
+
+    hourly = writer.community_ccs('A', day, day + 86400, resolution='hour')
+    expected = [r for r in rows if r[4] == 'A' and r[0] < day + 86400]
+    assert hourly['count'] == len(expected)
+    assert hourly['mean_ccs'] == round(sum(r[3] for r in expected) / len(expected), 2)
+    first_hour = [r for r in expected if r[0] < day + 3600]
+    assert hourly['buckets'][0] == {
+        'start': day,
+        'count': len(first_hour),
+        'mean_ccs': round(sum(r[3] for r in first_hour) / len(first_hour), 2),
+        'min_ccs': min(r[3] for r in first_hour),
+        'max_ccs': max(r[3] for r in first_hour),
+        'mean_temp': round(sum(r[1] for r in first_hour) / len(first_hour), 1),
+        'mean_humidity': round(sum(r[2] for r in first_hour) / len(first_hour), 1)
+    }
+
+    daily = writer.community_ccs('B', day, day + 10 * 86400)
+    assert [b['count'] for b in daily['buckets']] == [24, 24, 19]
+    assert writer.community_ccs('C', day, day + 86400)['count'] == 0
+    writer.queue.close()
+
+def test_concurrent_init_db_migrates_and_backfills_once(tmp_path):
+    db_path = str(tmp_path / "user_ccs_data.sqlite")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE user_scores (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp INTEGER, "
+                 "temperature REAL, humidity REAL, ccs INTEGER, destination TEXT)")
+    conn.executemany("INSERT INTO user_scores (timestamp, temperature, humidity, ccs, destination) "
+                     "VALUES (?, 50, 30, 7, ?)", [(i * 600, f"crag {i % 50}") for i in range(20000)])
+    conn.commit()
+    conn.close()
+
+    # Workers started without preload each run init_db at the same time
+    barrier, errors = threading.Barrier(6), []
+
+    def start_worker():
+        barrier.wait()
+        try:
+            init_db(db_path)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=start_worker) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT SUM(n) FROM user_scores_hourly").fetchone() == (20000,)
+    assert conn.execute("SELECT SUM(n) FROM user_scores_daily").fetchone() == (20000,)
+    conn.close()
@@ -0,0 +1,107 @@
+import time
+import pytest
+from flask import Flask
+from app.routes import main
+from weather_app.cache import MemoryCache, ResponseCache
+from weather_app.client import HttpClient
+from weather_app.metrics import Metrics, metrics
+from tests.stub_server import StubServer
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(metrics, 'enabled', True)
+    metrics.reset()
+    yield metrics
+    metrics.reset()
+
+def test_disabled_records_nothing():
+    m = Metrics(enabled=False)
+    with m.stage('score'):
+        pass
+    m.inc('ccs_cache_requests_total', cache='weather', result='hit')
+    assert m.render() == '\n'
+
+def test_histogram_and_counter_in_prometheus_text():
+    m = Metrics(enabled=True)
+    for seconds in (0.0002, 0.001, 0.03, 20):
+        m.observe('ccs_stage_seconds', seconds, stage='plot_ccs')
+    m.inc('ccs_upstream_requests_total', endpoint='onecall', status='200')
+    m.inc('ccs_upstream_requests_total', 2, endpoint='onecall', status='200')
+    text = m.render()
+
+    assert '# TYPE ccs_stage_seconds histogram' in text
+    assert 'ccs_stage_seconds_bucket{stage="plot_ccs",le="0.001"} 2' in text
+    assert 'ccs_stage_seconds_bucket{stage="plot_ccs",le="0.05"} 3' in text
+    assert 'ccs_stage_seconds_bucket{stage="plot_ccs",le="+Inf"} 4' in text
+    assert 'ccs_stage_seconds_count{stage="plot_ccs"} 4' in text
+    assert '# TYPE ccs_upstream_requests_total counter' in text
+    assert 'ccs_upstream_requests_total{endpoint="onecall",status="200"} 3' in text
+
+def test_label_values_escaped():
+    m = Metrics(enabled=True)
+    m.inc('ccs_cache_requests_total', cache='a"b\\c', result='hit')
+    assert 'cache="a\\"b\\\\c"' in m.render()
+
+def test_timer_records_elapsed():
+    m = Metrics(enabled=True)
+    with m.timer('ccs_sqlite_write_seconds', table='user_scores'):
+        time.sleep(0.002)
+    assert 'ccs_sqlite_write_seconds_bucket{table="user_scores",le="0.001"} 0' in m.render()
+    assert 'ccs_sqlite_write_seconds_count{table="user_scores"} 1' in m.render()
+
+def test_upstream_and_cache_instrumented(enabled):
+    with StubServer({"/data/3.0/onecall": {"current": {}}}) as stub:
+        cache, client = ResponseCache(MemoryCache()), HttpClient()
+        for _ in range(3):
+            cache.fetch('onecall:1:2', 600, lambda: client.get_json(f"{stub.url}/data/3.0/onecall"))
+        client.get_json(f"{stub.url}/missing")
+
+    text = enabled.render()
+    assert 'ccs_upstream_requests_total{endpoint="onecall",status="200"} 1' in text
+    assert 'ccs_upstream_requests_total{endpoint="other",status="200"} 1' in text
+    assert 'ccs_upstream_seconds_count{endpoint="onecall"} 1' in text
+    assert 'ccs_cache_requests_total{cache="weather",result="hit"} 2' in text
+    assert 'ccs_cache_requests_total{cache="weather",result="miss"} 1' in text
+
+def test_metrics_endpoint(monkeypatch):
+    app = Flask(__name__)
+    app.register_blueprint(main)
+    client = app.test_client()
+    assert client.get('/metrics').status_code == 404
+
+    monkeypatch.setattr(metrics, 'enabled', True)
+    metrics.reset()
+    metrics.inc('ccs_sqlite_rows_total', 5, table='user_scores')
+    res = client.get('/metrics')
+    metrics.reset()
+    assert res.status_code == 200 and res.mimetype == 'text/plain'
+    assert 'ccs_sqlite_rows_total{table="user_scores"} 5' in res.get_data(as_text=True)
+
+def test_shared_dir_sums_every_process(tmp_path):
+    import multiprocessing
+
+    m = Metrics(enabled=True, shared_dir=str(tmp_path), flush_interval=0.05)
+    m.inc('ccs_sqlite_rows_total', 5, table='user_scores')
+    m.observe('ccs_request_seconds', 0.002, endpoint='main.all_data')
+    m.flush()
+
+    def worker():
+        # A forked worker starts empty (the parent's series are in its file) and flushes in the background
+        m.inc('ccs_sqlite_rows_total', 2, table='user_scores')
+        m.observe('ccs_request_seconds', 0.2, endpoint='main.all_data')
+        time.sleep(0.3)
+
+    child = multiprocessing.get_context('fork').Process(target=worker)
+    child.start()
+    child.join()
+    assert child.exitcode == 0
+
+    text = m.render()
+    assert len(list(tmp_path.glob('*.json'))) == 2
+    assert 'ccs_sqlite_rows_total{table="user_scores"} 7' in text
+    assert 'ccs_request_seconds_bucket{endpoint="main.all_data",le="0.0025"} 1' in text
+    assert 'ccs_request_seconds_count{endpoint="main.all_data"} 2' in text
+
+    # Totals never go backwards: the child's file outlives it
+    m.inc('ccs_sqlite_rows_total', table='user_scores')
+    assert 'ccs_sqlite_rows_total{table="user_scores"} 8' in m.render()
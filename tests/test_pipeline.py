@@ -0,0 +1,30 @@
+import json
+from app import pipeline
+from weather_app.columnar import ColumnarForecast
+
+class DummyModel:
+    def predict(self, X):
+        return [6.0] * len(X)
+
+def fake_weather(api_key, lat, lon):
+    hourly = [{"dt": 1691232000 + i * 3600, "temp": 60 + i, "humidity": 40, "dew_point": 45} for i in range(6)]
+    forecast = ColumnarForecast.from_api({"list": []}, {"hourly": hourly}, now=1691232000)
+    current = {"temp": 61.0, "humidity": 40, "dew_point": 45.0, "wind_speed": 3, "wind_gust": 5, "wind_direction": 5}
+    return current, forecast, []
+
+def test_stream_yields_conditions_before_graphs(monkeypatch):
+    monkeypatch.setattr(pipeline, "fetch_columnar_weather_data", fake_weather)
+    stages = list(pipeline.stream_all_data(DummyModel(), "key", "Crag", 1.0, 2.0, 300))
+
+    assert [s["stage"] for s in stages] == ["conditions", "graph", "graph", "graph"]
+    assert [s["name"] for s in stages[1:]] == ["ccs", "temperature", "humidity"]
+    # figures are plain JSON objects, not pre-encoded strings
+    assert isinstance(stages[1]["figure"], dict)
+    json.dumps(stages)
+
+def test_stream_replays_precomputed_payload(monkeypatch):
+    monkeypatch.setattr(pipeline, "fetch_columnar_weather_data", fake_weather)
+    payload = pipeline.build_all_data(DummyModel(), "key", "Crag", 1.0, 2.0)
+    stages = list(pipeline.stream_all_data(None, None, "Crag", 1.0, 2.0, payload=payload))
+    assert stages[0]["conditions"] == payload["conditions"]
+    assert stages[3]["figure"] == payload["graphs"]["humidity"]
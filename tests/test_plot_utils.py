@@ -1,9 +1,22 @@
-from weather_app.plot_utils import process_hourly_data
+from weather_app.plot_utils import color_range_for_ccs, color_runs, plot_data, process_hourly_data
 
 class DummyModel:
     def predict(self, X):
         return [7.0 for _ in X]
 
+def dummy_entries(n):
+    return [
+        {
+            "dt": 1691232000,
+            "main": {"temp": 75, "humidity": 50, "dew_point": 55},
+            "weather": [{"id": 800}],
+            "pop": 0.2,
+            "wind": 5,
+            "rain_accumulation": 0.1
+        }
+        for _ in range(n)
+    ]
+
 def test_process_hourly_data_returns_expected_format():
     dummy_data = [
         {
@@ -17,4 +30,21 @@ def test_process_hourly_data_returns_expected_format():
     ]
     x, y, colors, labels, hover = process_hourly_data(dummy_data, DummyModel(), "score")
     assert isinstance(x, list)
-    assert len(x) == len(dummy_data)
\ No newline at end of file
+    assert len(x) == len(dummy_data)
+
+def test_color_runs_merge_adjacent_hours():
+    values = [7, 8, 5, 5, 2, 9]
+    runs = color_runs(values, color_range_for_ccs)
+    assert [r[:2] for r in runs] == [[0, 2], [2, 4], [4, 5]]
+    # every hour keeps the color it had as an individual band
+    for start, end, color in runs:
+        assert all(color_range_for_ccs(values[i]) == color for i in range(start, end))
+
+def test_plot_data_emits_one_shape_per_run():
+    x, y, colors, labels, hover = process_hourly_data(
+        [dict(d, dt=1691232000 + i * 3600) for i, d in enumerate(dummy_entries(6))], DummyModel(), "score"
+    )
+    fig = plot_data(x, y, colors, labels, hover, "CCS", "CCS", color_range_for_ccs)
+    rects = [s for s in fig.layout.shapes if s.type == "rect"]
+    assert len(rects) == 1
+    assert (rects[0].x0, rects[0].x1) == (0, 5)
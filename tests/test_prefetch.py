@@ -0,0 +1,68 @@
+from app.prefetch import PrefetchScheduler, try_acquire_leader
+from weather_app.cache import MemoryCache
+
+DESTINATIONS = {"A": (1.0, 2.0), "B": (3.0, 4.0)}
+
+def test_run_cycle_stores_payload_per_destination_and_offset():
+    calls = []
+
+    def build(destination, lat, lon, tz_offset):
+        calls.append((destination, tz_offset))
+        return {"destination": destination, "tz_offset": tz_offset}
+
+    scheduler = PrefetchScheduler(DESTINATIONS, build, MemoryCache(), interval=0, rate_limit=600, tz_offsets=(300, 420))
+    scheduler.run_cycle()
+
+    assert len(calls) == 4
+    assert scheduler.get("B", 420, max_age=60) == {"destination": "B", "tz_offset": 420}
+    assert scheduler.get("B", 0, max_age=60) is None
+    status = scheduler.status()
+    assert status["warm"] == 2 and status["total"] == 2
+
+def test_failed_refresh_is_reported():
+    scheduler = PrefetchScheduler(DESTINATIONS, lambda *args: None, MemoryCache(), interval=0, rate_limit=600)
+    scheduler.run_cycle()
+    status = scheduler.status()
+    assert status["warm"] == 0
+    assert status["destinations"]["A"]["error"]
+
+def test_only_one_leader(tmp_path):
+    path = str(tmp_path / "prefetch.lock")
+    first = try_acquire_leader(path)
+    assert first is not None
+    assert try_acquire_leader(path) is None
+    first.close()
+    second = try_acquire_leader(path)
+    assert second is not None
+    second.close()
+
+def test_cached_prefetch_response_reads_no_payload(tmp_path):
+    from flask import Flask
+    from app.registry import ModelRegistry
+    from app.routes import main
+    from weather_app.cache import SQLiteCache
+    from weather_app.coalesce import SingleFlight
+
+    class CountingStore(SQLiteCache):
+        reads = 0
+
+        def get(self, key):
+            CountingStore.reads += 1
+            return super().get(key)
+
+    destination, payload = "Eldorado Canyon, CO", {"conditions": {}, "graphs": {}}
+    scheduler = PrefetchScheduler({destination: (39.93, -105.28)}, lambda *args: payload,
+                                  CountingStore(str(tmp_path / "prefetch.sqlite")), interval=60, rate_limit=600)
+    scheduler.run_cycle()
+    app = Flask(__name__)
+    app.register_blueprint(main)
+    app.extensions.update(prefetch=scheduler, response_cache=MemoryCache(), response_flight=SingleFlight(),
+                          models=ModelRegistry('rf', load=lambda name: None, names=('rf',), pointer_path=None))
+    app.config['RESPONSE_GZIP_LEVEL'] = 1
+    client = app.test_client()
+
+    for _ in range(3):
+        assert client.get('/all_data', query_string={'destination': destination}).get_json() == payload
+        assert client.get('/all_data/stream', query_string={'destination': destination}).data.count(b'\n') == 1
+    assert CountingStore.reads == 2
+    assert scheduler.status()["warm"] == 1 and CountingStore.reads == 2
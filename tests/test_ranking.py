@@ -0,0 +1,91 @@
+import numpy as np
+from flask import Flask
+from app import pipeline
+from app.registry import ModelRegistry
+from app.routes import main
+from weather_app.columnar import ColumnarForecast, SOURCE_HOURLY, SOURCE_3_HOUR
+from weather_app.ranking import rank_destinations
+
+NOW = 1691232000
+
+def make_forecast(n, step=3600, source=SOURCE_HOURLY):
+    forecast = ColumnarForecast.empty(n)
+    forecast.dt[:] = NOW + np.arange(n) * step
+    forecast.source[:] = source
+    forecast.temp[:] = 60
+    forecast.humidity[:] = 40
+    forecast.wind[:] = 5
+    return forecast
+
+def test_ranks_by_mean_or_peak():
+    forecasts = {'steady': make_forecast(6), 'spiky': make_forecast(6)}
+    scores = {'steady': np.full(6, 7.0), 'spiky': np.array([2, 2, 10, 2, 2, 2], dtype=float)}
+
+    by_mean = rank_destinations(forecasts, scores, NOW, NOW + 6 * 3600, by='mean')
+    assert [r['name'] for r in by_mean] == ['steady', 'spiky']
+    assert by_mean[0]['mean_ccs'] == 7.0 and by_mean[0]['climbable_hours'] == 6.0
+
+    by_peak = rank_destinations(forecasts, scores, NOW, NOW + 6 * 3600, by='peak')
+    assert [r['name'] for r in by_peak] == ['spiky', 'steady']
+
+def test_window_and_filters_limit_the_rows_counted():
+    forecast = make_forecast(6)
+    forecast.pop[1] = 0.8
+    forecast.wind[2] = 30
+    forecast.wind[3] = np.nan
+    scores = {'crag': np.array([9, 10, 10, 5, 5, 1], dtype=float)}
+
+    result = rank_destinations({'crag': forecast}, scores, NOW, NOW + 4 * 3600, max_pop=30, max_wind=20)
+    assert result == [{'name': 'crag', 'mean_ccs': 7.0, 'peak_ccs': 9.0, 'climbable_hours': 2.0,
+                       'window_hours': 4.0, 'max_precip': 80.0, 'max_wind': 30}]
+
+def test_mean_is_time_weighted_and_unclimbable_crags_dropped():
+    tiers = make_forecast(2)
+    tiers.source[1] = SOURCE_3_HOUR
+    wet = make_forecast(3)
+    wet.pop[:] = 1.0
+    result = rank_destinations({'tiers': tiers, 'wet': wet}, {'tiers': np.array([4.0, 8.0]), 'wet': np.full(3, 9.0)},
+                               NOW, NOW + 86400, max_pop=50)
+    assert [r['name'] for r in result] == ['tiers']
+    assert result[0]['mean_ccs'] == 7.0  # 1 h at 4, 3 h at 8
+
+class CountingModel:
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, X):
+        self.calls.append(len(X))
+        return np.asarray(X)[:, 0] / 10
+
+def test_build_ranking_scores_every_destination_in_one_call(monkeypatch):
+    forecasts = {f"crag {i}": make_forecast(24) for i in range(5)}
+    for i, forecast in enumerate(forecasts.values()):
+        forecast.temp[:] = 50 + i
+    monkeypatch.setattr(pipeline, "fetch_forecasts", lambda api_key, destinations: forecasts)
+    model = CountingModel()
+
+    result = pipeline.build_ranking(model, "key", dict.fromkeys(forecasts, (0, 0)), start=NOW, end=NOW + 86400, top_n=3)
+    assert model.calls == [120]
+    assert [r['name'] for r in result] == ['crag 4', 'crag 3', 'crag 2']
+
+def test_rank_endpoint_clamps_top_n(monkeypatch):
+    monkeypatch.setattr(pipeline, "fetch_forecasts",
+                        lambda api_key, destinations: {name: make_forecast(24) for name in destinations})
+    app = Flask(__name__)
+    app.register_blueprint(main)
+    app.extensions['models'] = ModelRegistry('rf', load=lambda name: CountingModel(), names=('rf',), pointer_path=None)
+    client = app.test_client()
+
+    def ranked(top_n):
+        query = {'start': NOW, 'end': NOW + 86400, 'south': 38, 'west': -106, 'north': 41, 'east': -104, 'top_n': top_n}
+        return client.get('/api/rank', query_string=query).get_json()
+
+    considered = ranked(3)['considered']
+    assert considered > 3 and len(ranked(3)['crags']) == 3
+    assert len(ranked(-5)['crags']) == 1
+    assert len(ranked(0)['crags']) == 1
+    assert len(ranked(10 ** 6)['crags']) == considered
+
+    inverted = client.get('/api/rank', query_string={'south': 41, 'west': -106, 'north': 38, 'east': -104})
+    assert inverted.status_code == 400
+    assert inverted.get_json() == client.get('/api/crags/bbox?south=41&west=-106&north=38&east=-104').get_json()
@@ -0,0 +1,110 @@
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+import pytest
+from app.registry import Histogram, ModelRegistry
+
+class DummyModel:
+    def __init__(self, offset=0.0, delay=0.0):
+        self.offset = offset
+        self.delay = delay
+
+    def predict(self, X):
+        time.sleep(self.delay)
+        X = np.asarray(X, dtype=float)
+        return X[:, 0] / 10 + self.offset
+
+def make_registry(tmp_path, **kwargs):
+    loads = []
+
+    def load(name):
+        loads.append(name)
+        return DummyModel(offset={'rf': 0.0, 'dt': 0.5}[name])
+
+    registry = ModelRegistry('rf', load=load, names=('rf', 'dt'), pointer_path=str(tmp_path / 'CURRENT'), **kwargs)
+    return registry, loads
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def test_models_load_lazily_once_and_keep_a_stable_version(tmp_path):
+    registry, loads = make_registry(tmp_path)
+    assert loads == []
+    assert registry.get().predict([[60, 40]])[0] == 6.0
+    assert registry.get('dt').predict([[60, 40]])[0] == 6.5
+    registry.get('dt')
+    assert loads == ['rf', 'dt']
+    assert registry.get().version == 'rf' and registry.get('dt').version == 'dt'
+    with pytest.raises(KeyError):
+        registry.get('svm')
+    with pytest.raises(ValueError):
+        ModelRegistry('svm', load=lambda name: DummyModel(), names=('rf',))
+
+def test_latency_is_recorded_per_model(tmp_path):
+    registry, _ = make_registry(tmp_path)
+    registry.get().predict([[60, 40], [70, 30]])
+    registry.get('dt').predict([[60, 40]])
+    latency = registry.status()['latency_ms']
+    assert latency['rf']['count'] == 1 and latency['rf']['rows'] == 2
+    assert latency['dt']['count'] == 1 and latency['dt']['rows'] == 1
+
+def test_shadow_scores_default_model_batches_in_background(tmp_path):
+    registry, loads = make_registry(tmp_path, shadow='dt')
+    registry.get().predict([[60, 40], [80, 40]])
+    registry.get('dt').predict([[60, 40]])  # only the default model is shadowed
+    assert wait_for(lambda: 'dt-rf' in registry.status()['score_diff'])
+    diff = registry.status()['score_diff']['dt-rf']
+    assert diff['count'] == 2
+    assert diff['mean'] == 0.5 and diff['mean_signed'] == 0.5
+    assert loads == ['rf', 'dt']
+
+def test_shadow_drops_batches_when_behind(tmp_path):
+    registry, _ = make_registry(tmp_path, shadow='dt', max_shadow_pending=1)
+    registry._holders['dt'] = registry._load_holder('dt')
+    registry.get('dt').model.delay = 0.2
+    for _ in range(5):
+        registry.get().predict([[60, 40]])
+    assert registry.shadow_dropped >= 3
+
+SHADOW_UNDER_GEVENT = """
+from gevent import monkey; monkey.patch_all()
+import time
+import numpy as np
+from app.concurrency import run_cpu
+from app.registry import make_registry_from_env
+
+class Model:
+    def __init__(self, offset):
+        self.offset = offset
+
+    def predict(self, X):
+        time.sleep(0.01)
+        return np.asarray(X, dtype=float)[:, 0] / 10 + self.offset
+
+registry = make_registry_from_env(load=lambda name: Model({'rf': 0.0, 'dt': 0.5}[name]), pointer_path=None)
+for _ in range(5):
+    run_cpu(registry.get().predict, [[60, 40]])
+deadline = time.monotonic() + 10
+while registry._shadow_pending and time.monotonic() < deadline:
+    time.sleep(0.01)
+print(registry.status()['score_diff']['dt-rf']['count'], registry._shadow_pending)
+"""
+
+def test_shadow_scoring_from_run_cpu_under_gevent():
+    pytest.importorskip('gevent')
+    env = dict(os.environ, CCS_MODEL='rf', CCS_SHADOW_MODEL='dt')
+    out = subprocess.run([sys.executable, '-c', SHADOW_UNDER_GEVENT], capture_output=True, text=True, timeout=60, env=env)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.split()[-2:] == ['5', '0']
+
+def test_histogram_quantiles():
+    hist = Histogram((1, 2, 5, float('inf')))
+    hist.add([0.5, 0.5, 1.5, 4, 10])
+    assert hist.counts.tolist() == [2, 1, 1, 1]
+    assert hist.quantile(0.5) == 2
+    assert hist.summary()['max'] == 10
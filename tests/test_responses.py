@@ -0,0 +1,100 @@
+import gzip
+import json
+import threading
+import time
+from flask import Flask
+from app import routes
+from app.responses import EncodedResponse, send_encoded
+from weather_app.cache import MemoryCache
+from weather_app.coalesce import SingleFlight
+
+PAYLOAD = {"conditions": {"climbing_conditions_score": 7.5}, "graphs": {"ccs": {"data": [], "layout": {}}}}
+
+def make_client():
+    app = Flask(__name__)
+    encoded = EncodedResponse(PAYLOAD)
+    app.add_url_rule('/data', 'data', lambda: send_encoded(encoded))
+    return app.test_client()
+
+def test_gzip_and_identity_have_distinct_strong_etags():
+    client = make_client()
+    zipped = client.get('/data', headers={'Accept-Encoding': 'gzip'})
+    plain = client.get('/data')
+
+    assert zipped.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(zipped.data)) == PAYLOAD
+    assert json.loads(plain.data) == PAYLOAD
+    assert zipped.headers['ETag'] != plain.headers['ETag']
+    assert zipped.headers['Vary'] == 'Accept-Encoding'
+
+def test_if_none_match_returns_304():
+    client = make_client()
+    etag = client.get('/data', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+    res = client.get('/data', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert res.status_code == 304
+    assert res.data == b''
+    assert client.get('/data', headers={'If-None-Match': '"stale"'}).status_code == 200
+
+def test_gzip_refused_with_zero_quality():
+    client = make_client()
+    res = client.get('/data', headers={'Accept-Encoding': 'gzip;q=0, identity'})
+    assert 'Content-Encoding' not in res.headers
+    assert json.loads(res.data) == PAYLOAD
+
+def test_concurrent_misses_encode_once(monkeypatch):
+    app = Flask(__name__)
+    app.extensions['response_cache'] = MemoryCache()
+    app.extensions['response_flight'] = SingleFlight()
+    app.config['RESPONSE_GZIP_LEVEL'] = 9
+    encodes = []
+
+    def encode(payload, level):
+        encodes.append(level)
+        return EncodedResponse(payload, level)
+
+    def build_payload():
+        time.sleep(0.2)
+        return PAYLOAD
+
+    monkeypatch.setattr(routes, 'EncodedResponse', encode)
+    results = []
+
+    def request():
+        with app.app_context():
+            results.append(routes._encoded('k', build_payload))
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert encodes == [9]
+    assert len(results) == 8 and all(r is results[0] for r in results)
+
+def test_repeat_stream_replays_cached_lines(monkeypatch):
+    from app import pipeline
+    from app.registry import ModelRegistry
+    from weather_app import plot_utils
+    from tests.test_pipeline import DummyModel, fake_weather
+
+    monkeypatch.setattr(pipeline, 'fetch_columnar_weather_data', fake_weather)
+    figures = []
+    figure_dict = plot_utils.figure_dict
+    monkeypatch.setattr(plot_utils, 'figure_dict', lambda *args: figures.append(args[5]) or figure_dict(*args))
+    app = Flask(__name__)
+    app.register_blueprint(routes.main)
+    app.extensions['models'] = ModelRegistry('rf', load=lambda name: DummyModel(), names=('rf',), pointer_path=None)
+    app.extensions['neutral_cache'] = MemoryCache()
+    app.extensions['response_cache'] = MemoryCache()
+    client = app.test_client()
+    query = {'destination': 'Eldorado Canyon, CO', 'tz_offset': 300}
+
+    first = client.get('/all_data/stream', query_string=query).data
+    assert len(figures) == 3
+    assert client.get('/all_data/stream', query_string=query).data == first
+    assert len(figures) == 3
+    assert [json.loads(line)['stage'] for line in first.splitlines()] == ['conditions', 'graph', 'graph', 'graph']
+
+    assert client.get('/all_data/stream', query_string=dict(query, tz_offset=0)).data != first
+    assert len(figures) == 6
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from sklearn.tree import DecisionTreeRegressor
+from app.score_surface import ScoreSurface, build_table, check_error_bound, get_or_build_surface
+
+def make_tree():
+    rng = np.random.default_rng(1)
+    X = np.column_stack((rng.integers(25, 101, 400), rng.integers(10, 81, 400))).astype(float)
+    y = np.clip(10 - np.abs(X[:, 0] - 55) / 5 - X[:, 1] / 20, 0, 10)
+    return DecisionTreeRegressor(random_state=42).fit(X, y)
+
+def test_surface_matches_tree_model():
+    model = make_tree()
+    surface = ScoreSurface(model, build_table(model))
+    rng = np.random.default_rng(2)
+    X = np.column_stack((rng.uniform(-60, 140, 500), rng.integers(0, 101, 500)))
+    assert np.allclose(surface.predict(X), model.predict(X))
+
+def test_error_bound_rejects_coarse_interpolated_grid():
+    model = make_tree()
+    surface = ScoreSurface(model, build_table(model, step=10.0), step=10.0, interpolate=True)
+    with pytest.raises(ValueError):
+        check_error_bound(surface, model, max_error=0.05)
+
+def test_surface_cached_next_to_model(tmp_path):
+    model_path = tmp_path / 'model.pkl'
+    model_path.write_bytes(b'model bytes')
+    get_or_build_surface(make_tree(), str(model_path))
+    assert len(list(tmp_path.glob('model.surface-*.npz'))) == 1
@@ -0,0 +1,28 @@
+import subprocess
+import sys
+from app.profile_startup import parse_importtime
+from app.startup import memory_usage, process_uptime
+
+IMPORTTIME = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     numpy.core
+import time:       300 |        420 |   numpy
+import time:        50 |        470 | app
+"""
+
+def test_parse_importtime():
+    assert parse_importtime(IMPORTTIME) == [
+        ('numpy.core', 120, 120, 2),
+        ('numpy', 300, 420, 1),
+        ('app', 50, 470, 0)
+    ]
+
+def test_memory_and_uptime_are_reported():
+    usage = memory_usage()
+    assert usage['rss'] > 0
+    uptime = process_uptime()
+    assert uptime is None or uptime > 0
+
+def test_serving_imports_skip_training_and_plotting_libraries():
+    code = "import sys, app, app.routes; print(sorted({'pandas', 'sklearn', 'plotly'} & set(sys.modules)))"
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    assert out.strip() == '[]'
@@ -0,0 +1,39 @@
+import numpy as np
+from app.train import candidates, choose, evaluate, holdout, kfold, search
+
+def make_data(n=300):
+    rng = np.random.default_rng(0)
+    X = np.column_stack((rng.integers(25, 101, n), rng.integers(10, 81, n))).astype(float)
+    y = np.clip(10 - np.abs(X[:, 0] - 55) / 5 - X[:, 1] / 20, 0, 10)
+    return X, y
+
+def test_kfold_partitions_rows():
+    folds = kfold(23, 5)
+    tests = np.concatenate([test for _, test in folds])
+    assert sorted(tests.tolist()) == list(range(23))
+    for train, test in folds:
+        assert not set(train) & set(test) and len(train) + len(test) == 23
+
+def test_candidates_cover_the_grid():
+    space = {'dt': {'max_depth': [None, 4], 'min_samples_leaf': [1, 2, 3]}}
+    assert len(list(candidates(['dt'], space))) == 6
+
+def test_evaluate_reports_accuracy_speed_and_size():
+    X, y = make_data()
+    result = evaluate('dt', {'max_depth': 6}, X[:240], y[:240], folds=3)
+    assert result['cv_mse'] >= 0 and result['cv_r2'] > 0.5 and 'holdout_mse' not in result
+    assert result['fit_s'] > 0 and result['predict_1k_ms'] > 0
+    assert result['pickle_kb'] > 0 and result['compiled_kb'] > 0
+
+def test_search_and_choose_fastest_within_bound():
+    X, y = make_data()
+    space = {'dt': {'max_depth': [2, None]}, 'rf': {'n_estimators': [5], 'max_depth': [None]}}
+    results = search(X, y, ('dt', 'rf'), folds=3, workers=2, space=space)
+    assert len(results) == 3
+    assert [r['cv_mse'] for r in results] == sorted(r['cv_mse'] for r in results)
+
+    assert choose(results) == results[0]  # lowest CV MSE
+    loose = max(r['cv_mse'] for r in results)
+    assert choose(results, loose) == min(results, key=lambda r: r['predict_1k_ms'])
+    mse, r2 = holdout(choose(results), X, y)
+    assert mse >= 0 and r2 > 0.5
@@ -1,5 +1,10 @@
 import pytest
-from weather_app.utils import calculate_dew_point, calculate_climbing_conditions_score
+from weather_app.utils import (
+    calculate_dew_point,
+    calculate_climbing_conditions_score,
+    calculate_climbing_conditions_scores,
+    score_adapted
+)
 
 class DummyModel:
     def predict(self, X):
@@ -17,3 +22,28 @@ def test_calculate_climbing_conditions_score_dew_diff():
     model = DummyModel()
     score = calculate_climbing_conditions_score(model, 60, 50, 70)
     assert 0 <= score
+
+class CountingModel(DummyModel):
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, X):
+        self.calls += 1
+        return super().predict(X)
+
+def test_calculate_climbing_conditions_scores_matches_scalar():
+    model = DummyModel()
+    temps, hums, dews = [70, 55.5, 40], [50, 80, 100], [70, 40, 40]
+    scores = calculate_climbing_conditions_scores(model, dews, hums, temps)
+    expected = [calculate_climbing_conditions_score(model, d, h, t) for d, h, t in zip(dews, hums, temps)]
+    assert list(scores) == expected
+
+def test_score_adapted_single_predict_call():
+    model = CountingModel()
+    adapted = [
+        {"dt": 1691232000 + i * 3600, "main": {"temp": 60 + i, "humidity": 40, "dew_point": 50}}
+        for i in range(48)
+    ]
+    scores = score_adapted(model, adapted)
+    assert len(scores) == 48
+    assert model.calls == 1
@@ -1,15 +1,62 @@
+import threading
+import time
 import pytest
 from unittest.mock import patch
+from weather_app.cache import MemoryCache, ResponseCache, SQLiteCache
 from weather_app.weather_api import fetch_weather_data
 
-@patch('weather_app.weather_api.requests.get')
+@patch('weather_app.weather_api.http_client.session.get')
 def test_fetch_weather_data_success(mock_get):
     mock_get.return_value.status_code = 200
     mock_get.return_value.json.return_value = {"sample": "data"}
 
     api_key = "dummy"
     lat, lon = 35.0, -120.0
-    data_2_5, data_3_0 = fetch_weather_data(api_key, lat, lon)
+    data_2_5, data_3_0 = fetch_weather_data(api_key, lat, lon, ResponseCache(MemoryCache()))
 
     assert data_2_5 is not None
-    assert data_3_0 is not None
\ No newline at end of file
+    assert data_3_0 is not None
+
+@patch('weather_app.weather_api.http_client.session.get')
+def test_fetch_weather_data_uses_cache_for_shared_coordinates(mock_get):
+    mock_get.return_value.status_code = 200
+    mock_get.return_value.json.return_value = {"sample": "data"}
+    cache = ResponseCache(MemoryCache())
+
+    fetch_weather_data("dummy", 32.5900, -107.9758, cache)
+    fetch_weather_data("dummy", 32.59001, -107.97579, cache)
+
+    assert mock_get.call_count == 2  # one call per endpoint, second lookup served from cache
+
+def test_response_cache_serves_stale_and_refreshes():
+    backend = MemoryCache()
+    cache = ResponseCache(backend, grace=60)
+    backend.set("k", "old", stored_at=time.time() - 30)
+    refreshed = threading.Event()
+
+    def loader():
+        refreshed.set()
+        return "new"
+
+    assert cache.fetch("k", 10, loader) == "old"
+    assert refreshed.wait(2)
+    for _ in range(50):
+        if backend.get("k")[0] == "new":
+            break
+        time.sleep(0.01)
+    assert backend.get("k")[0] == "new"
+
+def test_response_cache_keeps_expired_value_when_reload_fails():
+    backend = MemoryCache()
+    cache = ResponseCache(backend, grace=60)
+    backend.set("k", "old", stored_at=time.time() - 3600)
+
+    assert cache.fetch("k", 10, lambda: None) == "old"
+    assert cache.fetch("missing", 10, lambda: None) is None
+    assert cache.fetch("k", 10, lambda: "new") == "new"
+
+def test_sqlite_cache_round_trip(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite"))
+    cache.set("k", {"list": [1, 2]})
+    assert cache.get("k")[0] == {"list": [1, 2]}
+    assert cache.get("missing") is None
@@ -0,0 +1,70 @@
+import numpy as np
+from flask import Flask
+from app import pipeline
+from app.registry import ModelRegistry
+from app.routes import CLIMBING_DESTINATIONS, main
+from weather_app.columnar import ColumnarForecast, SOURCE_HOURLY, SOURCE_3_HOUR
+from weather_app.windows import find_climbing_windows
+
+def make_forecast(n, source=SOURCE_HOURLY, step=3600):
+    forecast = ColumnarForecast.empty(n)
+    forecast.dt[:] = 1691232000 + np.arange(n) * step
+    forecast.source[:] = source
+    forecast.wind[:] = 5
+    return forecast
+
+def test_finds_runs_and_ranks_by_mean_ccs():
+    forecast = make_forecast(12)
+    scores = np.array([7, 7, 7, 2, 8, 9, 9, 9, 2, 7, 2, 2], dtype=float)
+    windows = find_climbing_windows(forecast, scores, min_hours=2, min_ccs=6)
+
+    assert [(w['hours'], w['peak_ccs']) for w in windows] == [(4.0, 9.0), (3.0, 7.0)]
+    assert windows[0]['start'] == int(forecast.dt[4])
+    assert windows[0]['end'] == int(forecast.dt[8])
+
+def test_filters_rain_and_wind():
+    forecast = make_forecast(6)
+    forecast.pop[2] = 0.8
+    forecast.wind[4] = 30
+    forecast.wind[5] = np.nan
+    windows = find_climbing_windows(forecast, np.full(6, 8.0), min_hours=1, max_pop=30, max_wind=20)
+    assert [w['hours'] for w in windows] == [2.0, 1.0, 1.0]
+
+def test_three_hour_rows_cover_three_hours():
+    forecast = make_forecast(2, SOURCE_3_HOUR, 3 * 3600)
+    windows = find_climbing_windows(forecast, np.array([8.0, 8.0]), min_hours=6)
+    assert windows[0]['hours'] == 6.0
+
+class TempModel:
+    def predict(self, X):
+        return np.asarray(X, dtype=float)[:, 0] / 10
+
+def test_windows_endpoint(monkeypatch):
+    forecast = make_forecast(12)
+    forecast.temp[:] = [70, 70, 70, 20, 80, 90, 90, 90, 20, 70, 20, 20]
+    forecast.dew_point[:] = 0
+    fetched = []
+
+    def fetch_forecasts(api_key, destinations):
+        fetched.append(list(destinations))
+        return {name: forecast for name in destinations}
+
+    monkeypatch.setattr(pipeline, "fetch_forecasts", fetch_forecasts)
+    app = Flask(__name__)
+    app.register_blueprint(main)
+    app.extensions['models'] = ModelRegistry('rf', load=lambda name: TempModel(), names=('rf',), pointer_path=None)
+    client = app.test_client()
+
+    one = client.get('/api/windows', query_string={'destination': 'Eldorado Canyon, CO', 'min_hours': 2}).get_json()
+    assert list(one) == ['Eldorado Canyon, CO']
+    assert [(w['hours'], w['peak_ccs']) for w in one['Eldorado Canyon, CO']] == [(4.0, 9.0), (3.0, 7.0)]
+
+    every = client.get('/api/windows?destination=all&top_n=1').get_json()
+    assert set(every) == set(CLIMBING_DESTINATIONS) and all(len(w) == 1 for w in every.values())
+    assert len(fetched) == 2  # every destination in one fetch_forecasts call
+
+    for top_n in (0, -1):
+        clamped = client.get('/api/windows', query_string={'destination': 'Eldorado Canyon, CO', 'top_n': top_n})
+        assert len(clamped.get_json()['Eldorado Canyon, CO']) == 1
+
+    assert client.get('/api/windows?destination=Nowhere').status_code == 400
@@ -0,0 +1,167 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from .coalesce import SingleFlight
+from .metrics import metrics
+
+
+def cache_key(endpoint, lat, lon, precision=2):
+    """Key by rounded coordinates so crags sharing a location share an entry."""
+    return f"{endpoint}:{round(float(lat), precision):.{precision}f}:{round(float(lon), precision):.{precision}f}"
+
+
+class MemoryCache:
+    """Thread-safe in-process LRU of (value, stored_at) pairs."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def stored_at(self, key):
+        entry = self.get(key)
+        return entry[1] if entry is not None else None
+
+    def set(self, key, value, stored_at=None):
+        with self._lock:
+            self._entries[key] = (value, time.time() if stored_at is None else stored_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCache:
+    """JSON responses in a local SQLite file, shared by every worker on the box."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS weather_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                stored_at REAL
+            )
+        ''')
+        conn.commit()
+
+    def _connection(self):
+        # A connection inherited through fork (e.g. gunicorn preload) is never reused
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._connection().execute(
+            'SELECT value, stored_at FROM weather_cache WHERE key = ?', (key,)
+        ).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def stored_at(self, key):
+        """When ``key`` was stored, without reading or decoding its value."""
+        row = self._connection().execute('SELECT stored_at FROM weather_cache WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, stored_at=None):
+        conn = self._connection()
+        conn.execute(
+            'INSERT OR REPLACE INTO weather_cache (key, value, stored_at) VALUES (?, ?, ?)',
+            (key, json.dumps(value), time.time() if stored_at is None else stored_at)
+        )
+        conn.commit()
+
+    def clear(self):
+        conn = self._connection()
+        conn.execute('DELETE FROM weather_cache')
+        conn.commit()
+
+
+class ResponseCache:
+    """TTL cache with stale-while-revalidate on top of a storage backend.
+
+    Fresh entries (age <= ttl) are returned as is. Entries within the grace
+    window after that are returned stale while one background thread reloads
+    them. Anything older, or missing, is loaded synchronously, once per key no
+    matter how many threads miss at the same time. Failed loads (None) are
+    never stored; an expired entry is returned instead when there is one.
+    """
+
+    def __init__(self, backend, grace=1800, name='weather'):
+        self.backend = backend
+        self.grace = grace
+        self.name = name
+        self._flight = SingleFlight()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def fetch(self, key, ttl, loader):
+        entry = self.backend.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age <= ttl:
+                metrics.inc('ccs_cache_requests_total', cache=self.name, result='hit')
+                return value
+            if age <= ttl + self.grace:
+                metrics.inc('ccs_cache_requests_total', cache=self.name, result='stale')
+                self._refresh_in_background(key, loader)
+                return value
+
+        metrics.inc('ccs_cache_requests_total', cache=self.name, result='miss')
+        value = self._flight.do(key, lambda: self._load(key, loader))
+        if value is None and entry is not None:
+            return entry[0]
+        return value
+
+    def _load(self, key, loader):
+        value = loader()
+        if value is not None:
+            self.backend.set(key, value)
+        return value
+
+    def _refresh_in_background(self, key, loader):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._load(key, loader)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+
+def make_cache_from_env():
+    backend = os.getenv("WEATHER_CACHE_BACKEND", "memory")
+    if backend == "none":
+        return None
+    if backend == "sqlite":
+        path = os.getenv("WEATHER_CACHE_PATH", os.path.join(os.getcwd(), "weather_cache.sqlite"))
+        store = SQLiteCache(path)
+    else:
+        store = MemoryCache(int(os.getenv("WEATHER_CACHE_SIZE", "256")))
+    return ResponseCache(store, grace=int(os.getenv("WEATHER_CACHE_GRACE", "1800")))
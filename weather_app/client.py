@@ -0,0 +1,83 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .metrics import metrics
+
+OPENWEATHER_BASE_URL = os.getenv("OPENWEATHER_BASE_URL", "https://api.openweathermap.org")
+OPEN_METEO_BASE_URL = os.getenv("OPEN_METEO_BASE_URL", "https://api.open-meteo.com")
+
+# Metric label per upstream path
+ENDPOINTS = {
+    "/data/2.5/forecast": "forecast",
+    "/data/3.0/onecall": "onecall",
+    "/v1/forecast": "open_meteo"
+}
+
+
+class HttpClient:
+    """Keep-alive connection pool shared by every upstream call in the process.
+
+    A small thread pool lets callers issue independent requests concurrently
+    over the same pooled connections.
+    """
+
+    def __init__(self, pool_size=20, retries=2, connect_timeout=3.05, read_timeout=10, max_workers=8):
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=0.2,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=("GET",),
+                raise_on_status=False
+            )
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upstream")
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            pool_size=int(os.getenv("HTTP_POOL_SIZE", "20")),
+            retries=int(os.getenv("HTTP_RETRIES", "2")),
+            connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05")),
+            read_timeout=float(os.getenv("HTTP_READ_TIMEOUT", "10")),
+            max_workers=int(os.getenv("HTTP_MAX_WORKERS", "8"))
+        )
+
+    def get(self, url, params=None):
+        if not metrics.enabled:
+            return self.session.get(url, params=params, timeout=self.timeout)
+
+        endpoint = ENDPOINTS.get(urlparse(url).path, "other")
+        start = time.perf_counter()
+        status = "error"
+        try:
+            res = self.session.get(url, params=params, timeout=self.timeout)
+            status = str(res.status_code)
+            return res
+        finally:
+            metrics.observe("ccs_upstream_seconds", time.perf_counter() - start, endpoint=endpoint)
+            metrics.inc("ccs_upstream_requests_total", endpoint=endpoint, status=status)
+
+    def get_json(self, url, params=None):
+        try:
+            res = self.get(url, params)
+            return res.json() if res.status_code == 200 else None
+        except (requests.RequestException, ValueError) as e:
+            print("Request error:", e)
+            return None
+
+    def submit(self, fn, *args, **kwargs):
+        return self.executor.submit(fn, *args, **kwargs)
+
+
+http_client = HttpClient.from_env()
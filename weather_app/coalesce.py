@@ -0,0 +1,100 @@
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive flock, shared by every process on the box.
+
+    gevent doesn't patch flock, and one greenlet blocked in it would stall
+    every other greenlet in the worker, so waiters poll a non-blocking flock
+    and sleep in between (a yield under gevent). Without flock (Windows)
+    nothing is locked, and SingleFlight only coalesces within each process.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(path, 'a+') as handle:
+        delay = 0.001
+        while True:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                time.sleep(delay)
+                delay = min(delay * 2, 0.05)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one computation.
+
+    Within a process, callers that arrive while a key is in flight wait for it
+    and get the same result (or exception). With ``lock_dir`` set, one worker
+    at a time computes a key; with a shared ``store`` as well, workers that
+    queued on the lock reuse the result it stored instead of recomputing.
+    """
+
+    def __init__(self, lock_dir=None, store=None):
+        self.lock_dir = lock_dir
+        self.store = store
+        self._calls = {}
+        self._lock = threading.Lock()
+        if lock_dir:
+            os.makedirs(lock_dir, exist_ok=True)
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._across_workers(key, fn) if self.lock_dir else fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def _across_workers(self, key, fn):
+        requested_at = time.time()
+        path = os.path.join(self.lock_dir, hashlib.sha1(key.encode()).hexdigest() + '.lock')
+        with file_lock(path):
+            if self.store is not None:
+                entry = self.store.get(key)
+                if entry is not None and entry[1] >= requested_at:
+                    return entry[0]
+            result = fn()
+            if self.store is not None and result is not None:
+                self.store.set(key, result)
+            return result
@@ -0,0 +1,134 @@
+import numpy as np
+from .utils import calculate_dew_point
+
+SOURCE_HOURLY, SOURCE_3_HOUR, SOURCE_DAILY = 0, 1, 2
+SOURCE_NAMES = ('hourly', '3-hour', 'daily')
+
+COLUMNS = ('dt', 'temp', 'humidity', 'dew_point', 'pop', 'wind', 'rain', 'weather_id', 'source')
+DTYPES = (np.int64, np.float64, np.float64, np.float64, np.float64, np.float64, np.float64, np.int32, np.int8)
+
+
+class ColumnarForecast:
+    """Forecast horizon stored as one NumPy array per field.
+
+    Rows are in time order. ``source`` marks which upstream tier each row came
+    from (SOURCE_HOURLY, SOURCE_3_HOUR or SOURCE_DAILY); a missing wind speed
+    is NaN.
+    """
+
+    __slots__ = COLUMNS
+
+    def __init__(self, dt, temp, humidity, dew_point, pop, wind, rain, weather_id, source):
+        self.dt = dt
+        self.temp = temp
+        self.humidity = humidity
+        self.dew_point = dew_point
+        self.pop = pop
+        self.wind = wind
+        self.rain = rain
+        self.weather_id = weather_id
+        self.source = source
+
+    def __len__(self):
+        return len(self.dt)
+
+    def shifted(self, seconds):
+        """Copy with timestamps moved by ``seconds``; the other columns are shared."""
+        columns = {name: getattr(self, name) for name in COLUMNS}
+        columns['dt'] = self.dt + seconds
+        return ColumnarForecast(**columns)
+
+    def take(self, index):
+        return ColumnarForecast(**{name: getattr(self, name)[index] for name in COLUMNS})
+
+    @classmethod
+    def empty(cls, n=0):
+        return cls(*(np.zeros(n, dtype=dtype) for dtype in DTYPES))
+
+    @classmethod
+    def from_api(cls, data_2_5, data_3_0, now):
+        """Merge the 3.0 hourly, 2.5 3-hourly and 3.0 daily tiers in a single pass."""
+        hourly = data_3_0.get("hourly", [])
+        three_hour = data_2_5.get("list", [])
+        daily = data_3_0.get("daily", [])
+        out = cls.empty(len(hourly) + len(three_hour) + len(daily))
+        n = 0
+
+        def put(dt, temp, humidity, dew_point, weather, pop, wind, rain, source):
+            nonlocal n
+            out.dt[n] = dt
+            out.temp[n] = temp
+            out.humidity[n] = humidity
+            out.dew_point[n] = dew_point
+            out.pop[n] = pop
+            out.wind[n] = np.nan if wind is None else wind
+            out.rain[n] = rain
+            out.weather_id[n] = (weather or [{"id": 800}])[0]["id"]
+            out.source[n] = source
+            n += 1
+
+        for entry in hourly:
+            if entry["dt"] >= now:
+                put(entry["dt"], entry["temp"], entry["humidity"], entry["dew_point"], entry.get("weather"),
+                    entry.get("pop", 0), entry.get("wind_speed", 0), entry.get("rain", {}).get("1h", 0),
+                    SOURCE_HOURLY)
+
+        max_ts = int(out.dt[:n].max()) if n else now
+        for entry in three_hour:
+            if entry["dt"] > max_ts:
+                temp = entry["main"]["temp"]
+                humidity = entry["main"]["humidity"]
+                put(entry["dt"], temp, humidity, calculate_dew_point(temp, humidity), entry.get("weather"),
+                    entry.get("pop", 0), entry.get("wind", {}).get("speed"), entry.get("rain", {}).get("3h", 0),
+                    SOURCE_3_HOUR)
+
+        max_ts = int(out.dt[:n].max()) if n else max_ts
+        for entry in daily:
+            dt = entry["dt"] + 12 * 3600
+            if dt > max_ts:
+                put(dt, entry["temp"]["day"], entry["humidity"], entry["dew_point"], entry.get("weather"),
+                    entry.get("pop", 0), entry.get("wind_speed", 0), entry.get("rain", 0),
+                    SOURCE_DAILY)
+
+        return out.take(slice(0, n))
+
+    @classmethod
+    def from_entries(cls, adapted):
+        """Build from the legacy list of ``adapt_entry`` dicts; rows without a ``source`` count as hourly."""
+        out = cls.empty(len(adapted))
+        for i, e in enumerate(adapted):
+            main = e['main']
+            wind = e.get('wind')
+            out.dt[i] = e['dt']
+            out.temp[i] = main['temp']
+            out.humidity[i] = main['humidity']
+            out.dew_point[i] = main['dew_point']
+            out.pop[i] = e.get('pop', 0)
+            out.wind[i] = np.nan if wind is None else wind
+            out.rain[i] = e.get('rain_accumulation') or 0
+            out.weather_id[i] = (e.get('weather') or [{"id": 800}])[0]['id']
+            out.source[i] = SOURCE_NAMES.index(e.get('source', 'hourly'))
+        return out
+
+    def to_entries(self):
+        """Expand back into the legacy list of dicts."""
+        return [
+            {
+                "dt": int(dt),
+                "main": {"temp": temp, "humidity": humidity, "dew_point": dew_point},
+                "weather": [{"id": int(weather_id)}],
+                "pop": pop,
+                "wind": None if wind != wind else wind,
+                "rain_accumulation": rain,
+                "source": SOURCE_NAMES[source]
+            }
+            for dt, temp, humidity, dew_point, pop, wind, rain, weather_id, source in zip(
+                self.dt.tolist(), self.temp.tolist(), self.humidity.tolist(), self.dew_point.tolist(),
+                self.pop.tolist(), self.wind.tolist(), self.rain.tolist(), self.weather_id.tolist(),
+                self.source.tolist()
+            )
+        ]
+
+
+def as_columnar(forecast):
+    return forecast if isinstance(forecast, ColumnarForecast) else ColumnarForecast.from_entries(forecast)
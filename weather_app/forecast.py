@@ -1,41 +1,53 @@
-from collections import defaultdict
-from datetime import datetime
-from .utils import calculate_climbing_conditions_score
+import numpy as np
+from .columnar import SOURCE_NAMES, as_columnar
+from .utils import score_adapted
 
-def generate_daily_forecast(adapted, model):
-    grouped = defaultdict(list)
-    for entry in adapted:
-        date = datetime.utcfromtimestamp(entry['dt']).strftime('%Y-%m-%d')
-        grouped[date].append(entry)
+SECONDS_PER_DAY = 86400
 
-    forecast = []
-    for idx, date in enumerate(sorted(grouped)[:8]):
-        entries = grouped[date]
-        temps = [e['main']['temp'] for e in entries]
-        hums = [e['main']['humidity'] for e in entries]
-        dew_points = [e['main']['dew_point'] for e in entries]
-        pops = [e.get('pop', 0) * 100 for e in entries]
-        winds = [e.get('wind', 0) for e in entries if e.get('wind') is not None]
-        rains = [e.get('rain_accumulation', 0) for e in entries if e.get('rain_accumulation') is not None]
+def generate_daily_forecast(adapted, model, scores=None):
+    forecast = as_columnar(adapted)
+    if scores is None:
+        scores = score_adapted(model, forecast)
+    scores = np.asarray(scores, dtype=float)
+    if len(forecast) == 0:
+        return []
 
-        ccs_values = [
-            calculate_climbing_conditions_score(model, e['main']['dew_point'], e['main']['humidity'], e['main']['temp'])
-            for e in entries
-        ]
+    # Group by UTC day over the timestamp array: sort once, then reduce each contiguous run
+    order = np.argsort(forecast.dt, kind='stable')
+    days = forecast.dt[order] // SECONDS_PER_DAY
+    starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])[:8]
+    stop = np.searchsorted(days, days[starts[-1]], side='right')
+    order, days = order[:stop], days[:stop]
 
-        forecast.append({
+    def reduce(ufunc, column):
+        return ufunc.reduceat(column[order], starts)
+
+    temp_low, temp_high = reduce(np.minimum, forecast.temp), reduce(np.maximum, forecast.temp)
+    hum_low, hum_high = reduce(np.minimum, forecast.humidity), reduce(np.maximum, forecast.humidity)
+    # Rounded as NumPy rounds, like the per-row scores (np.float64) the daily values used to come from
+    ccs_low, ccs_high = np.round(reduce(np.minimum, scores), 1), np.round(reduce(np.maximum, scores), 1)
+    precip_high = reduce(np.maximum, forecast.pop * 100)
+    wind_low, wind_high = reduce(np.fmin, forecast.wind), reduce(np.fmax, forecast.wind)
+    rain_total = reduce(np.add, forecast.rain)
+    source = reduce(np.maximum, forecast.source)  # the coarsest tier any of the day's rows came from
+    dates = np.datetime_as_string(days[starts].astype('datetime64[D]')).tolist()
+
+    daily = []
+    for idx, date in enumerate(dates):
+        has_wind = not np.isnan(wind_low[idx])
+        daily.append({
             'date': date,
-            'source': 'hourly' if idx < 2 else '3-hour' if idx < 5 else 'daily',
-            'temp_low': round(min(temps), 1),
-            'temp_high': round(max(temps), 1),
-            'humidity_low': round(min(hums)),
-            'humidity_high': round(max(hums)),
-            'ccs_low': round(min(ccs_values), 1),
-            'ccs_high': round(max(ccs_values), 1),
-            'precip_high': round(max(pops), 1),
-            'wind_low': round(min(winds)) if winds else None,
-            'wind_high': round(max(winds)) if winds else None,
-            'rain_accumulation': round(sum(rains) / 25.4, 2) if rains else 0
+            'source': SOURCE_NAMES[int(source[idx])],
+            'temp_low': round(float(temp_low[idx]), 1),
+            'temp_high': round(float(temp_high[idx]), 1),
+            'humidity_low': round(float(hum_low[idx])),
+            'humidity_high': round(float(hum_high[idx])),
+            'ccs_low': float(ccs_low[idx]),
+            'ccs_high': float(ccs_high[idx]),
+            'precip_high': round(float(precip_high[idx]), 1),
+            'wind_low': round(float(wind_low[idx])) if has_wind else None,
+            'wind_high': round(float(wind_high[idx])) if has_wind else None,
+            'rain_accumulation': round(float(rain_total[idx]) / 25.4, 2)
         })
 
-    return forecast
+    return daily
@@ -0,0 +1,67 @@
+import time
+from datetime import datetime, timezone
+import numpy as np
+from .cache import cache_key
+from .client import OPEN_METEO_BASE_URL, http_client
+from .weather_api import CACHE_TTLS, weather_cache
+
+HISTORY_HOURS = 8
+SECONDS_PER_HOUR = 3600
+
+
+def fetch_past_day(lat, lon, cache=None, client=None, now=None):
+    """open-meteo hourly temperature/humidity around the past day for one coordinate cell.
+
+    Coordinates are rounded to the cache cell (two decimals) before the
+    request, and a response is reused for the rest of the hour, so nearby
+    lookups within an hour cost one upstream call.
+    """
+    cache = cache or weather_cache
+    client = client or http_client
+    now = time.time() if now is None else now
+    lat, lon = round(float(lat), 2), round(float(lon), 2)
+    url = f"{OPEN_METEO_BASE_URL}/v1/forecast"
+    params = {
+        "latitude": f"{lat:.2f}",
+        "longitude": f"{lon:.2f}",
+        "hourly": "temperature_2m,relative_humidity_2m,precipitation",
+        "past_days": 1,
+        "timezone": "auto"
+    }
+    if cache is None:
+        return client.get_json(url, params)
+    key = f"{cache_key('historical', lat, lon)}:{int(now // SECONDS_PER_HOUR)}"
+    return cache.fetch(key, CACHE_TTLS["historical"], lambda: client.get_json(url, params))
+
+
+def _local_offsets(seconds):
+    """UTC offset of this server's timezone for naive times, as ``datetime.astimezone()`` applies it."""
+    def offset(s):
+        naive = datetime.fromtimestamp(int(s), timezone.utc).replace(tzinfo=None)
+        return int(naive.astimezone().utcoffset().total_seconds())
+
+    first, last = offset(seconds[0]), offset(seconds[-1])
+    if first == last:
+        return first
+    return np.array([offset(s) for s in seconds])  # a DST change inside the range
+
+
+def recent_hours(hourly, now=None, hours=HISTORY_HOURS):
+    """Rows of the last ``hours`` hours, oldest first: ``{dt, temp (°F), humidity}``.
+
+    Timestamps are parsed as one datetime64 array. Like the previous
+    per-row ``isoparse(...).astimezone()`` loop, times without an offset are
+    read in the server's timezone.
+    """
+    now = time.time() if now is None else now
+    if not hourly["time"]:
+        return []
+    seconds = np.array(hourly["time"], dtype="datetime64[s]").astype(np.int64)
+    dt = seconds - _local_offsets(seconds)
+    temp_c = np.array(hourly["temperature_2m"], dtype=float)  # null -> NaN
+    temp_f = temp_c * 9 / 5 + 32
+
+    keep = np.flatnonzero((dt >= now - hours * SECONDS_PER_HOUR) & (dt <= now) & ~np.isnan(temp_c))
+    keep = keep[np.argsort(dt[keep], kind="stable")]
+    humidity = hourly["relative_humidity_2m"]
+    return [{"dt": int(dt[i]), "temp": round(float(temp_f[i]), 1), "humidity": humidity[i]} for i in keep]
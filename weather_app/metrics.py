@@ -0,0 +1,229 @@
+import bisect
+import glob
+import importlib
+import json
+import os
+import sys
+import time
+from contextlib import nullcontext
+
+# Seconds; from sub-millisecond scoring up to slow upstream calls
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+HELP = {
+    'ccs_request_seconds': ('histogram', 'Request latency by endpoint.'),
+    'ccs_stage_seconds': ('histogram', 'Time spent in each stage of building a response.'),
+    'ccs_upstream_seconds': ('histogram', 'Upstream weather API call latency by endpoint.'),
+    'ccs_upstream_requests_total': ('counter', 'Upstream weather API calls by endpoint and HTTP status.'),
+    'ccs_cache_requests_total': ('counter', 'Cache lookups by cache and result (hit, stale or miss).'),
+    'ccs_sqlite_write_seconds': ('histogram', 'SQLite batch write latency by table.'),
+    'ccs_sqlite_rows_total': ('counter', 'Rows written to SQLite by table.')
+}
+
+_NOOP = nullcontext()
+
+
+def _original(module, name):
+    """``module.name`` from before gevent monkey-patching.
+
+    Series are recorded from greenlets and from run_cpu's real threads alike,
+    and a patched lock or thread belongs to the gevent hub, so the lock and
+    the flush thread here are always native ones.
+    """
+    monkey = sys.modules.get('gevent.monkey')
+    if monkey is None:
+        return getattr(importlib.import_module(module), name)
+    return monkey.get_original(module, name)
+
+
+class _Histogram:
+    __slots__ = ('counts', 'total', 'n')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.n = 0
+
+
+class _Timer:
+    __slots__ = ('metrics', 'name', 'labels', 'start')
+
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+
+class Metrics:
+    """Process-wide histograms and counters, rendered in Prometheus text format.
+
+    Disabled (METRICS_ENABLED=0, the default), ``timer`` hands back one
+    shared no-op context manager and ``observe``/``inc`` return at once, so
+    instrumented code costs an attribute check.
+
+    Each process keeps its own series. With ``shared_dir`` (METRICS_DIR) set,
+    every process also writes them to ``<pid>.json`` there, from a thread
+    that wakes every ``flush_interval`` seconds and whenever it renders, and
+    ``render`` sums every file, so a scrape answered by any gunicorn worker
+    covers them all.
+    Files of workers that exited are kept, so totals never go backwards.
+    A forked child starts from empty series; its parent's are in the
+    parent's file.
+    """
+
+    def __init__(self, enabled=False, shared_dir=None, flush_interval=1.0):
+        self.enabled = enabled
+        self.shared_dir = shared_dir
+        self.flush_interval = flush_interval
+        self._histograms = {}
+        self._counters = {}
+        self._lock = _original('_thread', 'allocate_lock')()
+        self._flush_lock = _original('_thread', 'allocate_lock')()
+        self._dirty = False
+        self._flusher = None
+        if shared_dir:
+            os.makedirs(shared_dir, exist_ok=True)
+            os.register_at_fork(after_in_child=self._forked)
+
+    def timer(self, name, **labels):
+        return _Timer(self, name, labels) if self.enabled else _NOOP
+
+    def stage(self, stage):
+        """Time one stage of building a response (ccs_stage_seconds)."""
+        return _Timer(self, 'ccs_stage_seconds', {'stage': stage}) if self.enabled else _NOOP
+
+    def observe(self, name, seconds, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        i = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = _Histogram()
+            hist.counts[i] += 1
+            hist.total += seconds
+            hist.n += 1
+        if self.shared_dir:
+            self._changed()
+
+    def inc(self, name, n=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + n
+        if self.shared_dir:
+            self._changed()
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+        if self.shared_dir:
+            self.flush()
+
+    def _forked(self):
+        self._lock = _original('_thread', 'allocate_lock')()
+        self._flush_lock = _original('_thread', 'allocate_lock')()
+        self._histograms.clear()
+        self._counters.clear()
+        self._dirty = False
+        self._flusher = None  # threads don't survive a fork; the next write starts one
+
+    def _changed(self):
+        self._dirty = True
+        if self._flusher is None:
+            with self._lock:
+                if self._flusher is None:
+                    self._flusher = _original('_thread', 'start_new_thread')(self._run_flusher, ())
+
+    def _run_flusher(self):
+        sleep = _original('time', 'sleep')
+        while True:
+            sleep(self.flush_interval)
+            if self._dirty:
+                self.flush()
+
+    def _snapshot(self):
+        with self._lock:
+            histograms = {key: (list(h.counts), h.total, h.n) for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+        return histograms, counters
+
+    def flush(self):
+        """Write this process's series to ``shared_dir``."""
+        with self._flush_lock:
+            self._dirty = False
+            histograms, counters = self._snapshot()
+            data = {
+                'histograms': [[name, labels, *value] for (name, labels), value in histograms.items()],
+                'counters': [[name, labels, value] for (name, labels), value in counters.items()]
+            }
+            path = os.path.join(self.shared_dir, f'{os.getpid()}.json')
+            tmp = f'{path}.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp, path)  # readers see the old or the new file, never a partial one
+
+    def _collect(self):
+        """Series of every process writing to ``shared_dir``, summed."""
+        self.flush()
+        histograms, counters = {}, {}
+        for path in glob.glob(os.path.join(self.shared_dir, '*.json')):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, labels, value in data['counters']:
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, counts, total, n in data['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                merged = histograms.get(key)
+                if merged is None:
+                    histograms[key] = (counts, total, n)
+                else:
+                    histograms[key] = ([a + b for a, b in zip(merged[0], counts)], merged[1] + total, merged[2] + n)
+        return histograms, counters
+
+    def render(self):
+        histograms, counters = self._collect() if self.shared_dir else self._snapshot()
+
+        counter_names = {key[0] for key in counters}
+        lines = []
+        for name in sorted({key[0] for key in histograms} | counter_names):
+            kind, help_text = HELP.get(name, ('counter' if name in counter_names else 'histogram', ''))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_labels(labels)} {value}")
+            for (metric, labels), (counts, total, n) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ('+Inf',), counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {total:.6f}")
+                lines.append(f"{name}_count{_labels(labels)} {n}")
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+
+metrics = Metrics(enabled=os.getenv("METRICS_ENABLED", "0") == "1", shared_dir=os.getenv("METRICS_DIR") or None)
@@ -1,6 +1,8 @@
 from datetime import datetime
-import plotly.graph_objects as go
-from .utils import calculate_climbing_conditions_score, get_weather_icon
+from functools import lru_cache
+import numpy as np
+from .columnar import as_columnar
+from .utils import get_weather_icon, score_adapted
 
 def color_range_for_temp(y):
     if y < 25: return "rgba(255, 0, 0, 0.3)"
@@ -19,56 +21,54 @@ def color_range_for_ccs(y):
     if y <= 6: return "rgba(255, 255, 0, 0.3)"
     return "rgba(0, 255, 0, 0.3)"
 
-def process_hourly_data(adapted, model, value_type):
-    values, colors, x_labels, hover_text = [], [], [], []
-
-    for entry in adapted:
-        dt = datetime.utcfromtimestamp(entry['dt'])
-        temp = entry['main']['temp']
-        rh = entry['main']['humidity']
-        dew_point = entry['main']['dew_point']
-        score = calculate_climbing_conditions_score(model, dew_point, rh, temp)
-        value = {'score': score, 'temp': temp, 'humidity': rh}[value_type]
-
-        values.append(value)
-        colors.append('red' if dew_point >= temp else 'blue')
-
-        icon = get_weather_icon(entry['weather'][0]['id'])
-        time_str = dt.strftime('%A %I:%M %p')
-        rain = entry.get('pop', 0) * 100
+def process_hourly_data(adapted, model, value_type, scores=None):
+    forecast = as_columnar(adapted)
+    if scores is None:
+        scores = score_adapted(model, forecast)
+
+    scores = np.asarray(scores, dtype=float).tolist()
+    temps = forecast.temp.tolist()
+    hums = forecast.humidity.tolist()
+    dew_points = forecast.dew_point.tolist()
+    values = {'score': scores, 'temp': temps, 'humidity': hums}[value_type]
+    colors = np.where(forecast.dew_point >= forecast.temp, 'red', 'blue').tolist()
+
+    x_labels, hover_text = [], []
+    for dt, score, temp, rh, dew_point, weather_id, pop in zip(
+        forecast.dt.tolist(), scores, temps, hums, dew_points, forecast.weather_id.tolist(), forecast.pop.tolist()
+    ):
+        icon = get_weather_icon(weather_id)
+        time_str = datetime.utcfromtimestamp(dt).strftime('%A %I:%M %p')
+        rain = pop * 100
 
         x_labels.append(f"{icon} {time_str}")
         hover_text.append(
             f"{icon} {time_str}<br>"
             f"CCS: {score:.2f}<br>Temp: {temp:.2f}°F<br>"
-            f"Humidity: {rh}%<br>Dew Point: {dew_point:.2f}°F<br>"
+            f"Humidity: {rh:g}%<br>Dew Point: {dew_point:.2f}°F<br>"
             f"Chance of Rain: {rain:.0f}%"
         )
 
-    x_indices = list(range(len(adapted)))
+    x_indices = list(range(len(forecast)))
     return x_indices, values, colors, x_labels, hover_text
 
-def plot_data(x_indices, values, colors, x_labels, hover_text, title, yaxis_title, color_ranges):
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=x_indices,
-        y=values,
-        mode='lines+markers',
-        marker=dict(color=colors),
-        text=hover_text,
-        hovertemplate="<b>%{text}</b><extra></extra>"
-    ))
-
+def color_runs(values, color_ranges):
+    """Collapse the per-hour background bands into runs of one color: [(start, end, color)]."""
+    runs = []
     for i in range(len(values) - 1):
-        fig.add_shape(
-            type="rect",
-            x0=i, x1=i + 1,
-            y0=min(values), y1=max(values),
-            line=dict(width=0),
-            fillcolor=color_ranges(values[i]),
-            opacity=0.3
-        )
+        color = color_ranges(values[i])
+        if runs and runs[-1][2] == color:
+            runs[-1][1] = i + 1
+        else:
+            runs.append([i, i + 1, color])
+    return runs
+
+@lru_cache(maxsize=1)
+def layout_template():
+    """Static part of every layout (tier dividers, labels, theme), validated by plotly once."""
+    import plotly.graph_objects as go  # deferred: the serving path only needs plotly here, once
 
+    fig = go.Figure()
     fig.add_vline(x=48, line_dash="dot", line_color="black", opacity=0.5)
     fig.add_vline(x=71, line_dash="dot", line_color="black", opacity=0.5)
 
@@ -76,23 +76,67 @@ def plot_data(x_indices, values, colors, x_labels, hover_text, title, yaxis_titl
     fig.add_annotation(x=60, y=1.10, yref="paper", text="3-Hour", showarrow=False, font=dict(size=12))
     fig.add_annotation(x=73, y=1.10, yref="paper", text="Daily", showarrow=False, font=dict(size=12))
 
-    fig.update_layout(
-        title=title,
-        xaxis=dict(title='Time', tickmode='array', tickvals=x_indices, ticktext=x_labels, tickangle=45),
-        yaxis=dict(title=yaxis_title),
-        showlegend=False
-    )
+    fig.update_layout(showlegend=False)
+    return fig.to_plotly_json()['layout']
+
+def figure_dict(x_indices, values, colors, x_labels, hover_text, title, yaxis_title, color_ranges):
+    """Plain, JSON-ready figure; nested template pieces are shared, so treat it as read-only."""
+    y0, y1 = (min(values), max(values)) if values else (0, 0)
+    bands = [
+        {
+            'type': 'rect', 'x0': start, 'x1': end, 'y0': y0, 'y1': y1,
+            'line': {'width': 0}, 'fillcolor': color, 'opacity': 0.3
+        }
+        for start, end, color in color_runs(values, color_ranges)
+    ]
+
+    template = layout_template()
+    layout = dict(template)
+    layout['shapes'] = bands + template['shapes']
+    layout['title'] = {'text': title}
+    layout['xaxis'] = {'title': {'text': 'Time'}, 'tickmode': 'array', 'tickvals': x_indices,
+                       'ticktext': x_labels, 'tickangle': 45}
+    layout['yaxis'] = {'title': {'text': yaxis_title}}
+
+    trace = {
+        'type': 'scatter',
+        'x': x_indices,
+        'y': values,
+        'mode': 'lines+markers',
+        'marker': {'color': colors},
+        'text': hover_text,
+        'hovertemplate': "<b>%{text}</b><extra></extra>"
+    }
+
+    return {'data': [trace], 'layout': layout}
 
-    return fig
+def plot_data(x_indices, values, colors, x_labels, hover_text, title, yaxis_title, color_ranges):
+    import plotly.graph_objects as go
 
-def plot_hourly_climbing_scores(model, adapted, destination):
-    ts, vals, cols, labels, hover = process_hourly_data(adapted, model, 'score')
+    fig = figure_dict(x_indices, values, colors, x_labels, hover_text, title, yaxis_title, color_ranges)
+    # Everything in it is either plain data or copied from the validated template
+    return go.Figure(fig, _validate=False)
+
+def plot_hourly_climbing_scores(model, adapted, destination, scores=None):
+    ts, vals, cols, labels, hover = process_hourly_data(adapted, model, 'score', scores)
     return plot_data(ts, vals, cols, labels, hover, f'CCS - {destination}', 'CCS', color_range_for_ccs)
 
-def plot_hourly_temp(model, adapted, destination):
-    ts, vals, cols, labels, hover = process_hourly_data(adapted, model, 'temp')
+def plot_hourly_temp(model, adapted, destination, scores=None):
+    ts, vals, cols, labels, hover = process_hourly_data(adapted, model, 'temp', scores)
     return plot_data(ts, vals, cols, labels, hover, f'Temperature - {destination}', 'Temp (°F)', color_range_for_temp)
 
-def plot_hourly_humidity(model, adapted, destination):
-    ts, vals, cols, labels, hover = process_hourly_data(adapted, model, 'humidity')
+def plot_hourly_humidity(model, adapted, destination, scores=None):
+    ts, vals, cols, labels, hover = process_hourly_data(adapted, model, 'humidity', scores)
     return plot_data(ts, vals, cols, labels, hover, f'Humidity - {destination}', 'Humidity (%)', color_range_for_humidity)
+
+HOURLY_GRAPHS = {
+    'ccs': ('score', 'CCS - {}', 'CCS', color_range_for_ccs),
+    'temperature': ('temp', 'Temperature - {}', 'Temp (°F)', color_range_for_temp),
+    'humidity': ('humidity', 'Humidity - {}', 'Humidity (%)', color_range_for_humidity)
+}
+
+def hourly_figure(name, model, adapted, destination, scores=None):
+    """JSON-ready dict of one of the HOURLY_GRAPHS, for embedding straight into a response."""
+    value_type, title, yaxis_title, color_ranges = HOURLY_GRAPHS[name]
+    ts, vals, cols, labels, hover = process_hourly_data(adapted, model, value_type, scores)
+    return figure_dict(ts, vals, cols, labels, hover, title.format(destination), yaxis_title, color_ranges)
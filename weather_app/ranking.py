@@ -0,0 +1,62 @@
+import numpy as np
+from .columnar import as_columnar
+from .windows import row_durations
+
+RANK_BY = ('mean', 'peak')
+
+
+def rank_destinations(forecasts, scores, start, end, by='mean', max_pop=100, max_wind=None, top_n=20):
+    """Destinations ordered by CCS over the rows that start in ``[start, end)``.
+
+    Only climbable rows count: chance of rain (%) at most ``max_pop`` and
+    wind (mph) at most ``max_wind``. Rows with no wind reading pass. The mean
+    is weighted by how long each row stands for. Destinations with no
+    climbable time in the window are dropped. Every destination's rows are
+    reduced together in one pass over the concatenated columns.
+    """
+    names = [name for name in forecasts if name in scores and len(scores[name])]
+    if not names:
+        return []
+
+    columns = [as_columnar(forecasts[name]) for name in names]
+    lengths = [len(forecast) for forecast in columns]
+    group = np.repeat(np.arange(len(names)), lengths)
+    dt = np.concatenate([forecast.dt for forecast in columns])
+    pop = np.concatenate([forecast.pop for forecast in columns]) * 100
+    wind = np.concatenate([forecast.wind for forecast in columns])
+    duration = np.concatenate([row_durations(forecast) for forecast in columns]).astype(float)
+    score = np.concatenate([np.asarray(scores[name], dtype=float) for name in names])
+
+    in_window = (dt >= start) & (dt < end)
+    ok = in_window & (pop <= max_pop)
+    if max_wind is not None:
+        ok &= ~(wind > max_wind)  # NaN wind compares False, so it passes
+
+    def per_group(weights):
+        return np.bincount(group, weights=weights, minlength=len(names))
+
+    def group_max(values, mask):
+        out = np.full(len(names), -np.inf)
+        np.maximum.at(out, group[mask], values[mask])
+        return out
+
+    window_seconds = per_group(duration * in_window)
+    ok_seconds = per_group(duration * ok)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_ccs = per_group(score * duration * ok) / ok_seconds
+    peak_ccs = group_max(score, ok)
+    max_precip = group_max(pop, in_window)
+    max_wind_seen = group_max(np.nan_to_num(wind, nan=0.0), in_window)
+
+    primary, secondary = (mean_ccs, peak_ccs) if by == 'mean' else (peak_ccs, mean_ccs)
+    ranked = [i for i in np.lexsort((-secondary, -primary)) if ok_seconds[i] > 0][:top_n]
+
+    return [{
+        'name': names[i],
+        'mean_ccs': round(float(mean_ccs[i]), 1),
+        'peak_ccs': round(float(peak_ccs[i]), 1),
+        'climbable_hours': round(float(ok_seconds[i]) / 3600, 1),
+        'window_hours': round(float(window_seconds[i]) / 3600, 1),
+        'max_precip': round(float(max_precip[i]), 1),
+        'max_wind': round(float(max_wind_seen[i]))
+    } for i in ranked]
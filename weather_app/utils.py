@@ -1,3 +1,5 @@
+import numpy as np
+
 def calculate_dew_point(temp, rh):
     return temp - ((100 - rh) / 5.0)
 
@@ -5,6 +7,28 @@ def calculate_climbing_conditions_score(model, dew_point, humidity, temperature)
     score = model.predict([(temperature, humidity)])[0]
     return max(0, score - 2) if temperature == dew_point else score
 
+def calculate_climbing_conditions_scores(model, dew_points, humidities, temperatures):
+    temperatures = np.asarray(temperatures, dtype=float)
+    humidities = np.asarray(humidities, dtype=float)
+    dew_points = np.asarray(dew_points, dtype=float)
+    if temperatures.size == 0:
+        return np.empty(0)
+
+    # One predict call for every row, with the same dew-point penalty as the scalar version
+    scores = np.asarray(model.predict(np.column_stack((temperatures, humidities))), dtype=float)
+    return np.where(temperatures == dew_points, np.maximum(0, scores - 2), scores)
+
+def score_adapted(model, adapted):
+    if isinstance(adapted, (list, tuple)):
+        return calculate_climbing_conditions_scores(
+            model,
+            [e['main']['dew_point'] for e in adapted],
+            [e['main']['humidity'] for e in adapted],
+            [e['main']['temp'] for e in adapted]
+        )
+    # ColumnarForecast: the columns are already arrays
+    return calculate_climbing_conditions_scores(model, adapted.dew_point, adapted.humidity, adapted.temp)
+
 def get_weather_icon(weather_id):
     if 200 <= weather_id < 300: return '⛈️'
     if 300 <= weather_id < 600: return '🌧️'
@@ -13,4 +37,4 @@ def get_weather_icon(weather_id):
     if weather_id == 800: return '☀️'
     if weather_id == 801: return '🌤️'
     if 802 <= weather_id <= 804: return '☁️'
-    return '❓'
\ No newline at end of file
+    return '❓'
@@ -1,25 +1,66 @@
+import os
 import time
-import requests
-from .utils import calculate_dew_point
-
-def fetch_weather_data(api_key, lat, lon):
-    def get_json(url, params):
-        try:
-            res = requests.get(url, params=params, timeout=10)
-            return res.json() if res.status_code == 200 else None
-        except requests.RequestException as e:
-            print("Request error:", e)
-            return None
-
-    data_2_5 = get_json(
-        "https://api.openweathermap.org/data/2.5/forecast",
-        {"lat": lat, "lon": lon, "appid": api_key, "units": "imperial"}
-    )
-    data_3_0 = get_json(
-        "https://api.openweathermap.org/data/3.0/onecall",
-        {"lat": lat, "lon": lon, "appid": api_key, "units": "imperial", "exclude": "minutely,alerts"}
+from .cache import cache_key, make_cache_from_env
+from .client import OPENWEATHER_BASE_URL, http_client
+from .columnar import ColumnarForecast
+from .metrics import metrics
+
+# Forecasts change at most hourly, so each endpoint is reused for a while per location
+CACHE_TTLS = {
+    "forecast": int(os.getenv("WEATHER_TTL_FORECAST", "3600")),
+    "onecall": int(os.getenv("WEATHER_TTL_ONECALL", "600")),
+    "historical": int(os.getenv("WEATHER_TTL_HISTORICAL", "3600"))
+}
+
+weather_cache = make_cache_from_env()
+
+# Set by the app (ARCHIVE_ENABLED=1): records every snapshot and stands in while upstream is down
+snapshot_archive = None
+STALE_MAX_AGE = int(os.getenv("ARCHIVE_STALE_MAX_AGE", "21600"))
+
+def fetch_weather_data(api_key, lat, lon, cache=None, client=None, on_fetch=None):
+    """Both OpenWeather responses for a location, each reused from the cache within its TTL.
+
+    ``on_fetch(data_2_5, data_3_0, fetched_at)`` is called whenever the
+    onecall response actually comes from upstream (not from the cache), with
+    the 2.5 response it will be served alongside.
+    """
+    cache = cache or weather_cache
+    client = client or http_client
+
+    def cached(endpoint, load):
+        if cache is None:
+            return load()
+        return cache.fetch(cache_key(endpoint, lat, lon), CACHE_TTLS[endpoint], load)
+
+    # Both endpoints are independent: run the 2.5 call on the pool while this thread does 3.0
+    future_2_5 = client.submit(
+        cached,
+        "forecast",
+        lambda: client.get_json(
+            f"{OPENWEATHER_BASE_URL}/data/2.5/forecast",
+            {"lat": lat, "lon": lon, "appid": api_key, "units": "imperial"}
+        )
     )
 
+    def load_3_0():
+        data = client.get_json(
+            f"{OPENWEATHER_BASE_URL}/data/3.0/onecall",
+            {"lat": lat, "lon": lon, "appid": api_key, "units": "imperial", "exclude": "minutely,alerts"}
+        )
+        if data and on_fetch is not None:
+            fetched_at = int(time.time())
+            data_2_5 = future_2_5.result()
+            if data_2_5:
+                try:
+                    on_fetch(data_2_5, data, fetched_at)
+                except Exception as e:
+                    print(f"on_fetch failed for ({lat}, {lon}): {e}")
+        return data
+
+    data_3_0 = cached("onecall", load_3_0)
+    data_2_5 = future_2_5.result()
+
     if not data_2_5:
         print("[v2.5] Error fetching data.")
     if not data_3_0:
@@ -27,18 +68,9 @@ def fetch_weather_data(api_key, lat, lon):
 
     return data_2_5, data_3_0
 
-def fetch_hourly_weather_data(api_key, lat, lon):
-    data_2_5, data_3_0 = fetch_weather_data(api_key, lat, lon)
-    if not data_2_5 or not data_3_0:
-        return None, None, None
-
-    now = int(time.time())
-    hourly_v3 = data_3_0.get("hourly", [])
-    three_hour_v2 = data_2_5.get("list", [])
-    daily_v3 = data_3_0.get("daily", [])
-
+def current_conditions(data_3_0):
     current_v3 = data_3_0.get("current", {})
-    current_weather = {
+    return {
         'temp': current_v3.get('temp'),
         'humidity': current_v3.get('humidity'),
         'dew_point': current_v3.get('dew_point'),
@@ -47,66 +79,42 @@ def fetch_hourly_weather_data(api_key, lat, lon):
         'wind_direction': current_v3.get('wind_gust', 0)
     }
 
-    def adapt_entry(dt, temp, humidity, dew_point, wind, rain_accumulation, weather=None, pop=0):
-        return {
-            "dt": dt,
-            "main": {
-                "temp": temp,
-                "humidity": humidity,
-                "dew_point": dew_point
-            },
-            "weather": weather or [{"id": 800}],
-            "pop": pop,
-            "wind": wind,
-            "rain_accumulation": rain_accumulation
-        }
-
-    adapted = []
-    for entry in hourly_v3:
-        if entry["dt"] >= now:
-            adapted.append(adapt_entry(
-                dt=entry["dt"],
-                temp=entry["temp"],
-                humidity=entry["humidity"],
-                dew_point=entry["dew_point"],
-                weather=entry.get("weather"),
-                pop=entry.get("pop", 0),
-                wind=entry.get("wind_speed", 0),
-                rain_accumulation=entry.get("rain", {}).get("1h", 0)
-            ))
-
-    max_ts = max((e["dt"] for e in adapted), default=now)
-    for entry in three_hour_v2:
-        if entry["dt"] > max_ts:
-            temp = entry["main"]["temp"]
-            humidity = entry["main"]["humidity"]
-            dew_point = calculate_dew_point(temp, humidity)
-            wind_speed = entry.get("wind", {}).get("speed")
-            rain_accumulation = entry.get("rain", {}).get("3h", 0)
-            adapted.append(adapt_entry(
-                dt=entry["dt"],
-                temp=temp,
-                humidity=humidity,
-                dew_point=dew_point,
-                weather=entry.get("weather"),
-                pop=entry.get("pop", 0),
-                wind=wind_speed,
-                rain_accumulation=rain_accumulation
-            ))
-
-    max_ts = max((e["dt"] for e in adapted), default=max_ts)
-    for entry in daily_v3:
-        dt = entry["dt"] + 12 * 3600
-        if dt > max_ts:
-            adapted.append(adapt_entry(
-                dt=dt,
-                temp=entry["temp"]["day"],
-                humidity=entry["humidity"],
-                dew_point=entry["dew_point"],
-                weather=entry.get("weather"),
-                pop=entry.get("pop", 0),
-                wind=entry.get("wind_speed", 0),
-                rain_accumulation=entry.get("rain", 0)
-            ))
-
-    return current_weather, adapted, daily_v3
+def fetch_columnar_weather_data(api_key, lat, lon, cache=None, client=None, archive=None):
+    archive = archive or snapshot_archive
+    # Archived once per upstream fetch, as issued then; cache hits re-serve the same forecast
+    on_fetch = (lambda data_2_5, data_3_0, fetched_at: archive.record_response(
+        lat, lon, data_2_5, data_3_0, fetched_at)) if archive is not None else None
+    with metrics.stage("fetch"):
+        data_2_5, data_3_0 = fetch_weather_data(api_key, lat, lon, cache, client, on_fetch=on_fetch)
+    if not data_2_5 or not data_3_0:
+        return archived_weather_data(archive, lat, lon)
+
+    now = int(time.time())
+    with metrics.stage("adapt"):
+        forecast = ColumnarForecast.from_api(data_2_5, data_3_0, now)
+    current = current_conditions(data_3_0)
+
+    # Copied so callers can shift timestamps without touching the cached response
+    daily_v3 = [dict(entry) for entry in data_3_0.get("daily", [])]
+
+    return current, forecast, daily_v3
+
+def archived_weather_data(archive, lat, lon, max_age=None):
+    """The latest archived snapshot, trimmed to rows still ahead, when upstream has failed."""
+    snapshot = archive.latest(lat, lon, STALE_MAX_AGE if max_age is None else max_age) if archive is not None else None
+    if snapshot is None:
+        return None, None, None
+    now = int(time.time())
+    forecast = snapshot['forecast']
+    forecast = forecast.take(forecast.dt >= now - 3600)
+    if not len(forecast):
+        return None, None, None
+    print(f"Upstream unavailable; serving the forecast issued {(now - snapshot['issued_at']) // 60} min ago "
+          f"for ({lat}, {lon})")
+    return snapshot['current'], forecast, snapshot['daily']
+
+def fetch_hourly_weather_data(api_key, lat, lon, cache=None, client=None):
+    current_weather, forecast, daily_v3 = fetch_columnar_weather_data(api_key, lat, lon, cache, client)
+    if forecast is None:
+        return None, None, None
+    return current_weather, forecast.to_entries(), daily_v3
@@ -0,0 +1,65 @@
+import numpy as np
+from .columnar import as_columnar, SOURCE_NAMES
+
+# How long one row of each source tier stands for
+TIER_SECONDS = np.array([3600, 3 * 3600, 24 * 3600])
+
+
+def row_durations(forecast):
+    """Seconds each row stands for: until the next row, capped at its tier's step."""
+    step = TIER_SECONDS[forecast.source]
+    return np.minimum(np.r_[np.diff(forecast.dt), step[-1]], step)
+
+
+def find_climbing_windows(forecast, scores, min_hours=2, min_ccs=6.0, max_pop=30, max_wind=20, top_n=5):
+    """Top contiguous stretches of good climbing weather over the whole horizon.
+
+    A row is good when its CCS is at least ``min_ccs``, its chance of rain (%)
+    is at most ``max_pop`` and its wind (mph) is at most ``max_wind``; rows
+    with no wind reading pass. Each row covers the time until the next row,
+    capped at its tier's step. Adjacent good rows form one window, ranked by
+    time-weighted mean CCS, then length. Windows shorter than ``min_hours``
+    are dropped.
+    """
+    forecast = as_columnar(forecast)
+    scores = np.asarray(scores, dtype=float)
+    n = len(forecast)
+    if n == 0:
+        return []
+
+    dt = forecast.dt
+    duration = row_durations(forecast)
+    covered_until = dt + duration
+
+    wind = np.nan_to_num(forecast.wind, nan=0.0)
+    good = (scores >= min_ccs) & (forecast.pop * 100 <= max_pop) & (wind <= max_wind)
+
+    # A run breaks on a bad row or on a hole in coverage between two good rows
+    joined = np.r_[False, good[1:] & good[:-1] & (covered_until[:-1] >= dt[1:])]
+    starts = np.flatnonzero(good & ~joined)
+    ends = np.flatnonzero(good & ~np.r_[joined[1:], False])
+
+    # Prefix sums give each run's weighted mean in O(1)
+    weighted = np.r_[0.0, np.cumsum(scores * duration)]
+    seconds = np.r_[0, np.cumsum(duration)]
+    length = seconds[ends + 1] - seconds[starts]
+    mean_ccs = (weighted[ends + 1] - weighted[starts]) / length
+
+    keep = length >= min_hours * 3600
+    starts, ends, length, mean_ccs = starts[keep], ends[keep], length[keep], mean_ccs[keep]
+    ranked = np.lexsort((-length, -mean_ccs))[:top_n]
+
+    windows = []
+    for i in ranked:
+        s, e = starts[i], ends[i]
+        windows.append({
+            'start': int(dt[s]),
+            'end': int(covered_until[e]),
+            'hours': round(float(length[i]) / 3600, 1),
+            'mean_ccs': round(float(mean_ccs[i]), 1),
+            'peak_ccs': round(float(scores[s:e + 1].max()), 1),
+            'max_precip': round(float(forecast.pop[s:e + 1].max() * 100), 1),
+            'max_wind': round(float(wind[s:e + 1].max())),
+            'source': SOURCE_NAMES[int(forecast.source[e])]
+        })
+    return windows